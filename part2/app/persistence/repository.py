@@ -5,10 +5,18 @@ class Repository(ABC):
     def add(self, obj):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
     @abstractmethod
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
@@ -17,36 +25,143 @@ class Repository(ABC):
     def update(self, obj_id, data):
         pass
 
+    @abstractmethod
+    def update_many(self, updates):
+        pass
+
     @abstractmethod
     def delete(self, obj_id):
         pass
 
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_all_by_attribute(self, attr_name, attr_value):
+        pass
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Dict-backed repository.
+
+    Attributes listed in `indexes` (non-unique) or `unique_indexes` get a
+    hash index kept up to date by add, update and delete, so
+    get_by_attribute and get_all_by_attribute on them are O(1).
+    """
+
+    def __init__(self, indexes=(), unique_indexes=()):
         self._storage = {}
+        self._unique = set(unique_indexes)
+        # attr name -> {value: {obj_id: None}} (dicts keep insertion order)
+        self._indexes = {attr: {} for attr in (*indexes, *unique_indexes)}
+        # attr name -> {obj_id: value}, what each object is indexed under
+        self._indexed_values = {attr: {} for attr in self._indexes}
+
+    def _check_unique(self, obj_id, values):
+        for attr_name, value in values.items():
+            if attr_name not in self._unique or value is None:
+                continue
+            owners = self._indexes[attr_name].get(value, {})
+            if any(owner != obj_id for owner in owners):
+                raise ValueError(f"{attr_name} '{value}' already exists")
+
+    def _index(self, obj):
+        for attr_name, index in self._indexes.items():
+            value = getattr(obj, attr_name, None)
+            index.setdefault(value, {})[obj.id] = None
+            self._indexed_values[attr_name][obj.id] = value
+
+    def _unindex(self, obj_id):
+        for attr_name, index in self._indexes.items():
+            if obj_id not in self._indexed_values[attr_name]:
+                continue
+            value = self._indexed_values[attr_name].pop(obj_id)
+            owners = index[value]
+            del owners[obj_id]
+            if not owners:
+                del index[value]
 
     def add(self, obj):
+        self._check_unique(obj.id, {attr_name: getattr(obj, attr_name, None)
+                                    for attr_name in self._unique})
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
+
+    def add_many(self, objs):
+        """Add several objects; nothing is stored if one breaks a unique index"""
+        for attr_name in self._unique:
+            seen = {}
+            for obj in objs:
+                value = getattr(obj, attr_name, None)
+                if value is not None and seen.setdefault(value, obj.id) != obj.id:
+                    raise ValueError(f"{attr_name} '{value}' already exists")
+        for obj in objs:
+            self._check_unique(obj.id, {attr_name: getattr(obj, attr_name, None)
+                                        for attr_name in self._unique})
+        for obj in objs:
+            self._unindex(obj.id)
+            self._storage[obj.id] = obj
+            self._index(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids):
+        """Return the objects with these ids, in order, skipping unknown ones"""
+        return [self._storage[obj_id] for obj_id in dict.fromkeys(obj_ids)
+                if obj_id in self._storage]
+
     def get_all(self):
         return list(self._storage.values())
 
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
+            self._check_unique(obj_id, data)
             obj.update(data)
+            # Re-read the values: callers may also have set attributes directly
+            self._unindex(obj_id)
+            self._index(obj)
+
+    def update_many(self, updates):
+        """Apply {obj_id: data} updates, return the updated objects"""
+        updated = []
+        for obj_id, data in updates.items():
+            obj = self.get(obj_id)
+            if obj:
+                self.update(obj_id, data)
+                updated.append(obj)
+        return updated
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
             del self._storage[obj_id]
 
+    def delete_many(self, obj_ids):
+        """Delete several objects, return how many existed"""
+        deleted = 0
+        for obj_id in obj_ids:
+            if obj_id in self._storage:
+                self.delete(obj_id)
+                deleted += 1
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._indexes:
+            owners = self._indexes[attr_name].get(attr_value)
+            return self._storage[next(iter(owners))] if owners else None
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._indexes:
+            owners = self._indexes[attr_name].get(attr_value, {})
+            return [self._storage[obj_id] for obj_id in owners]
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
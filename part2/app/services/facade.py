@@ -7,10 +7,10 @@ from app.models.review import Review
 
 class HBnBFacade:
     def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+        self.user_repo = InMemoryRepository(unique_indexes=('email',))
+        self.place_repo = InMemoryRepository(indexes=('owner_id',))
+        self.review_repo = InMemoryRepository(indexes=('place',))
+        self.amenity_repo = InMemoryRepository(unique_indexes=('name',))
 
     def create_user(self, user_data):
         user = User(**user_data)
@@ -56,6 +56,15 @@ class HBnBFacade:
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
+    def get_amenities(self, amenity_ids):
+        """Look amenities up by id; raise ValueError naming every unknown id."""
+        amenities = self.amenity_repo.get_many(amenity_ids)
+        found = {amenity.id for amenity in amenities}
+        unknown = [a_id for a_id in dict.fromkeys(amenity_ids) if a_id not in found]
+        if unknown:
+            raise ValueError(f"Unknown amenity ids: {', '.join(unknown)}")
+        return amenities
+
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
     
@@ -84,14 +93,10 @@ class HBnBFacade:
         if not owner:
             raise ValueError("Owner is not found")
 
-        amenity_ids = place_data.pop('amenities', [])
+        amenities = self.get_amenities(place_data.pop('amenities', []))
 
         place = Place(**place_data)
-        
-        for a_id in amenity_ids:
-            amenity = self.amenity_repo.get(a_id)
-            if amenity:
-                place.amenities.append(amenity)
+        place.amenities = amenities
 
         self.place_repo.add(place)
         return place
@@ -109,16 +114,13 @@ class HBnBFacade:
 
         for key, value in place_data.items():
             if key == 'amenities':
-                new_amenities = []
-                for amenity_id in value:
-                    amenity = self.amenity_repo.get(amenity_id)
-                    if amenity:
-                        new_amenities.append(amenity)
-                place.amenities = new_amenities
+                place.amenities = self.get_amenities(value)
             elif hasattr(place, key):
                 setattr(place, key, value)
 
-        self.place_repo.update(place_id, place_data)
+        # Amenities are already resolved to objects above
+        self.place_repo.update(place_id, {key: value for key, value in place_data.items()
+                                          if key != 'amenities'})
         return place
     
     # ---------- Reviews ---------- #
@@ -151,11 +153,7 @@ class HBnBFacade:
         place = self.place_repo.get(place_id)
         if not place:
             raise ValueError("Place not found")
-        reviews = []
-        for r in self.review_repo.get_all():
-            if r.place.id == place_id:
-                reviews.append(r)
-        return reviews
+        return self.review_repo.get_all_by_attribute('place', place)
 
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
@@ -0,0 +1,83 @@
+import unittest
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(indexes=('last_name',),
+                                       unique_indexes=('email',))
+        self.jane = User("Jane", "Doe", "jane@example.com")
+        self.john = User("John", "Doe", "john@example.com")
+        self.repo.add(self.jane)
+        self.repo.add(self.john)
+
+    def test_lookups(self):
+        self.assertIs(self.repo.get_by_attribute('email', 'john@example.com'), self.john)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'nobody@example.com'))
+        self.assertEqual(self.repo.get_all_by_attribute('last_name', 'Doe'),
+                         [self.jane, self.john])
+        # Attributes without an index still work through a scan
+        self.assertEqual(self.repo.get_all_by_attribute('first_name', 'Jane'), [self.jane])
+
+    def test_unique_violation(self):
+        with self.assertRaises(ValueError):
+            self.repo.add(User("Other", "Jane", "jane@example.com"))
+        with self.assertRaises(ValueError):
+            self.repo.update(self.john.id, {'email': 'jane@example.com'})
+        self.assertEqual(self.john.email, 'john@example.com')
+
+    def test_maintained_on_update_and_delete(self):
+        self.repo.update(self.jane.id, {'email': 'jane.doe@example.com', 'last_name': 'Roe'})
+        self.assertIsNone(self.repo.get_by_attribute('email', 'jane@example.com'))
+        self.assertIs(self.repo.get_by_attribute('email', 'jane.doe@example.com'), self.jane)
+        self.assertEqual(self.repo.get_all_by_attribute('last_name', 'Doe'), [self.john])
+
+        # Attributes set directly before update() are picked up too
+        self.john.last_name = 'Roe'
+        self.repo.update(self.john.id, {})
+        self.assertEqual(self.repo.get_all_by_attribute('last_name', 'Roe'),
+                         [self.jane, self.john])
+
+        self.repo.delete(self.jane.id)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'jane.doe@example.com'))
+        self.assertEqual(self.repo.get_all_by_attribute('last_name', 'Roe'), [self.john])
+        # The deleted email can be registered again
+        self.repo.add(User("Jane", "Doe", "jane.doe@example.com"))
+
+
+class TestInMemoryRepositoryBulk(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(unique_indexes=('email',))
+        self.users = [User("User", str(i), f"user{i}@example.com") for i in range(3)]
+        self.repo.add_many(self.users)
+
+    def test_add_many_is_all_or_nothing(self):
+        with self.assertRaises(ValueError):
+            self.repo.add_many([User("New", "One", "new@example.com"),
+                                User("Dup", "Two", "user0@example.com")])
+        with self.assertRaises(ValueError):
+            self.repo.add_many([User("New", "One", "new@example.com"),
+                                User("New", "Two", "new@example.com")])
+        self.assertEqual(len(self.repo.get_all()), 3)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'new@example.com'))
+
+    def test_get_many(self):
+        ids = [self.users[2].id, 'unknown', self.users[0].id, self.users[2].id]
+        self.assertEqual(self.repo.get_many(ids), [self.users[2], self.users[0]])
+        self.assertEqual(self.repo.get_many([]), [])
+
+    def test_update_and_delete_many(self):
+        updated = self.repo.update_many({
+            self.users[0].id: {'last_name': 'Zero'},
+            'unknown': {'last_name': 'Nobody'}
+        })
+        self.assertEqual(updated, [self.users[0]])
+        self.assertEqual(self.users[0].last_name, 'Zero')
+
+        self.assertEqual(self.repo.delete_many([self.users[1].id, 'unknown']), 1)
+        self.assertEqual(self.repo.get_all(), [self.users[0], self.users[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
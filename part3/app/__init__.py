@@ -1,19 +1,26 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_restx import Api
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from app.config import DevelopmentConfig
+from app.config import get_config
+from app.hashing import PasswordHasher
+from app.imaging import ImagePipeline
+from app.jobs import JobQueue
+from app.ratelimit import LoginLimiter
+from app.persistence import replicas
 import os
 
-bcrypt = Bcrypt()
+hasher = PasswordHasher()
+images = ImagePipeline()
+jobs = JobQueue()
+limiter = LoginLimiter()
 jwt = JWTManager()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': replicas.RoutingSession})
 
-def create_app(config_class=DevelopmentConfig):
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.config.from_object(config_class or get_config())
 
     # SECRET_KEY and JWT_SECRET_KEY
     app.config['SECRET_KEY'] = app.config.get('SECRET_KEY', 'super-secret-key-change-this')
@@ -25,15 +32,32 @@ def create_app(config_class=DevelopmentConfig):
     app.config['JWT_ACCESS_COOKIE_PATH'] = '/'
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False 
 
-    bcrypt.init_app(app)
+    hasher.init_app(app)
+    images.init_app(app)
+    jobs.init_app(app)
+    limiter.init_app(app)
     jwt.init_app(app)
     db.init_app(app)
 
+    from app.persistence.sqlite import configure_engine
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config.get('SQLITE_PROFILE', 'default'))
+        replicas.init_app(app, db)
+
     # Import des modèles
     from app.models.user import User
     from app.models.place import Place
     from app.models.review import Review
     from app.models.amenity import Amenity
+    from app.models.job import Job
+
+    # Entity cache, fresh for every app so tests never share entries
+    from app.persistence.cache import build_cache
+    from app.services.facade import facade
+    facade.configure_cache(build_cache(app.config))
+    # Registers the background tasks on `jobs`
+    from app.services import tasks  # noqa: F401
 
     # Import des namespaces API
     from app.api.v1.users import api as users_ns
@@ -50,12 +74,13 @@ def create_app(config_class=DevelopmentConfig):
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(auth_ns, path='/api/v1/auth')
+    # The ASGI mode renders async handler results through it, see app.asgi
+    app.extensions['restx_api'] = api
 
-    IMAGES_FOLDER = '/home/malik31200/holbertonschool-hbnb/part4/base_files/images'
-
+    # Photo variants (immutable, cached for a year) and legacy photo files
     @app.route('/images/<path:filename>')
     def serv_image(filename):
-        return send_from_directory(IMAGES_FOLDER,filename)
+        return images.response(filename)
 
     # CORS
     CORS(app, resources={
@@ -63,6 +88,7 @@ def create_app(config_class=DevelopmentConfig):
             "origins": ["http://localhost:8000", "http://127.0.0.1:8000"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["X-Next-Cursor", "X-Total-Count", "ETag"],
         },
         r"/images/*": {
             "origins": ["http://localhost:8000", "http://127.0.0.1:8000"],
@@ -0,0 +1,58 @@
+"""HTTP conditional GET support (ETag / Last-Modified).
+
+Handlers build validators from a cheap version probe and check them before
+loading and serializing the full representation:
+
+    not_modified, headers = conditional(facade.get_amenities_version())
+    if not_modified:
+        return not_modified
+    ...
+    return body, 200, headers
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.http import http_date
+
+
+def _last_modified(version):
+    """Latest datetime found in a version tuple, as aware UTC"""
+    stamps = [value for value in version if isinstance(value, datetime)]
+    if not stamps:
+        return None
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def make_etag(version):
+    """Opaque tag fingerprinting a version tuple (sent as a weak ETag)"""
+    return hashlib.sha1(repr(tuple(version)).encode()).hexdigest()[:20]
+
+
+def conditional(version):
+    """
+    Return (not_modified, headers) for a GET whose representation changes
+    whenever `version` does.
+
+    not_modified is a ready 304 response when the client copy is still
+    fresh, else None; headers carry the validators for the 200 response.
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    etag = make_etag(version)
+    last_modified = _last_modified(version)
+    # Weak: the same version may serialize to byte-different bodies
+    headers = {'ETag': f'W/"{etag}"', 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+
+    if fresh:
+        return Response(status=304, headers=headers), headers
+    return None, headers
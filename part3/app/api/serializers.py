@@ -0,0 +1,157 @@
+"""Compiled response serializers.
+
+A Serializer declares the fields of a representation once. For each set
+of requested fields it compiles (and caches) a plain function building
+the dict with direct attribute access, so no per-request walk over field
+definitions happens, and json_response encodes the result straight into
+the response body, bypassing flask-restx marshalling.
+
+    PLACE = Serializer({
+        'id': 'id',                                   # attribute
+        'photos': lambda place: place.photos or [],   # callable
+        'owner': Nested(USER),                        # nested object
+        'amenities': Nested(AMENITY, many=True),      # nested list
+    })
+    body = PLACE.dump_many(places, parse_fields(request.args.get('fields'), PLACE))
+
+Datetimes are left to the encoder (ISO 8601, as isoformat()).
+
+Large collections are streamed instead: stream_response encodes rows batch
+by batch as a JSON array, or as NDJSON when the client prefers it.
+"""
+import json
+from datetime import datetime
+from itertools import islice
+
+from flask import Response, request, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class Nested:
+    """Field serialized with another Serializer; `attr` defaults to the field name"""
+
+    def __init__(self, serializer, attr=None, many=False):
+        self.serializer = serializer
+        self.attr = attr
+        self.many = many
+
+
+class Serializer:
+    """Field plan for one representation of a model"""
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._plans = {}
+
+    def plan(self, only=None):
+        """Return the compiled function for `only` (None: every field)"""
+        key = None if only is None else tuple(name for name in self.fields if name in only)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self._compile(self.fields if key is None else key)
+        return plan
+
+    def _compile(self, names):
+        namespace = {}
+        items = []
+        for index, name in enumerate(names):
+            spec = self.fields[name]
+            if isinstance(spec, str):
+                value = f"obj.{spec}"
+            elif isinstance(spec, Nested):
+                namespace[f"_nested{index}"] = spec.serializer.plan()
+                attr = f"obj.{spec.attr or name}"
+                if spec.many:
+                    value = f"[_nested{index}(item) for item in {attr}]"
+                else:
+                    value = f"(None if {attr} is None else _nested{index}({attr}))"
+            else:
+                namespace[f"_field{index}"] = spec
+                value = f"_field{index}(obj)"
+            items.append(f"{name!r}: {value}")
+        source = "def serialize(obj):\n    return {" + ", ".join(items) + "}\n"
+        exec(compile(source, f"<serializer {', '.join(names)}>", "exec"), namespace)
+        return namespace['serialize']
+
+    def dump(self, obj, only=None):
+        return self.plan(only)(obj)
+
+    def dump_many(self, objs, only=None):
+        serialize = self.plan(only)
+        return [serialize(obj) for obj in objs]
+
+
+def parse_fields(value, serializer, extra=()):
+    """
+    Parse a sparse fieldset ("id,title,price") for a serializer.
+
+    `extra` names fields the view adds itself. Returns None when no
+    selection was asked for; raises ValueError on unknown field names.
+    """
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = sorted(names - serializer.fields.keys() - set(extra))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """Encode to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def json_response(data, status=200, headers=None):
+    """Response carrying `data` encoded as JSON"""
+    return Response(dumps(data), status=status, headers=headers,
+                    mimetype='application/json')
+
+
+NDJSON = 'application/x-ndjson'
+
+
+def wants_ndjson():
+    """True when the Accept header prefers NDJSON over a JSON array"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def _encode_chunks(rows, serialize, ndjson, batch_size):
+    rows = iter(rows)
+    first = True
+    while True:
+        batch = [serialize(row) for row in islice(rows, batch_size)]
+        if not batch:
+            break
+        if ndjson:
+            yield b''.join(dumps(item) + b'\n' for item in batch)
+        else:
+            # Inner part of the encoded batch, joined into one array
+            yield (b'[' if first else b',') + dumps(batch)[1:-1]
+        first = False
+    if not ndjson:
+        yield b'[]' if first else b']'
+
+
+def stream_response(rows, serializer, headers=None, ndjson=False, batch_size=1000):
+    """
+    Response streaming `rows` through `serializer`, one chunk per batch:
+    a JSON array, or one document per line with ndjson. Only a batch is
+    held at a time. The status is sent before the rows are read, so a
+    failure midway truncates the body rather than turning it into an error.
+    """
+    chunks = _encode_chunks(rows, serializer.plan(), ndjson, batch_size)
+    return Response(stream_with_context(chunks), headers=headers,
+                    mimetype=NDJSON if ndjson else 'application/json')
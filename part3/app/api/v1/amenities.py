@@ -1,6 +1,8 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api.principal import authorize
+from app.api.serializers import Serializer, json_response
 from app.services import facade
+from app.api.conditional import conditional
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -8,20 +10,18 @@ amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Name of the amenity')
 })
 
+AMENITY = Serializer({'id': 'id', 'name': 'name'})
+
 @api.route('/')
 class AmenityList(Resource):
     @api.expect(amenity_model)
     @api.response(201, 'Amenity successfully created')
     @api.response(400, 'Invalid input data')
-    @jwt_required()
+    @authorize(admin=True)
     def post(self):
         """
         Register a new amenity
         """
-        current_user = get_jwt_identity()
-        if not current_user.get('is_admin'):
-            return {'error': 'Admin privileges required'}, 403
-        
         amenity_data = api.payload
 
         existing_amenity = facade.get_amenity_by_name(amenity_data['name'])
@@ -29,7 +29,8 @@ class AmenityList(Resource):
             return {'error': 'Amenity already exists'}, 400
         
         try:
-            new_amenity = facade.create_amenity(amenity_data)
+            with facade.transaction():
+                new_amenity = facade.create_amenity(amenity_data)
         except ValueError:
             return {'error': 'Invalid input data'}, 400
         else:
@@ -43,16 +44,13 @@ class AmenityList(Resource):
         """
         Retrieve a list of all amenities
         """
+        not_modified, headers = conditional(facade.get_amenities_version())
+        if not_modified:
+            return not_modified
         amenity_list = facade.get_all_amenities()
-        amenities = []
         if len(amenity_list) == 0:
             return {'error': 'No amenity found'}, 404
-        for amenity in amenity_list:
-            amenities.append({
-                'id': amenity.id,
-                'name': amenity.name
-            })
-        return amenities, 200
+        return json_response(AMENITY.dump_many(amenity_list), 200, headers)
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
@@ -65,30 +63,27 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
-        return {
-            'id': amenity.id,
-            'name': amenity.name
-        }, 200
+        not_modified, headers = conditional((amenity.id, amenity.updated_at))
+        if not_modified:
+            return not_modified
+        return json_response(AMENITY.dump(amenity), 200, headers)
 
     @api.expect(amenity_model)
     @api.response(200, 'Amenity updated successfully')
     @api.response(404, 'Amenity not found')
     @api.response(400, 'Invalid input data')
-    @jwt_required()
+    @authorize(admin=True)
     def put(self, amenity_id):
         """
         Update an amenity's information
         """
-        current_user = get_jwt_identity()
-        if not current_user.get('is_admin'):
-            return {'error': 'Admin privileges required'}, 403
-        
         amenity_data = api.payload
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
         
-        updated_amenity = facade.update_amenity(amenity_id, amenity_data)
+        with facade.transaction():
+            updated_amenity = facade.update_amenity(amenity_id, amenity_data)
         if not updated_amenity:
             return {'error': 'Invalid input data'}, 400
         return {
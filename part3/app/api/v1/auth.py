@@ -1,6 +1,10 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token
 from app.services.facade import facade
+from app.hashing import HasherBusy
+from app import limiter
+from app.api.principal import authorize, current_principal, token_claims
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -13,19 +17,41 @@ login_model = api.model('Login', {
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
+    @api.response(429, 'Too many attempts, see Retry-After')
     def post(self):
         """Authenticate user and return a JWT token"""
         data = api.payload
         email = data.get('email')
         password = data.get('password')
 
-        user = facade.get_user_by_email(email)
-        if not user or not user.verify_password(password):
+        # Throttle before the lookup and bcrypt so floods stay cheap
+        retry_after = limiter.check(request.remote_addr, email)
+        if retry_after:
+            return ({'error': 'Too many login attempts, retry later'}, 429,
+                    {'Retry-After': str(retry_after)})
+
+        try:
+            with facade.transaction():
+                user = facade.authenticate(email, password, limiter)
+        except HasherBusy:
+            return {'error': 'Server busy, retry later'}, 503, {'Retry-After': '1'}
+        if not user:
             return {'error': 'Invalid credentials'}, 401
 
         access_token = create_access_token(
             identity=str(user.id),
-            additional_claims={'is_admin': user.is_admin}
+            additional_claims=token_claims(user)
         )
 
         return {'access_token': access_token}, 200
+
+
+@api.route('/revoke')
+class Revoke(Resource):
+    @api.response(200, 'Every token of the caller revoked')
+    @authorize()
+    def post(self):
+        """Revoke all access tokens of the current user (log out everywhere)"""
+        with facade.transaction():
+            facade.revoke_tokens(current_principal().id)
+        return {'message': 'Tokens revoked'}, 200
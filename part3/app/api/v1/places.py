@@ -1,7 +1,17 @@
 from flask_restx import Namespace, Resource, fields
+from app import imaging, images
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.async_facade import async_facade
+from app.api.conditional import conditional
+from app.api.v1.reviews import review_page_parser, parse_review_page
+from app.api.v1.amenities import AMENITY
+from app.api.v1.users import USER
+from app.persistence.geo import parse_bbox
+from app.models.place import RATING_STARS
+from app.api.principal import authorize, current_principal
+from app.api.serializers import Nested, Serializer, json_response, parse_fields
 from flask import request
+from werkzeug.datastructures import FileStorage
 
 api = Namespace('places', description='Place operations')
 
@@ -41,6 +51,109 @@ place_model = api.model('Place', {
     'reviews': fields.List(fields.Nested(review_model), description="List of reviews")
 })
 
+# Response shapes, compiled once per requested field set
+REVIEW_AUTHOR = Serializer({'id': 'id', 'first_name': 'first_name', 'last_name': 'last_name'})
+PLACE_REVIEW = Serializer({
+    'id': 'id',
+    'text': 'text',
+    'rating': 'rating',
+    'user': Nested(REVIEW_AUTHOR, attr='author'),
+})
+PLACE_REVIEW_SUMMARY = Serializer({
+    'id': 'id',
+    'text': 'text',
+    'rating': 'rating',
+    'user': Nested(Serializer({'first_name': 'first_name', 'last_name': 'last_name'}),
+                   attr='author'),
+})
+PLACE_SUMMARY = Serializer({
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'price': 'price',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'owner_id': 'owner_id',
+    'rooms': 'rooms',
+    'capacity': 'capacity',
+    'surface': 'surface',
+    'photos': lambda place: [imaging.photo_url(photo) for photo in place.photos or []],
+    'images': lambda place: [imaging.describe(photo) for photo in place.photos or []],
+    'amenities': lambda place: [amenity.name for amenity in place.amenities],
+    'review_count': lambda place: place.review_count or 0,
+    'rating_sum': lambda place: place.rating_sum or 0,
+    'rating_avg': lambda place: round(place.rating_avg or 0.0, 2),
+    'rating_histogram': lambda place: {
+        str(star): getattr(place, f'rating_{star}') or 0 for star in RATING_STARS
+    },
+})
+PLACE_DETAIL = Serializer({
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'price': 'price',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'owner': Nested(USER),
+    'rooms': 'rooms',
+    'capacity': 'capacity',
+    'surface': 'surface',
+    'images': lambda place: [imaging.describe(photo) for photo in place.photos or []],
+    'amenities': Nested(AMENITY, many=True),
+    'reviews': Nested(PLACE_REVIEW, many=True),
+})
+PLACE_RELATED = {'owner', 'amenities', 'reviews'}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+place_list_parser = api.parser()
+place_list_parser.add_argument('after', type=str, location='args',
+                               help='Cursor "<created_at>,<id>" returned in X-Next-Cursor')
+place_list_parser.add_argument('sort', type=str, location='args', default='created',
+                               choices=('created', 'rating'),
+                               help='Order by creation date or by average rating (best first)')
+place_list_parser.add_argument('limit', type=int, location='args',
+                               help=f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})')
+place_list_parser.add_argument('min_price', type=float, location='args')
+place_list_parser.add_argument('max_price', type=float, location='args')
+place_list_parser.add_argument('min_capacity', type=int, location='args')
+place_list_parser.add_argument('min_rooms', type=int, location='args')
+place_list_parser.add_argument('max_rooms', type=int, location='args')
+place_list_parser.add_argument('amenities', type=str, location='args',
+                               help='Comma-separated amenity IDs the place must all have')
+place_list_parser.add_argument('lat', type=float, location='args',
+                               help='Latitude of the search centre (with lon and radius_km)')
+place_list_parser.add_argument('lon', type=float, location='args',
+                               help='Longitude of the search centre')
+place_list_parser.add_argument('radius_km', type=float, location='args',
+                               help='Search radius in kilometres')
+place_list_parser.add_argument('bbox', type=str, location='args',
+                               help='Bounding box "min_lon,min_lat,max_lon,max_lat"')
+place_list_parser.add_argument('fields', type=str, location='args',
+                               help='Comma-separated fields to return, e.g. "id,title,price"')
+
+fields_parser = api.parser()
+fields_parser.add_argument('fields', type=str, location='args',
+                           help='Comma-separated fields to return, e.g. "id,title"')
+
+
+place_search_parser = api.parser()
+place_search_parser.add_argument('q', type=str, location='args', required=True,
+                                 help='Words to find in titles and descriptions; '
+                                      'the last one also matches as a prefix')
+place_search_parser.add_argument('after', type=str, location='args',
+                                 help='Cursor "<rank>,<id>" returned in X-Next-Cursor')
+place_search_parser.add_argument('limit', type=int, location='args',
+                                 help=f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})')
+place_search_parser.add_argument('fields', type=str, location='args',
+                                 help='Comma-separated fields to return, e.g. "id,title,price"')
+
+
+def place_owner(place_id, **kwargs):
+    place = facade.get_place(place_id)
+    return place.owner_id if place else None
+
 
 @api.route('/')
 class PlaceList(Resource):
@@ -49,33 +162,30 @@ class PlaceList(Resource):
     @api.expect(place_model)
     @api.response(201, 'Place successfully created')
     @api.response(400, 'Invalid input data')
-    @jwt_required()
+    @authorize()
     def post(self):
         """
         Register a new place
         """
         place_data = api.payload
-        current_user = get_jwt_identity()
 
         existing_user = facade.get_user(place_data["owner_id"])
         if not existing_user:
             return {'error': 'User not found'}, 404
 
-        if place_data["owner_id"] != current_user["id"]:
+        if place_data["owner_id"] != current_principal().id:
             return {'error': 'Unauthorized action'}, 403
 
         # place_data["owner"] = existing_user
 
-        amenities = []
-        for amenity in place_data["amenities"]:
-            amenities.append(facade.get_amenity(amenity["id"]))
-
-        place_data["amenities"] = amenities
+        # Resolved by the facade in one query; unknown ids fail together
+        place_data["amenities"] = [amenity["id"] for amenity in place_data["amenities"]]
 
         try:
-            new_place = facade.create_place(place_data)
-        except ValueError:
-            return {'error': 'Invalid input data'}, 400
+            with facade.transaction():
+                new_place = facade.create_place(place_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
         return {
             'id': new_place.id,
@@ -90,159 +200,354 @@ class PlaceList(Resource):
             'surface': new_place.surface,
         }, 201
 
+    @api.expect(place_list_parser)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
     def get(self):
         """
-        Retrieve a list of all places
+        Retrieve a page of places, optionally filtered
+
+        Pages are ordered by (created_at, id), or by average rating with
+        sort=rating; a cursor is only valid for the sort that produced it.
+        The cursor for the next page is sent in the X-Next-Cursor header;
+        X-Total-Count is only computed on the first page so that following
+        pages never run a COUNT.
+
+        With lat/lon/radius_km or bbox, places are searched geographically
+        and sorted by distance (from the bbox centre when no point is
+        given); each place then carries distance_km and cursors are
+        "<distance>,<id>".
         """
-        place_list = facade.get_all_places()
-        places = []
-        if len(place_list) == 0:
-            return {'error': 'No place found'}, 404
-        for place in place_list:
-            places.append({
-                'id': place.id,
-                'title': place.title,
-                'description': place.description,
-                'price': place.price,
-                'latitude': place.latitude,
-                'longitude': place.longitude,
-                'owner_id': place.owner_id,
-                'rooms': place.rooms,
-                'capacity': place.capacity,
-                'surface': place.surface,
-                'photos': place.photos if place.photos else [],
-                'amenities': [amenity.name for amenity in place.amenities]
-            })
-        return places, 200
+        try:
+            query = _place_list_query()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        not_modified, cache_headers = conditional(facade.get_places_version())
+        if not_modified:
+            return not_modified
+
+        try:
+            if query['geo']:
+                results, next_cursor = facade.get_places_nearby(
+                    *query['geo'], query['filters'], after=query['after'], limit=query['limit'])
+            else:
+                results, next_cursor = facade.get_places_page(
+                    query['filters'], after=query['after'], limit=query['limit'],
+                    sort=query['sort'])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        total = None
+        # X-Total-Count on the first page; a single-page result already tells it
+        if not query['after'] and not query['geo']:
+            total = facade.count_places(query['filters']) if next_cursor else len(results)
+        return _place_list_response(query, results, next_cursor, total, cache_headers)
+
+    async def async_get(self):
+        """get, on the async facade (ASGI mode, see app.asgi)"""
+        try:
+            query = _place_list_query()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        not_modified, cache_headers = conditional(await async_facade.get_places_version())
+        if not_modified:
+            return not_modified
+
+        try:
+            if query['geo']:
+                results, next_cursor = await async_facade.get_places_nearby(
+                    *query['geo'], query['filters'], after=query['after'], limit=query['limit'])
+            else:
+                results, next_cursor = await async_facade.get_places_page(
+                    query['filters'], after=query['after'], limit=query['limit'],
+                    sort=query['sort'])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        total = None
+        if not query['after'] and not query['geo']:
+            total = (await async_facade.count_places(query['filters']) if next_cursor
+                     else len(results))
+        return _place_list_response(query, results, next_cursor, total, cache_headers)
+
+
+def _place_list_query():
+    """Parse and check a place list request, raise ValueError if invalid"""
+    args = place_list_parser.parse_args()
+    limit = args['limit'] or DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    filters = {key: args[key] for key in (
+        'min_price', 'max_price', 'min_capacity', 'min_rooms', 'max_rooms'
+    )}
+    if args['amenities']:
+        filters['amenities'] = [a for a in args['amenities'].split(',') if a]
+
+    geo_query = None
+    if any(args[key] is not None for key in ('lat', 'lon', 'radius_km', 'bbox')):
+        bbox = parse_bbox(args['bbox']) if args['bbox'] else None
+        geo_query = (args['lat'], args['lon'], args['radius_km'], bbox)
+
+    return {
+        'fields': parse_fields(args['fields'], PLACE_SUMMARY, extra={'distance_km'}),
+        'limit': min(limit, MAX_PAGE_SIZE),
+        'filters': filters,
+        'geo': geo_query,
+        'after': args['after'],
+        'sort': args['sort'],
+    }
+
+
+def _place_list_response(query, results, next_cursor, total, cache_headers):
+    """
+    Response for a page of places ([(place, distance_km)] for a geo
+    search); `total` goes in X-Total-Count unless None.
+    """
+    if len(results) == 0 and not query['after']:
+        return {'error': 'No place found'}, 404
+
+    fields = query['fields']
+    if query['geo']:
+        place_list = [place for place, _ in results]
+        places = PLACE_SUMMARY.dump_many(place_list, fields)
+        if fields is None or 'distance_km' in fields:
+            for (_, distance), data in zip(results, places):
+                data['distance_km'] = round(distance, 3)
+    else:
+        places = PLACE_SUMMARY.dump_many(results, fields)
+
+    headers = dict(cache_headers)
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    if total is not None:
+        headers['X-Total-Count'] = str(total)
+    return json_response(places, 200, headers)
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(place_search_parser)
+    @api.response(200, 'Matching places retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    def get(self):
+        """
+        Full-text search on place titles and descriptions
+
+        Every word must match, accents and case aside. Places are ordered
+        by relevance, title matches first; X-Next-Cursor and X-Total-Count
+        work as for the place list.
+        """
+        args = place_search_parser.parse_args()
+
+        not_modified, cache_headers = conditional(facade.get_places_version())
+        if not_modified:
+            return not_modified
+
+        try:
+            fields = parse_fields(args['fields'], PLACE_SUMMARY)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        limit = args['limit'] or DEFAULT_PAGE_SIZE
+        if limit < 1:
+            return {'error': 'limit must be positive'}, 400
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        try:
+            place_list, next_cursor = facade.search_places(
+                args['q'], after=args['after'], limit=limit)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        headers = dict(cache_headers)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        if not args['after']:
+            total = facade.count_search_places(args['q']) if next_cursor else len(place_list)
+            headers['X-Total-Count'] = str(total)
+        return json_response(PLACE_SUMMARY.dump_many(place_list, fields), 200, headers)
 
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
+    @api.expect(fields_parser)
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(400, 'Invalid fields')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """
         Get place details by ID
         """
-        place = facade.get_place(place_id)
-        owner = facade.get_user(place.owner_id)
-
-        amenities = [{
-            "id": amenity.id,
-            "name": amenity.name
-        } for amenity in place.amenities]
-        
-        reviews = [{
-            "id": review.id,
-            "text": review.text,
-            "rating": review.rating,
-            "user": {
-                "id": facade.get_user(review.user_id).id,
-                "first_name": facade.get_user(review.user_id).first_name,
-                "last_name": facade.get_user(review.user_id).last_name
-            }
-        } for review in place.reviews]
+        try:
+            fields = parse_fields(fields_parser.parse_args()['fields'], PLACE_DETAIL)
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
-        return {
-            'id': place.id,
-            'title': place.title,
-            'description': place.description,
-            'price': place.price,
-            'latitude': place.latitude,
-            'longitude': place.longitude,
-            'owner': {
-                "id": owner.id,
-                "first_name": owner.first_name,
-                "last_name": owner.last_name,
-                "email": owner.email
-            },
-            'rooms': place.rooms,
-            'capacity': place.capacity,
-            'surface': place.surface,
-            'amenities': amenities,
-            'reviews': reviews
-        }, 200
+        version = facade.get_place_detail_version(place_id)
+        if version is None:
+            return {'error': 'Place not found'}, 404
+        not_modified, headers = conditional(version)
+        if not_modified:
+            return not_modified
+
+        # Without related fields the (cached) place alone is enough
+        if fields is not None and not fields & PLACE_RELATED:
+            place = facade.get_place(place_id)
+        else:
+            place = facade.get_place_detail(place_id)
+        if not place:
+            return {'error': 'Place not found'}, 404
+        return json_response(PLACE_DETAIL.dump(place, fields), 200, headers)
+
+    async def async_get(self, place_id):
+        """get, on the async facade (ASGI mode, see app.asgi)"""
+        try:
+            fields = parse_fields(fields_parser.parse_args()['fields'], PLACE_DETAIL)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        version = await async_facade.get_place_detail_version(place_id)
+        if version is None:
+            return {'error': 'Place not found'}, 404
+        not_modified, headers = conditional(version)
+        if not_modified:
+            return not_modified
+
+        if fields is not None and not fields & PLACE_RELATED:
+            place = await async_facade.get_place(place_id)
+        else:
+            place = await async_facade.get_place_detail(place_id)
+        if not place:
+            return {'error': 'Place not found'}, 404
+        return json_response(PLACE_DETAIL.dump(place, fields), 200, headers)
     
     @api.expect(place_model)
     @api.response(200, 'Place updated successfully')
     @api.response(404, 'Place not found')
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Unauthorized action')
-    @jwt_required()
+    @authorize(owner=place_owner)
     def put(self, place_id):
         """Update a place's information"""
-        current_user = get_jwt_identity()
-        is_admin = current_user.get('is_admin', False)
-        user_id = current_user.get('id')
-
         place = facade.get_place(place_id)
         if not place:
             return {'error': f"The place with {place_id} does not exist"}, 404
-        
-        if not is_admin and place.owner_id != user_id:
-            return {'error': 'Unauthorized action'}, 403
-        
+
         place_data = request.get_json()
 
         if "amenities" in place_data:
-            place_data["amenities"] = [facade.get_amenity(a["id"]) for a in place_data["amenities"]]
+            place_data["amenities"] = [a["id"] for a in place_data["amenities"]]
 
         try:
-            updated_place = facade.update_place(place_id, place_data)
-            if not updated_place:
-                return {'error': 'Invalid input data'}, 400
-            return updated_place.to_dict(include_related=True), 200
+            with facade.transaction():
+                updated_place = facade.update_place(place_id, place_data)
         except ValueError as e:
             return {'error': str(e)}, 400
         except KeyError as e:
             return {'error': str(e)}, 404
 
+        if not updated_place:
+            return {'error': 'Invalid input data'}, 400
+        return updated_place.to_dict(include_related=True), 200
+
     @api.response(200, 'Place deleted successfully')
     @api.response(404, 'Place not found')
-    @jwt_required()
+    @authorize(owner=place_owner)
     def delete(self, place_id):
         """
         Delete a place
         """
-        current_user = get_jwt_identity()
-
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
 
-        if place.owner_id != current_user["id"] and not current_user["is_admin"]:
-            return {'error': 'Unauthorized action'}, 403
-
-        facade.delete_place(place_id)
+        with facade.transaction():
+            facade.delete_place(place_id)
         return {'message': 'Place deleted successfully'}, 204
 
 
+photo_parser = api.parser()
+photo_parser.add_argument('photo', type=FileStorage, location='files', required=True,
+                          help='JPEG, PNG or WebP image')
+
+
+@api.route('/<place_id>/photos')
+class PlacePhotoList(Resource):
+    @api.expect(photo_parser)
+    @api.response(202, 'Photo stored, variants being rendered')
+    @api.response(400, 'Invalid image')
+    @api.response(403, 'Unauthorized action')
+    @api.response(404, 'Place not found')
+    @api.response(413, 'Image too large')
+    @authorize(owner=place_owner)
+    def post(self, place_id):
+        """
+        Add a photo to a place
+
+        The variants listed in the response (thumb, card and full, in WebP
+        and JPEG) are rendered in the background; one requested before it
+        is ready is rendered on the spot.
+        """
+        if not facade.get_place(place_id):
+            return {'error': 'Place not found'}, 404
+        if (request.content_length or 0) > images.max_bytes + 64 * 1024:
+            return {'error': 'Photo is too large'}, 413
+
+        upload = request.files.get('photo')
+        if upload is None:
+            return {'error': 'photo file is required'}, 400
+        try:
+            photo_id = images.ingest(upload.read(images.max_bytes + 1))
+        except imaging.PhotoTooLarge as e:
+            return {'error': str(e)}, 413
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        with facade.transaction():
+            facade.add_place_photo(place_id, photo_id)
+        return imaging.describe(photo_id), 202
+
+
+@api.route('/<place_id>/photos/<photo_id>')
+class PlacePhoto(Resource):
+    @api.response(204, 'Photo removed')
+    @api.response(403, 'Unauthorized action')
+    @api.response(404, 'Place or photo not found')
+    @authorize(owner=place_owner)
+    def delete(self, place_id, photo_id):
+        """Remove a photo from a place"""
+        with facade.transaction():
+            removed = facade.remove_place_photo(place_id, photo_id)
+        if not removed:
+            return {'error': 'Photo not found'}, 404
+        return '', 204
+
+
 @api.route('/<place_id>/reviews')
 class PlaceReviewList(Resource):
+    @api.expect(review_page_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """
-        Retrieve all reviews for a specific place
+        Retrieve a page of reviews for a specific place
         """
-        existing_place = facade.get_place(place_id)
-        if not existing_place:
+        try:
+            page = parse_review_page()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        try:
+            not_modified, headers = conditional(facade.get_place_reviews_version(place_id))
+            if not_modified:
+                return not_modified
+            review_list = facade.get_reviews_by_place(place_id, **page)
+        except ValueError:
             return {'error': 'Place not found'}, 404
 
-        review_list = facade.get_reviews_by_place(place_id)
-
-        reviews = []
-        for review in review_list:
-            user = facade.get_user(review.user_id)
-            reviews.append({
-                'id': review.id,
-                'title': review.title,
-                'text': review.text,
-                'rating': review.rating,
-                'user': {
-                    'first_name': user.first_name,
-                    'last_name': user.last_name
-                }
-            })
-        return reviews, 200
+        headers['X-Total-Count'] = str(facade.count_reviews_by_place(place_id))
+        return json_response(PLACE_REVIEW_SUMMARY.dump_many(review_list), 200, headers)
@@ -1,7 +1,9 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, reqparse
 from app.services import facade
+from app.api.conditional import conditional
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api.principal import authorize, current_principal
+from app.api.serializers import Serializer, json_response, stream_response, wants_ndjson
 
 api = Namespace('reviews', description='Review operations')
 
@@ -13,38 +15,81 @@ review_model = api.model('Review', {
     'place_id': fields.String(required=True, description='ID of the place')
 })
 
+# Same shape as Review.to_dict()
+REVIEW = Serializer({
+    'id': 'id',
+    'text': 'text',
+    'rating': 'rating',
+    'user_id': 'user_id',
+    'place_id': 'place_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+})
+
+DEFAULT_REVIEW_PAGE_SIZE = 20
+MAX_REVIEW_PAGE_SIZE = 100
+
+# Shared with the places namespace for /places/<place_id>/reviews
+review_page_parser = reqparse.RequestParser()
+review_page_parser.add_argument('order', type=str, location='args', default='desc',
+                                choices=('asc', 'desc'), help='Sort by creation date')
+review_page_parser.add_argument('limit', type=int, location='args',
+                                help=f'Page size (default {DEFAULT_REVIEW_PAGE_SIZE}, '
+                                     f'max {MAX_REVIEW_PAGE_SIZE})')
+review_page_parser.add_argument('offset', type=int, location='args', default=0)
+
+
+def parse_review_page():
+    """Parse paging arguments into get_reviews_by_place keyword arguments"""
+    args = review_page_parser.parse_args()
+    limit = args['limit'] or DEFAULT_REVIEW_PAGE_SIZE
+    if limit < 1 or args['offset'] < 0:
+        raise ValueError("limit must be positive and offset not negative")
+    return {
+        'order': args['order'],
+        'limit': min(limit, MAX_REVIEW_PAGE_SIZE),
+        'offset': args['offset']
+    }
+
+
+def review_author(review_id):
+    review = facade.get_review(review_id)
+    return review.user_id if review else None
+
+
 @api.route('/')
 class ReviewList(Resource):
     @api.expect(review_model)
     @api.response(201, 'Review successfully created')
     @api.response(400, 'Invalid input data')
-    @jwt_required()
+    @authorize()
     def post(self):
         """Register a new review"""
-        current_user = get_jwt_identity()
-        if isinstance(current_user, dict):
-            user_id = current_user.get('id')
-
-        else:
-            user_id = current_user 
-
         try:
             data = request.get_json()
-            data['user_id'] = user_id
-            new_review = facade.create_review(data)
-            return new_review.to_dict(), 201
+            data['user_id'] = current_principal().id
+            with facade.transaction():
+                new_review = facade.create_review(data)
         except ValueError as e:
             return {'error': str(e)}, 400
         except Exception as e:
             return {'error' : f"Unexpected error: {str(e)}"}, 400
+        return new_review.to_dict(), 201
         
     @api.response(200, 'List of reviews retrieved successfully')
     def get(self):
-        """Retrieve a list of all reviews"""
-        reviews = []
-        for r in facade.get_all_reviews():
-            reviews.append(r.to_dict())
-        return reviews, 200
+        """
+        Stream all reviews, as a JSON array or as NDJSON
+        (Accept: application/x-ndjson)
+        """
+        ndjson = wants_ndjson()
+        version = facade.get_reviews_version()
+        not_modified, headers = conditional(version + ('ndjson',) if ndjson else version)
+        if not_modified:
+            return not_modified
+        headers['Vary'] = 'Accept'
+        rows = facade.iter_reviews(tuple(REVIEW.fields.values()))
+        return stream_response(rows, REVIEW, headers, ndjson)
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
@@ -55,65 +100,69 @@ class ReviewResource(Resource):
         review = facade.get_review(review_id)
         if not review:
             return {'error': f"The review with ID {review_id} does not exist"}, 404
-        return review.to_dict(), 200
+        not_modified, headers = conditional((review.id, review.updated_at))
+        if not_modified:
+            return not_modified
+        return json_response(REVIEW.dump(review), 200, headers)
 
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
     @api.response(404, 'Review not found')
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Unauthorized action')
-    @jwt_required()
+    @authorize(owner=review_author)
     def put(self, review_id):
         """Update a review's information"""
-        current_user = get_jwt_identity()
-        is_admin = current_user.get('is_admin', False)
-        user_id = current_user.get('id')
-
         review = facade.get_review(review_id)
         if not review:
             return {'error': f"The review with ID {review_id} does not exist"}, 404
-        
-        if not is_admin and review.user_id != user_id:
-            return {'error': 'Unauthorized action'}, 403
-        
+
         data = request.get_json()
         try:
-            updated_review = facade.update_review(review_id, data)
-            if not updated_review:
-                return {'error': f"The review with ID {review_id} does not exist"}, 404
-            return updated_review.to_dict(), 200
+            with facade.transaction():
+                updated_review = facade.update_review(review_id, data)
         except ValueError as e:
             return {'error': str(e)}, 400
         except Exception as e:
             return {'error': f"Unexpected error: {str(e)}"}, 400
 
+        if not updated_review:
+            return {'error': f"The review with ID {review_id} does not exist"}, 404
+        return updated_review.to_dict(), 200
+
     @api.response(200, 'Review deleted successfully')
+    @api.response(403, 'Unauthorized action')
     @api.response(404, 'Review not found')
-    @jwt_required()
+    @authorize(owner=review_author)
     def delete(self, review_id):
         """Delete a review"""
-        current_user = get_jwt_identity()
-        is_admin = current_user.get('is_admin', False)
-        user_id = current_user.get('id')
-
         review = facade.get_review(review_id)
         if not review:
             return {'error': f"The review with ID {review_id} does not exist"}, 404
-        
-        if not is_admin and review.user_id != user_id:
-            return {'error': 'Unauthorized action'}
-        
-        facade.delete_review(review_id) 
+
+        with facade.transaction():
+            facade.delete_review(review_id)
         return {'message': 'Review deleted successfully'}, 200
 
 @api.route('/places/<place_id>/reviews')
 class PlaceReviewList(Resource):
+    @api.expect(review_page_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
     @api.response(404, 'Place not found')
     def get(self, place_id):
-        """Get all reviews for a specific place"""
+        """Get a page of reviews for a specific place"""
+        try:
+            page = parse_review_page()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         try:
-            reviews = [r.to_dict() for r in facade.get_reviews_by_place(place_id)]
-            return reviews, 200
+            not_modified, headers = conditional(facade.get_place_reviews_version(place_id))
+            if not_modified:
+                return not_modified
+            reviews = REVIEW.dump_many(facade.get_reviews_by_place(place_id, **page))
         except ValueError as e: 
             return {'error': str(e)}, 404
+        headers['X-Total-Count'] = str(facade.count_reviews_by_place(place_id))
+        return json_response(reviews, 200, headers)
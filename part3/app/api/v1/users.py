@@ -1,6 +1,9 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api.principal import authorize, current_principal
+from app.api.serializers import Serializer, json_response, stream_response, wants_ndjson
 from app.services import facade
+from app.api.conditional import conditional
+from app.hashing import HasherBusy
 
 # Create namespace
 api = Namespace('users', description='User operations')
@@ -14,6 +17,9 @@ user_model = api.model('User', {
     'is_admin': fields.Boolean(required=False, description='Admin privileges flag')
 })
 
+USER = Serializer({'id': 'id', 'first_name': 'first_name', 'last_name': 'last_name',
+                   'email': 'email'})
+
 
 @api.route('/')
 class UserList(Resource):
@@ -23,29 +29,28 @@ class UserList(Resource):
     @api.response(201, 'User successfully created')
     @api.response(400, 'Email already registered')
     @api.response(400, 'Invalid input data')
-    @jwt_required(optional=True)
+    @authorize(optional=True)
     def post(self):
         """Register a new user"""
         user_data = api.payload
 
-        current_user = get_jwt_identity()
+        principal = current_principal()
 
         # only admins can create other users with is_admin=True
         if user_data.get("is_admin"):
-            if not current_user or not current_user.get("is_admin"):
+            if not principal or not principal.is_admin:
                 return {'error': 'Admin privileges required'}, 403
 
         # Check if email already exists
         if facade.get_user_by_email(user_data['email']):
             return {'error': 'Email already registered'}, 400
 
-        # ✅ Local import to avoid circular dependency
-        from app import bcrypt
-
-        hashed_password = bcrypt.generate_password_hash(user_data['password']).decode('utf-8')
-        user_data['password'] = hashed_password
-
-        new_user = facade.create_user(user_data)
+        # User() hashes the password: pass it in clear, exactly once
+        try:
+            with facade.transaction():
+                new_user = facade.create_user(user_data)
+        except HasherBusy:
+            return {'error': 'Server busy, retry later'}, 503, {'Retry-After': '1'}
         return {
             'id': new_user.id,
             'message': 'User successfully created'
@@ -53,59 +58,63 @@ class UserList(Resource):
 
     @api.response(200, 'List of users retrieved successfully')
     def get(self):
-        """Get all users"""
-        users = facade.get_all_users()
-        return [
-            {
-                'id': u.id,
-                'first_name': u.first_name,
-                'last_name': u.last_name,
-                'email': u.email
-            } for u in users
-        ], 200
+        """Stream all users, as a JSON array or as NDJSON (Accept: application/x-ndjson)"""
+        ndjson = wants_ndjson()
+        version = facade.get_users_version()
+        not_modified, headers = conditional(version + ('ndjson',) if ndjson else version)
+        if not_modified:
+            return not_modified
+        headers['Vary'] = 'Accept'
+        rows = facade.iter_users(tuple(USER.fields.values()))
+        return stream_response(rows, USER, headers, ndjson)
 
 
 @api.route('/<user_id>')
 class UserResource(Resource):
-    """Handles GET and PUT for a specific user"""
+    """Handles GET, PUT and DELETE for a specific user"""
 
     @api.response(200, 'User details retrieved successfully')
     @api.response(404, 'User not found')
-    @jwt_required()
+    @authorize()
     def get(self, user_id):
         """Get user details by ID"""
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
 
-        return {
-            'id': user.id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        }, 200
+        not_modified, headers = conditional((user.id, user.updated_at))
+        if not_modified:
+            return not_modified
+        return json_response(USER.dump(user), 200, headers)
 
     @api.expect(user_model, validate=True)
     @api.response(200, 'User successfully updated')
     @api.response(404, 'User not found')
+    @api.response(403, 'Unauthorized action')
+    # Admins can update any user, regular users only themselves
+    @authorize(owner=lambda user_id: user_id)
     def put(self, user_id):
         """Update user information"""
-        current_user = get_jwt_identity()
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
 
-        # Admins can update any user
-        # Regular users can update only themselves
-        if user_id != current_user["id"] and not current_user.get("is_admin"):
-            return {'error': 'Unauthorized action'}, 403
-
-        # Regular users cannot change email/password
-        if not current_user.get("is_admin"):
+        # Regular users cannot change their role, email or password
+        if not current_principal().is_admin:
+            if "is_admin" in api.payload and bool(api.payload["is_admin"]) != bool(user.is_admin):
+                return {'error': 'Admin privileges required'}, 403
             if user.email != api.payload.get("email") or not user.verify_password(api.payload.get("password")):
                 return {'error': 'You cannot modify your email or password'}, 400
 
-        updated_user = facade.update_user(user_id, api.payload)
+        payload = dict(api.payload)
+        if not current_principal().is_admin:
+            # Checked unchanged above, no need to hash it again
+            payload.pop("password")
+        try:
+            with facade.transaction():
+                updated_user = facade.update_user(user_id, payload)
+        except HasherBusy:
+            return {'error': 'Server busy, retry later'}, 503, {'Retry-After': '1'}
         if not updated_user:
             return {'error': 'Invalid input data'}, 400
 
@@ -115,3 +124,16 @@ class UserResource(Resource):
             'last_name': updated_user.last_name,
             'email': updated_user.email
         }, 200
+
+    @api.response(204, 'User deleted')
+    @api.response(404, 'User not found')
+    @api.response(403, 'Unauthorized action')
+    # Admins can delete any user, regular users only themselves
+    @authorize(owner=lambda user_id: user_id)
+    def delete(self, user_id):
+        """Delete a user with their places and reviews"""
+        with facade.transaction():
+            user = facade.delete_user(user_id)
+        if not user:
+            return {'error': 'User not found'}, 404
+        return '', 204
@@ -0,0 +1,197 @@
+"""ASGI serving mode.
+
+Serves the same Flask app (namespaces, models, parsers, serializers, hooks)
+to an ASGI server:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+Each request is matched against the app's URL map. When the Resource
+handling it has an async counterpart of the method (async_get next to
+get, see PlaceList and PlaceResource) the request runs on the event loop:
+it holds no thread while it waits on the database (app.services.async_facade),
+so a single process keeps thousands of slow clients connected. Every other
+request (writes, authenticated routes, streaming exports, docs) runs the
+WSGI app in a pool of ASGI_THREADS threads, as under a threaded WSGI
+server.
+
+Config keys:
+
+    ASYNC_DATABASE_URL  database URL with an async driver (default: derived
+                        from SQLALCHEMY_DATABASE_URI, e.g. sqlite+aiosqlite)
+    ASGI_THREADS        threads running WSGI requests (default 32)
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response
+from flask_restx.utils import unpack
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from app.services.async_facade import async_facade
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope and its request body"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is read in full first, whatever the transfer encoding
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def _start_message(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers],
+    }
+
+
+class ASGIApp:
+    """ASGI application wrapping a Flask app, see the module docstring"""
+
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or app.config.get('ASGI_THREADS', 32),
+            thread_name_prefix='asgi-wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        environ = build_environ(scope, bytes(body))
+        handler = self._async_handler(environ)
+        if handler is None:
+            await self._call_wsgi(environ, send)
+        else:
+            await self._call_async(environ, *handler, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_facade.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _async_handler(self, environ):
+        """(bound async method, view args) serving this request, or None"""
+        adapter = self.app.url_map.bind_to_environ(environ)
+        try:
+            endpoint, view_args = adapter.match()
+        except HTTPException:
+            return None
+        view_class = getattr(self.app.view_functions.get(endpoint), 'view_class', None)
+        method = getattr(view_class, f"async_{environ['REQUEST_METHOD'].lower()}", None)
+        if method is None:
+            return None
+        resource = view_class(self.app.extensions['restx_api'])
+        return getattr(resource, method.__name__), view_args
+
+    async def _call_async(self, environ, method, view_args, send):
+        """Run an async Resource method the way Flask and flask-restx run a sync one"""
+        app = self.app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await method(**view_args)
+                        if not isinstance(rv, Response):
+                            data, code, headers = unpack(rv)
+                            rv = method.__self__.api.make_response(data, code, headers=headers)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+            # Bodies of async handlers are built in memory
+            body = response.get_data()
+            status, headers = response.status_code, response.headers.to_wsgi_list()
+        await send(_start_message(status, headers))
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _call_wsgi(self, environ, send):
+        """Run the WSGI app in the thread pool, streaming its body back"""
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = []
+
+            def start_response(status, headers, exc_info=None):
+                started[:] = [int(status.split(' ', 1)[0]), headers]
+
+            chunks = self.app.wsgi_app(environ, start_response)
+            try:
+                sent_start = False
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if not sent_start:
+                        send_from_thread(_start_message(*started))
+                        sent_start = True
+                    send_from_thread({'type': 'http.response.body', 'body': chunk,
+                                      'more_body': True})
+                if not sent_start:
+                    send_from_thread(_start_message(*started))
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+
+        await loop.run_in_executor(self.executor, run)
+
+
+def create_asgi_app(config_class=None):
+    """Flask app wrapped for an ASGI server, with the async facade set up"""
+    app = create_app(config_class)
+    async_facade.init_app(app)
+    return ASGIApp(app)
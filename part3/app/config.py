@@ -5,8 +5,98 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Entity cache: 'lru' (per process), 'shared' (CACHE_CLIENT, redis-style) or 'none'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'lru')
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 300))
+    # Password hashing: bcrypt cost, and process pool size (0 = inline) and queue
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 64))
+    # Login throttling: (attempts, seconds) buckets and account lockout
+    LOGIN_RATE_PER_IP = (20, 60)
+    LOGIN_RATE_PER_ACCOUNT = (5, 60)
+    LOGIN_LOCKOUT_THRESHOLD = 10
+    LOGIN_LOCKOUT_SECONDS = 900
+    # PRAGMAs for SQLite connections, see app.persistence.sqlite: 'default' or 'wal'
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'default')
+    # Read replicas (comma-separated URLs), see app.persistence.replicas
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',')
+                               if uri]
+    # Photos, see app.imaging: variant store (default <instance>/images), legacy
+    # photo files, render pool size (0 = inline) and upload limits
+    IMAGE_STORE = os.getenv('IMAGE_STORE')
+    IMAGES_FOLDER = os.getenv('IMAGES_FOLDER', os.path.join(
+        basedir, '..', '..', 'part4', 'base_files', 'images'))
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', os.cpu_count() or 1))
+    IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+    # Background jobs, see app.jobs: worker threads in the app process (0 =
+    # worker.py only), polling, lease, retries and retention
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+    JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 1.0))
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+    JOB_BACKOFF_SECONDS = float(os.getenv('JOB_BACKOFF_SECONDS', 5))
+    JOB_BACKOFF_MAX_SECONDS = float(os.getenv('JOB_BACKOFF_MAX_SECONDS', 3600))
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 86400))
+    # ASGI mode, see app.asgi: async database URL (default: derived from
+    # SQLALCHEMY_DATABASE_URI) and threads running the sync routes
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 32))
+    # Prefork WSGI server (serve.py), see app.server: listen address, worker
+    # processes and threads, requests before a worker is replaced (plus a
+    # random jitter, 0 = never), preloading, keep-alive and shutdown timeouts
+    SERVER_BIND = os.getenv('SERVER_BIND', '127.0.0.1:5000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 8))
+    SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', 10000))
+    SERVER_MAX_REQUESTS_JITTER = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 1000))
+    SERVER_PRELOAD = os.getenv('SERVER_PRELOAD', '1') == '1'
+    SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', 5))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, '..', 'app.db')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL', f"sqlite:///{os.path.join(basedir, '..', 'app.db')}")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # Connections kept open, and extra ones allowed under bursts
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        # Replace connections before server-side idle timeouts close them
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        # Compiled SQL statements cached per engine
+        'query_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', 1200)),
+    }
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'wal')
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    IMAGE_WORKERS = 0
+    JOB_WORKERS = 0
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+configs = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+
+def get_config(name=None):
+    """Config class named by `name`, else by HBNB_CONFIG (default: development)"""
+    name = name or os.getenv('HBNB_CONFIG', 'development')
+    if name not in configs:
+        raise ValueError(f"HBNB_CONFIG must be one of {', '.join(configs)}")
+    return configs[name]
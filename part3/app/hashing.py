@@ -0,0 +1,163 @@
+"""Password hashing off the request thread.
+
+bcrypt is deliberately slow, so hashing and verification run in a bounded
+process pool: request threads wait on a future instead of holding the GIL,
+and when too many hashes are pending new ones fail fast with HasherBusy
+rather than piling up behind a login burst.
+
+Configuration (read by init_app):
+    BCRYPT_LOG_ROUNDS       cost factor of new hashes (default 12)
+    PASSWORD_HASH_WORKERS   pool processes; 0 hashes inline (default: CPU count)
+    PASSWORD_HASH_QUEUE     hashes allowed to wait for a free worker (default 64)
+    PASSWORD_HASH_TIMEOUT   seconds to wait for a queue slot (default 5)
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def _hash(password, rounds):
+    start = time.perf_counter()
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+    return password_hash.decode('utf-8'), time.perf_counter() - start
+
+
+def _verify(password_hash, password):
+    start = time.perf_counter()
+    try:
+        valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # Malformed stored hash
+        valid = False
+    return valid, time.perf_counter() - start
+
+
+def hash_rounds(password_hash):
+    """Cost factor of a "$2b$<rounds>$..." hash, None if unparseable"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification with metrics, run in a process pool"""
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = os.cpu_count() or 1
+        self.queue_size = 64
+        self.timeout = 5
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE', 64)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self.reset_stats()
+        app.extensions['password_hasher'] = self
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Public API ---------- #
+
+    def hash(self, password):
+        """Return the bcrypt hash of a password at the configured cost"""
+        return self._run('hash', _hash, password, self.rounds)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        if not password_hash or password is None:
+            return False
+        return self._run('verify', _verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a hash was made with another cost factor than the current one"""
+        return hash_rounds(password_hash) != self.rounds
+
+    # ---------- Metrics ---------- #
+
+    def reset_stats(self):
+        with self._lock:
+            self._pending = 0
+            self._stats = {
+                'rejected': 0,
+                'max_queue_depth': 0,
+                **{f'{op}_{field}': 0 for op in ('hash', 'verify')
+                   for field in ('count', 'seconds', 'max_seconds', 'wait_seconds')},
+            }
+
+    def stats(self):
+        """
+        Counters plus current pending/queue depth. *_seconds are the time
+        spent in bcrypt, *_wait_seconds the extra time spent queued.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+            stats['queue_depth'] = max(0, self._pending - self.workers)
+        for op in ('hash', 'verify'):
+            count = stats[f'{op}_count']
+            stats[f'{op}_avg_seconds'] = stats[f'{op}_seconds'] / count if count else 0.0
+        return stats
+
+    def _record(self, op, elapsed, total):
+        with self._lock:
+            self._stats[f'{op}_count'] += 1
+            self._stats[f'{op}_seconds'] += elapsed
+            self._stats[f'{op}_max_seconds'] = max(self._stats[f'{op}_max_seconds'], elapsed)
+            self._stats[f'{op}_wait_seconds'] += max(0.0, total - elapsed)
+
+    # ---------- Execution ---------- #
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _run(self, op, function, *args):
+        if not self.workers:
+            result, elapsed = function(*args)
+            self._record(op, elapsed, elapsed)
+            return result
+
+        if self._slots is None:
+            self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HasherBusy("Too many password hashes pending")
+
+        start = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'],
+                                                 self._pending - self.workers)
+        try:
+            result, elapsed = self._pool().submit(function, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+        self._record(op, elapsed, time.perf_counter() - start)
+        return result
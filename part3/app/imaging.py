@@ -0,0 +1,324 @@
+"""Place photos: ingestion, resized variants and serving.
+
+An uploaded photo is identified by the hash of its bytes (uploading the
+same file twice gives the same id). The original is kept in the store, and
+every variant, each size of VARIANTS in each of FORMATS, is encoded from it
+in a process pool, off the request thread. Variant files are named
+"<id>.<variant>.<ext>", so a URL always designates the same bytes and is
+served with a year-long immutable Cache-Control, the name as ETag, and
+Range support. A variant that is missing (still being encoded, encoded by
+another process, or deleted) is rendered when first requested.
+
+Variants are never re-encoded under an existing name: changing a size or
+an encoder setting means adding a variant name.
+
+Place.photos holds photo ids; older entries holding "/images/<file>" paths
+are served as-is from IMAGES_FOLDER.
+
+Configuration (read by init_app):
+    IMAGE_STORE         directory of originals and variants (default: <instance>/images)
+    IMAGES_FOLDER       directory of the legacy photo files
+    IMAGE_WORKERS       pool processes; 0 renders inline (default: CPU count)
+    IMAGE_MAX_BYTES     largest upload accepted (default 10 MB)
+    IMAGE_MAX_PIXELS    largest upload accepted, in pixels (default 40M)
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import abort, send_file, send_from_directory
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+URL_PREFIX = '/images'
+
+# Longest side in pixels; images are never enlarged
+VARIANTS = {'thumb': 320, 'card': 800, 'full': 1600}
+
+# Format -> (file extension, Pillow encoder, encoder options)
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+# Variants never change under a name; legacy files may be replaced
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
+_PHOTO_ID = re.compile(r'^[0-9a-f]{32}$')
+_VARIANT_NAME = re.compile(r'^([0-9a-f]{32})\.(%s)\.(%s)$' % (
+    '|'.join(VARIANTS), '|'.join(ext for ext, _, _ in FORMATS.values())))
+_EXTENSIONS = {ext: fmt for fmt, (ext, _, _) in FORMATS.items()}
+_MIMETYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+class PhotoTooLarge(ValueError):
+    """Raised for uploads over the byte or pixel limit"""
+
+
+# ---------- URLs ---------- #
+
+def is_photo_id(photo):
+    return isinstance(photo, str) and _PHOTO_ID.match(photo) is not None
+
+
+def variant_name(photo_id, variant, fmt):
+    return f"{photo_id}.{variant}.{FORMATS[fmt][0]}"
+
+
+def variant_urls(photo_id):
+    """{variant: {format: url}} of an ingested photo"""
+    return {variant: {fmt: f"{URL_PREFIX}/{variant_name(photo_id, variant, fmt)}"
+                      for fmt in FORMATS}
+            for variant in VARIANTS}
+
+
+def photo_url(photo):
+    """URL of the largest JPEG of a photo, or the path of a legacy one"""
+    if is_photo_id(photo):
+        return f"{URL_PREFIX}/{variant_name(photo, 'full', 'jpeg')}"
+    return photo
+
+
+def describe(photo):
+    """
+    {"id", "src", "variants"} for a Place.photos entry; legacy paths have
+    no id and no variants, only src.
+    """
+    if is_photo_id(photo):
+        return {'id': photo, 'src': photo_url(photo), 'variants': variant_urls(photo)}
+    return {'id': None, 'src': photo, 'variants': {}}
+
+
+# ---------- Rendering (pool processes) ---------- #
+
+def _write(path, data):
+    """Write through a temporary file so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _render(original_path, photo_id):
+    """Encode every variant next to the original, largest first"""
+    start = time.perf_counter()
+    directory = os.path.dirname(original_path)
+    with Image.open(original_path) as image:
+        # JPEGs decode straight at a reduced scale when that still covers
+        # the largest variant
+        largest = max(VARIANTS.values())
+        image.draft('RGB', (largest, largest))
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    for variant, size in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+        # Each size is reduced from the previous one
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt, (ext, encoder, options) in FORMATS.items():
+            frame = image
+            if has_alpha and encoder == 'JPEG':
+                frame = Image.new('RGB', image.size, 'white')
+                frame.paste(image, mask=image.getchannel('A'))
+            buffer = io.BytesIO()
+            # Metadata (EXIF, GPS) is dropped, the colour profile kept
+            frame.save(buffer, encoder, icc_profile=icc_profile, **options)
+            _write(os.path.join(directory, variant_name(photo_id, variant, fmt)),
+                   buffer.getvalue())
+    return time.perf_counter() - start
+
+
+# ---------- Pipeline ---------- #
+
+class ImagePipeline:
+    """Photo store rendering variants in a process pool"""
+
+    def __init__(self, app=None):
+        self.store = None
+        self.legacy_folder = None
+        self.workers = os.cpu_count() or 1
+        self.max_bytes = 10 * 1024 * 1024
+        self.max_pixels = 40_000_000
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.store = app.config.get('IMAGE_STORE') or os.path.join(app.instance_path, 'images')
+        self.legacy_folder = app.config.get('IMAGES_FOLDER')
+        self.workers = app.config.get('IMAGE_WORKERS', os.cpu_count() or 1)
+        self.max_bytes = app.config.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        self.max_pixels = app.config.get('IMAGE_MAX_PIXELS', 40_000_000)
+        self.reset_stats()
+        app.extensions['image_pipeline'] = self
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Public API ---------- #
+
+    def ingest(self, data, render=True):
+        """
+        Store an uploaded photo and, with `render`, start rendering its
+        variants; return its id. Raise ValueError unless it is a JPEG, PNG or WebP image,
+        PhotoTooLarge when it is over the size limits.
+        """
+        if not data:
+            raise ValueError("Photo is empty")
+        if len(data) > self.max_bytes:
+            raise PhotoTooLarge(f"Photo is larger than {self.max_bytes} bytes")
+        # Only the header is read here; decoding is left to the pool
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format, (width, height) = image.format, image.size
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            raise ValueError("Photo must be a JPEG, PNG or WebP image")
+        if image_format not in ACCEPTED_FORMATS:
+            raise ValueError("Photo must be a JPEG, PNG or WebP image")
+        if width * height > self.max_pixels:
+            raise PhotoTooLarge(f"Photo is larger than {self.max_pixels} pixels")
+
+        photo_id = hashlib.sha256(data).hexdigest()[:32]
+        original = self._original_path(photo_id)
+        if not os.path.exists(original):
+            os.makedirs(os.path.dirname(original), exist_ok=True)
+            _write(original, data)
+        if render:
+            self._schedule(photo_id)
+        return photo_id
+
+    def ingest_file(self, path, render=True):
+        with open(path, 'rb') as file:
+            return self.ingest(file.read(), render)
+
+    def render(self, photo_id):
+        """Render the variants of a stored photo now, unless already done"""
+        if not os.path.exists(self._original_path(photo_id)):
+            raise ValueError(f"Unknown photo {photo_id}")
+        self._schedule(photo_id)
+        self.wait(photo_id)
+
+    def wait(self, photo_id, timeout=None):
+        """Block until the variants of a photo being rendered are written"""
+        with self._lock:
+            future = self._pending.get(photo_id)
+        if future is not None:
+            future.result(timeout)
+
+    def variant_path(self, name):
+        """
+        Path of a variant file, rendered first if it is missing; None when
+        the name or the photo is unknown.
+        """
+        match = _VARIANT_NAME.match(name)
+        if match is None:
+            return None
+        photo_id = match.group(1)
+        path = os.path.join(os.path.dirname(self._original_path(photo_id)), name)
+        if not os.path.exists(path):
+            if not os.path.exists(self._original_path(photo_id)):
+                return None
+            self.wait(photo_id)
+            if not os.path.exists(path):
+                self._schedule(photo_id, force=True)
+                self.wait(photo_id)
+        return path
+
+    def response(self, filename):
+        """Response serving /images/<filename>, conditional and with Range support"""
+        match = _VARIANT_NAME.match(filename)
+        if match is None:
+            if not self.legacy_folder:
+                abort(404)
+            return send_from_directory(self.legacy_folder, filename, max_age=LEGACY_MAX_AGE)
+        path = self.variant_path(filename)
+        if path is None:
+            abort(404)
+        response = send_file(path, mimetype=_MIMETYPES[_EXTENSIONS[match.group(3)]],
+                             etag=filename, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+
+    # ---------- Metrics ---------- #
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'rendered': 0, 'render_seconds': 0.0,
+                           'render_max_seconds': 0.0, 'failed': 0}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    # ---------- Execution ---------- #
+
+    def _original_path(self, photo_id):
+        return os.path.join(self.store, photo_id[:2], photo_id)
+
+    def _rendered(self, photo_id):
+        directory = os.path.dirname(self._original_path(photo_id))
+        return all(os.path.exists(os.path.join(directory, variant_name(photo_id, v, f)))
+                   for v in VARIANTS for f in FORMATS)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _record(self, elapsed=None):
+        with self._lock:
+            if elapsed is None:
+                self._stats['failed'] += 1
+                return
+            self._stats['rendered'] += 1
+            self._stats['render_seconds'] += elapsed
+            self._stats['render_max_seconds'] = max(self._stats['render_max_seconds'], elapsed)
+
+    def _schedule(self, photo_id, force=False):
+        """Render the variants of a photo unless done or under way"""
+        if not force and self._rendered(photo_id):
+            return
+        original = self._original_path(photo_id)
+        if not self.workers:
+            try:
+                self._record(_render(original, photo_id))
+            except Exception:
+                self._record()
+                raise
+            return
+
+        pool = self._pool()
+        with self._lock:
+            if photo_id in self._pending:
+                return
+            future = self._pending[photo_id] = pool.submit(_render, original, photo_id)
+
+        def done(future):
+            with self._lock:
+                if self._pending.get(photo_id) is future:
+                    del self._pending[photo_id]
+            self._record(None if future.cancelled() or future.exception() else future.result())
+        future.add_done_callback(done)
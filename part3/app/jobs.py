@@ -0,0 +1,357 @@
+"""Background jobs on a queue table.
+
+Slow side effects of a write are queued as rows of the jobs table, in the
+transaction of the write itself: a write rolled back leaves no job behind,
+a committed one cannot lose its job. Workers claim and run them later.
+
+    @jobs.task('purge_place')
+    def purge_place(place_id): ...
+
+    with facade.transaction():
+        facade.delete_place(place_id)   # enqueues purge_place
+
+A key makes enqueueing idempotent: as long as a job with that key exists,
+whatever its status, enqueueing another does nothing. A job runs at least
+once (a worker may die after the work but before recording it), so tasks
+must be idempotent too.
+
+Workers are threads of the app process (JOB_WORKERS, started by its first
+request) and/or of worker.py processes; any number of them may share a
+database. Scripts only enqueue. A worker claims the oldest due job with a conditional UPDATE and
+leases it for JOB_LEASE_SECONDS: the job of a worker that died is claimed
+again once its lease expires. A failed job is retried after
+JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), capped at JOB_BACKOFF_MAX_SECONDS,
+give or take 25%, until max_attempts; it is then left 'failed' with its
+last error. Done jobs are deleted after JOB_RETENTION_SECONDS.
+
+Configuration (read by init_app):
+    JOB_WORKERS             worker threads in the app process; 0 leaves jobs to worker.py (default 1)
+    JOB_POLL_SECONDS        how often idle workers look for due jobs (default 1)
+    JOB_LEASE_SECONDS       time a worker has to finish a job (default 300)
+    JOB_MAX_ATTEMPTS        runs before a job is failed for good (default 5)
+    JOB_BACKOFF_SECONDS     delay before the first retry (default 5)
+    JOB_BACKOFF_MAX_SECONDS longest delay between retries (default 3600)
+    JOB_RETENTION_SECONDS   how long done jobs are kept (default 86400)
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+# How often idle workers delete old done jobs
+PRUNE_INTERVAL = 600
+
+_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+class UnknownTask(Exception):
+    """Raised for a job whose task is not registered"""
+
+
+class JobQueue:
+    """Persistent job queue with worker threads and metrics"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.tasks = {}
+        self.workers = 1
+        self.poll_seconds = 1.0
+        self.lease_seconds = 300
+        self.max_attempts = 5
+        self.backoff_seconds = 5
+        self.backoff_max_seconds = 3600
+        self.retention_seconds = 86400
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', 1)
+        self.poll_seconds = app.config.get('JOB_POLL_SECONDS', 1.0)
+        self.lease_seconds = app.config.get('JOB_LEASE_SECONDS', 300)
+        self.max_attempts = app.config.get('JOB_MAX_ATTEMPTS', 5)
+        self.backoff_seconds = app.config.get('JOB_BACKOFF_SECONDS', 5)
+        self.backoff_max_seconds = app.config.get('JOB_BACKOFF_MAX_SECONDS', 3600)
+        self.retention_seconds = app.config.get('JOB_RETENTION_SECONDS', 86400)
+        self.reset_stats()
+        app.extensions['job_queue'] = self
+        app.before_request(self._start_workers)
+
+    def _start_workers(self):
+        if self.workers and not self._threads:
+            self.start()
+
+    def task(self, name):
+        """Register the decorated function as the task run by jobs named `name`"""
+        def decorator(function):
+            self.tasks[name] = function
+            return function
+        return decorator
+
+    # ---------- Enqueueing ---------- #
+
+    def enqueue(self, name, key=None, delay=0, max_attempts=None, **payload):
+        """
+        Queue a run of task `name` with `payload` (JSON-serializable) as
+        keyword arguments, in the current transaction. Return False when a
+        job with this key already exists.
+        """
+        from app import db
+        from app.models.job import Job
+        from app.persistence.sqlalchemy_repository import commit
+
+        if name not in self.tasks:
+            raise UnknownTask(name)
+        now = datetime.utcnow()
+        values = {
+            'name': name,
+            'payload': payload,
+            'key': key,
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts or self.max_attempts,
+            'run_at': now + timedelta(seconds=delay),
+            'created_at': now,
+        }
+        insert = _INSERTS.get(db.engine.dialect.name)
+        if insert is not None:
+            statement = insert(Job.__table__).values(**values)
+            if key is not None:
+                statement = statement.on_conflict_do_nothing(index_elements=['key'])
+            created = db.session.execute(statement).rowcount == 1
+        else:
+            created = key is None or db.session.scalar(select(Job.id).where(Job.key == key)) is None
+            if created:
+                db.session.execute(Job.__table__.insert().values(**values))
+
+        if created:
+            session = db.session()
+            if not session.info.get('job_wakeup'):
+                session.info['job_wakeup'] = True
+                event.listen(session, 'after_commit', self._after_commit, once=True)
+        commit()
+        return created
+
+    def _after_commit(self, session):
+        session.info.pop('job_wakeup', None)
+        self._wakeup.set()
+
+    # ---------- Workers ---------- #
+
+    def start(self, threads=None):
+        """Start worker threads (default: JOB_WORKERS) running jobs until stop()"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._threads = [threading.Thread(target=self._work, name=f'job-worker-{index}',
+                                              daemon=True)
+                             for index in range(threads or self.workers or 1)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the worker threads once their current job is done"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _work(self):
+        from app import db
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    ran = self.run_one(worker_id)
+                    if not ran and time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                        self._last_prune = time.monotonic()
+                        self.prune()
+                except Exception:
+                    logger.exception("Job worker failed")
+                    ran = False
+                finally:
+                    db.session.remove()
+                if not ran:
+                    self._wakeup.wait(self.poll_seconds)
+                    self._wakeup.clear()
+
+    def run_one(self, worker_id=None):
+        """Claim and run one due job; return False when none is due"""
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        job = self._claim(worker_id)
+        if job is None:
+            return False
+        self._run(job, worker_id)
+        return True
+
+    def run_pending(self, limit=None):
+        """Run due jobs in this thread until none is left (or `limit` ran); return the count"""
+        count = 0
+        while (limit is None or count < limit) and self.run_one():
+            count += 1
+        return count
+
+    # ---------- Execution ---------- #
+
+    def _due(self, now):
+        from app.models.job import Job
+        return or_(and_(Job.status == 'queued', Job.run_at <= now),
+                   and_(Job.status == 'running', Job.locked_until < now))
+
+    def _claim(self, worker_id):
+        """Lease the oldest due job to this worker; None when none is due"""
+        from app import db
+        from app.models.job import Job
+
+        db.session().pin_primary()
+        for _ in range(5):
+            now = datetime.utcnow()
+            job_id = db.session.scalar(
+                select(Job.id).where(self._due(now)).order_by(Job.run_at).limit(1))
+            if job_id is None:
+                db.session.rollback()
+                return None
+            # Another worker may claim it first: then try the next one
+            claimed = db.session.execute(
+                update(Job.__table__)
+                .where(Job.id == job_id, self._due(now))
+                .values(status='running', attempts=Job.attempts + 1, locked_by=worker_id,
+                        locked_until=now + timedelta(seconds=self.lease_seconds))
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id, populate_existing=True)
+        return None
+
+    def backoff(self, attempts):
+        """Delay in seconds before retrying a job that failed `attempts` times"""
+        delay = min(self.backoff_seconds * 2 ** (attempts - 1), self.backoff_max_seconds)
+        return delay * random.uniform(0.75, 1.25)
+
+    def _run(self, job, worker_id):
+        from app import db
+
+        job_id, name, payload = job.id, job.name, dict(job.payload or {})
+        attempts, max_attempts = job.attempts, job.max_attempts
+        waited = max(0.0, (datetime.utcnow() - job.run_at).total_seconds())
+        start = time.perf_counter()
+        try:
+            task = self.tasks.get(name)
+            if task is None:
+                raise UnknownTask(name)
+            task(**payload)
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            elapsed = time.perf_counter() - start
+            error = f"{type(exc).__name__}: {exc}"[:1024]
+            now = datetime.utcnow()
+            if attempts < max_attempts and not isinstance(exc, UnknownTask):
+                outcome = 'retried'
+                self._finish(job_id, worker_id, status='queued', last_error=error,
+                             run_at=now + timedelta(seconds=self.backoff(attempts)))
+            else:
+                outcome = 'failed'
+                self._finish(job_id, worker_id, status='failed', last_error=error,
+                             finished_at=now)
+            logger.warning("Job %s %s (attempt %s/%s) %s: %s", job_id, name, attempts,
+                           max_attempts, outcome, error)
+        else:
+            elapsed = time.perf_counter() - start
+            outcome = 'succeeded'
+            self._finish(job_id, worker_id, status='done', last_error=None,
+                         finished_at=datetime.utcnow())
+        self._record(name, outcome, elapsed, waited)
+
+    def _finish(self, job_id, worker_id, **values):
+        """Record a job's outcome, unless its lease was lost to another worker"""
+        from app import db
+        from app.models.job import Job
+        db.session.execute(
+            update(Job.__table__)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == 'running')
+            .values(locked_by=None, locked_until=None, **values))
+        db.session.commit()
+
+    def prune(self):
+        """Delete the done jobs older than JOB_RETENTION_SECONDS; return the count"""
+        from app import db
+        from app.models.job import Job
+        before = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        deleted = db.session.execute(
+            delete(Job.__table__).where(Job.status == 'done', Job.finished_at < before)).rowcount
+        db.session.commit()
+        return deleted
+
+    # ---------- Metrics ---------- #
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'succeeded': 0,
+                'retried': 0,
+                'failed': 0,
+                'run_seconds': 0.0,
+                'max_run_seconds': 0.0,
+                'wait_seconds': 0.0,
+                'max_wait_seconds': 0.0,
+                'tasks': {},
+            }
+
+    def _record(self, name, outcome, elapsed, waited):
+        with self._lock:
+            stats = self._stats
+            stats[outcome] += 1
+            stats['run_seconds'] += elapsed
+            stats['max_run_seconds'] = max(stats['max_run_seconds'], elapsed)
+            stats['wait_seconds'] += waited
+            stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+            task = stats['tasks'].setdefault(name, {'succeeded': 0, 'retried': 0, 'failed': 0})
+            task[outcome] += 1
+
+    def stats(self):
+        """
+        Counters of the jobs run by this process (run_seconds is the time
+        spent in tasks, wait_seconds the time jobs were due before they
+        started), plus the queue as the database holds it: jobs per status,
+        due jobs and the age in seconds of the oldest one.
+        """
+        from app import db
+        from app.models.job import JOB_STATUSES, Job
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tasks'] = {name: dict(counts) for name, counts in stats['tasks'].items()}
+        runs = stats['succeeded'] + stats['retried'] + stats['failed']
+        stats['avg_run_seconds'] = stats['run_seconds'] / runs if runs else 0.0
+        stats['avg_wait_seconds'] = stats['wait_seconds'] / runs if runs else 0.0
+
+        now = datetime.utcnow()
+        counts = dict(db.session.execute(
+            select(Job.status, func.count()).group_by(Job.status)).all())
+        stats['queue'] = {status: counts.get(status, 0) for status in JOB_STATUSES}
+        due, oldest = db.session.execute(
+            select(func.count(), func.min(Job.run_at))
+            .where(Job.status == 'queued', Job.run_at <= now)).one()
+        stats['due'] = due
+        stats['oldest_due_seconds'] = (now - oldest).total_seconds() if oldest else 0.0
+        stats['workers'] = len(self._threads)
+        return stats
@@ -7,6 +7,7 @@ class Amenity(db.Model):
     """SQLAlchemy model representing an Amenity (Task 8 & 9)."""
 
     __tablename__ = 'amenities'
+    __table_args__ = (db.Index('ix_amenities_updated_at', 'updated_at'),)
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(128), nullable=False, unique=True)
@@ -17,7 +18,7 @@ class Amenity(db.Model):
         "Place",
         secondary="place_amenity",
         back_populates="amenities",
-        lazy="subquery"
+        lazy="select"
     )
 
     def __init__(self, name, description=None):
@@ -0,0 +1,47 @@
+from datetime import datetime
+from app import db
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class Job(db.Model):
+    """A unit of background work, see app.jobs."""
+
+    __tablename__ = 'jobs'
+    # Workers claim the oldest due job of a status
+    __table_args__ = (db.Index('ix_jobs_status_run_at', 'status', 'run_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Idempotency key: a job enqueued twice under one key runs once
+    key = db.Column(db.String(128), unique=True)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Lease of the worker running it; an expired lease makes it claimable again
+    locked_by = db.Column(db.String(64))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.String(1024))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "payload": self.payload,
+            "key": self.key,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "run_at": self.run_at.isoformat() if self.run_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} ({self.status})>"
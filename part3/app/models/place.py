@@ -5,29 +5,66 @@ from app import db
 place_amenity = db.Table(
     "place_amenity",
     db.Column("place_id", db.String(36), db.ForeignKey("places.id", ondelete="CASCADE"), primary_key=True),
-    db.Column("amenity_id", db.String(36), db.ForeignKey("amenities.id", ondelete="CASCADE"), primary_key=True)
+    db.Column("amenity_id", db.String(36), db.ForeignKey("amenities.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key serves lookups by place; this one by amenity
+    db.Index("ix_place_amenity_amenity_id", "amenity_id", "place_id")
 )
 
+from sqlalchemy import case, event
 from sqlalchemy.orm import validates
+from sqlalchemy.sql import ClauseElement
+from app import imaging
+from app.persistence import search
+from app.persistence.geo import encode_geohash
+from app.persistence.soft_delete import SoftDeleteMixin
 
-class Place(db.Model):
+RATING_STARS = range(1, 6)
+
+class Place(SoftDeleteMixin, db.Model):
     __tablename__ = "places"
+    # Keyset pages, price filters, owner lookups, version probes and
+    # filtered counts (every read skips soft-deleted places)
+    __table_args__ = (
+        db.Index("ix_places_created_at_id", "created_at", "id"),
+        db.Index("ix_places_price", "price"),
+        db.Index("ix_places_owner_id", "owner_id"),
+        db.Index("ix_places_updated_at", "updated_at"),
+        db.Index("ix_places_deleted_at", "deleted_at"),
+        db.Index("ix_places_search_rowid", "search_rowid", unique=True),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(128), nullable=False)
     price = db.Column(db.Float, default=0.0)
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
+    # Derived from latitude/longitude on flush, indexed for geo search
+    geohash = db.Column(db.String(12), index=True)
+    # Key of the full-text index, assigned by its insert trigger (SQLite)
+    search_rowid = db.Column(db.Integer)
     owner_id = db.Column(db.String(36), db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    reviews = db.relationship('Review', back_populates='place', cascade='all, delete-orphan')
+    # Reviews are purged in batches, see HBnBFacade.delete_place
+    reviews = db.relationship('Review', back_populates='place', cascade='all, delete-orphan',
+                              passive_deletes=True)
     rooms = db.Column(db.Integer, default=1)
     capacity = db.Column(db.Integer, default=1)
     surface = db.Column(db.Float, default=0.0)
     description = db.Column(db.String(512), default="")
+    # Photo ids (see app.imaging), or "/images/<file>" paths for older photos
     photos = db.Column(db.JSON, default=list)
 
+    # Rating aggregates, maintained by the facade on review writes
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     owner = db.relationship("User", back_populates="places", lazy=True)
 
     amenities = db.relationship(
@@ -40,7 +77,8 @@ class Place(db.Model):
     reviews = db.relationship(
     "Review",
     back_populates="place",
-    cascade="all, delete-orphan"
+    cascade="all, delete-orphan",
+    passive_deletes=True
 )
 
     @validates('title')
@@ -73,6 +111,60 @@ class Place(db.Model):
         if review not in self.reviews:
             self.reviews.append(review)
 
+    def update_rating_stats(self, added=(), removed=()):
+        """
+        Stage the aggregate change for the added and removed ratings.
+
+        Values are assigned as SQL expressions on the current column values,
+        so concurrent review writes cannot lose updates. They are written by
+        the next flush, in the same transaction as the reviews themselves.
+        Calls before that flush add up: the expressions are rebuilt from the
+        running total of the deltas staged so far.
+        """
+        deltas = {}
+        for star in added:
+            deltas[star] = deltas.get(star, 0) + 1
+        for star in removed:
+            deltas[star] = deltas.get(star, 0) - 1
+        if not any(deltas.values()):
+            return
+
+        # Still pending while the expressions are unflushed; a flush, commit
+        # or rollback expires or replaces them
+        pending = {}
+        if isinstance(self.__dict__.get("review_count"), ClauseElement):
+            pending = self.__dict__.get("_rating_deltas", {})
+        for star, delta in pending.items():
+            deltas[star] = deltas.get(star, 0) + delta
+        deltas = {star: delta for star, delta in deltas.items() if delta}
+        self._rating_deltas = deltas
+
+        cls = type(self)
+        count = cls.review_count + sum(deltas.values())
+        total = cls.rating_sum + sum(star * delta for star, delta in deltas.items())
+
+        self.review_count = count
+        self.rating_sum = total
+        self.rating_avg = case((count > 0, total * 1.0 / count), else_=0.0)
+        for star in RATING_STARS:
+            column = f"rating_{star}"
+            if star in deltas:
+                setattr(self, column, getattr(cls, column) + deltas[star])
+            elif star in pending:
+                # Cancelled out: drop the delta staged by an earlier call
+                setattr(self, column, getattr(cls, column))
+
+    def rating_stats(self):
+        """Return the rating aggregates as a JSON-serializable dictionary."""
+        return {
+            "review_count": self.review_count or 0,
+            "rating_sum": self.rating_sum or 0,
+            "rating_avg": round(self.rating_avg or 0.0, 2),
+            "rating_histogram": {
+                str(star): getattr(self, f"rating_{star}") or 0 for star in RATING_STARS
+            },
+        }
+
     def add_amenity(self, amenity):
         """Add an amenity to the place."""
         if amenity not in self.amenities:
@@ -88,7 +180,9 @@ class Place(db.Model):
             "latitude": self.latitude,
             "longitude": self.longitude,
             "owner_id": self.owner_id,
-            "photos": self.photos or [],
+            "photos": [imaging.photo_url(photo) for photo in self.photos or []],
+            "images": [imaging.describe(photo) for photo in self.photos or []],
+            **self.rating_stats(),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -101,3 +195,30 @@ class Place(db.Model):
 
     def __repr__(self):
         return f"<Place {self.title} (owner={self.owner_id})>"
+
+
+# Matches the rating sort: rating_avg descending, then id
+db.Index("ix_places_rating_avg_id", Place.rating_avg.desc(), Place.id)
+
+
+@event.listens_for(Place, "before_insert")
+@event.listens_for(Place, "before_update")
+def _set_geohash(mapper, connection, place):
+    """Keep the geohash in sync with the coordinates."""
+    if place.latitude is None or place.longitude is None:
+        place.geohash = None
+    else:
+        place.geohash = encode_geohash(place.latitude, place.longitude)
+
+
+@event.listens_for(Place.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    """Create the full-text index with the table (SQLite only)."""
+    if connection.dialect.name == "sqlite":
+        search.create(connection)
+
+
+@event.listens_for(Place.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        search.drop(connection)
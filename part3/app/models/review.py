@@ -1,12 +1,18 @@
 import uuid
 from datetime import datetime
 from app import db
+from app.persistence.soft_delete import SoftDeleteMixin
 
 
-class Review(db.Model):
+class Review(SoftDeleteMixin, db.Model):
     """SQLAlchemy model representing a Review (Task 8 & 9)."""
 
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_place_id_created_at_id', 'place_id', 'created_at', 'id'),
+        db.Index('ix_reviews_user_id', 'user_id'),
+        db.Index('ix_reviews_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     text = db.Column(db.String(512), nullable=False)
@@ -22,10 +28,7 @@ class Review(db.Model):
         """Initialize a Review with validation."""
         super().__init__()
 
-        if not text:
-            raise ValueError("The review text is required.")
-        if not (1 <= int(rating) <= 5):
-            raise ValueError("The rating must be between 1 and 5.")
+        self.validate(text, rating)
         if not user or not place:
             raise ValueError("A review must be linked to both a user and a place.")
 
@@ -41,6 +44,14 @@ class Review(db.Model):
         if user and hasattr(user, "add_review"):
             user.add_review(self)
 
+    @staticmethod
+    def validate(text, rating):
+        """Raise ValueError if the review text or rating is invalid."""
+        if not text:
+            raise ValueError("The review text is required.")
+        if not (1 <= int(rating) <= 5):
+            raise ValueError("The rating must be between 1 and 5.")
+
     def to_dict(self, include_related=False):
         """Convert review object to dictionary."""
         data = {
@@ -1,13 +1,16 @@
 import re
 import uuid
 from datetime import datetime
-from app import db, bcrypt
+from app import db, hasher
 from app.models.base_model import BaseModel
+from app.persistence.soft_delete import SoftDeleteMixin
 
-class User(BaseModel, db.Model):
+class User(SoftDeleteMixin, BaseModel, db.Model):
     """User model with SQLAlchemy mapping and validation."""
 
     __tablename__ = 'users'
+    # Makes the list's version probe (max(updated_at)) an index lookup
+    __table_args__ = (db.Index('ix_users_updated_at', 'updated_at'),)
 
     id = db.Column(db.String(60), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = db.Column(db.String(50), nullable=False)
@@ -15,11 +18,16 @@ class User(BaseModel, db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
+    # Part of every access token; bumping it revokes the tokens issued before
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    places = db.relationship('Place', back_populates='owner', cascade='all, delete-orphan')
-    reviews = db.relationship('Review', back_populates='author', cascade='all, delete-orphan')
+    # Purged in batches rather than loaded, see HBnBFacade.delete_user
+    places = db.relationship('Place', back_populates='owner', cascade='all, delete-orphan',
+                             passive_deletes=True)
+    reviews = db.relationship('Review', back_populates='author', cascade='all, delete-orphan',
+                              passive_deletes=True)
 
     def __init__(self, *args, **kwargs):
         """Initialize the user, ensuring valid email and hashed password."""
@@ -37,11 +45,15 @@ class User(BaseModel, db.Model):
     def hash_password(self, password):
         """Hashes the password before storing it."""
         if password:
-            self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+            self.password = hasher.hash(password)
 
     def verify_password(self, password):
         """Verifies if the provided password matches the hashed password."""
-        return bcrypt.check_password_hash(self.password, password)
+        return hasher.verify(self.password, password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash uses another cost factor than the configured one."""
+        return hasher.needs_rehash(self.password)
 
     def is_valid_email(self, email):
         """Validates email format using regex."""
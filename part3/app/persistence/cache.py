@@ -0,0 +1,237 @@
+"""Cache backends used by CachedRepository.
+
+LRUCache keeps entries in process. SharedCache stores JSON in any client
+offering redis-style get/set(ex=)/delete/incr, so several workers can share
+entries; InMemorySharedClient is a local stand-in for such a server.
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+
+
+class CacheBackend(ABC):
+    """Key/value store with per-entry TTL and usage counters"""
+
+    def __init__(self):
+        self._counters = {'hits': 0, 'misses': 0, 'sets': 0,
+                          'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        self._counters_lock = threading.Lock()
+        self._generations = {}
+
+    def _count(self, counter, amount=1):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def stats(self):
+        """Return a snapshot of the counters"""
+        with self._counters_lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def get_generation(self, namespace):
+        """Return the number that callers put in the keys of a namespace"""
+        return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        """Orphan every key of a namespace; orphans age out of the cache"""
+        with self._counters_lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value, or None"""
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        pass
+
+    @abstractmethod
+    def delete(self, *keys):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class NullCache(CacheBackend):
+    """Backend that stores nothing, used when caching is disabled"""
+
+    def get(self, key):
+        self._count('misses')
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with a default TTL in seconds"""
+
+    def __init__(self, max_entries=10000, ttl=300):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._count('expirations')
+                entry = None
+            if entry is None:
+                self._count('misses')
+                return None
+            self._entries.move_to_end(key)
+        self._count('hits')
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count('sets')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = sum(self._entries.pop(key, None) is not None for key in keys)
+        if removed:
+            self._count('invalidations', removed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class SharedCache(CacheBackend):
+    """
+    Cache stored in an external key/value server.
+
+    `client` needs redis-style get(key), set(key, value, ex=seconds),
+    delete(*keys) and incr(key); values are stored as JSON strings under `prefix`.
+    Eviction is left to the server, so that counter stays at 0.
+    """
+
+    def __init__(self, client, ttl=300, prefix='hbnb:'):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return json.loads(raw, object_hook=_decode)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value, default=_encode),
+                        ex=ttl or None)
+        self._count('sets')
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+            self._count('invalidations', len(keys))
+
+    def clear(self):
+        # Keys can't be listed cheaply on a shared server: orphan them all
+        # by bumping a global generation and let them expire
+        self.bump_generation('')
+
+    def _generation_key(self, namespace):
+        return f"{self.prefix}generation:{namespace}"
+
+    def get_generation(self, namespace):
+        # Shared so a bump in one worker is seen by the others
+        namespace_generation = int(self.client.get(self._generation_key(namespace)) or 0)
+        global_generation = int(self.client.get(self._generation_key('')) or 0)
+        return f"{global_generation}.{namespace_generation}"
+
+    def bump_generation(self, namespace):
+        self.client.incr(self._generation_key(namespace))
+
+
+class InMemorySharedClient:
+    """Local stand-in for a redis-style server, for development and tests"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (0, None))
+            self._data[key] = (int(value) + 1, expires_at)
+            return int(value) + 1
+
+
+def build_cache(config):
+    """Create the backend selected by CACHE_BACKEND ('lru', 'shared' or 'none')"""
+    backend = config.get('CACHE_BACKEND', 'lru')
+    ttl = config.get('CACHE_TTL', 300)
+    if backend == 'lru':
+        return LRUCache(max_entries=config.get('CACHE_MAX_ENTRIES', 10000), ttl=ttl)
+    if backend == 'shared':
+        client = config.get('CACHE_CLIENT') or InMemorySharedClient()
+        return SharedCache(client, ttl=ttl)
+    if backend == 'none':
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}'")
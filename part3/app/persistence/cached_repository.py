@@ -0,0 +1,206 @@
+import weakref
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.persistence.cache import LRUCache
+from app.persistence.repository import Repository
+
+# Session.info key holding the repositories/ids to invalidate at commit or rollback
+PENDING_KEY = 'cache_invalidations'
+
+# Live repositories, notified by the Session listeners registered once below
+_repositories = weakref.WeakSet()
+
+
+class CachedRepository(Repository):
+    """
+    Read-through cache in front of a SQLAlchemy repository.
+
+    get, get_many and get_by_attribute on `attributes` are served from the
+    cache; everything else, including specialised query methods such as
+    PlaceRepository.get_page, goes straight to the wrapped repository.
+
+    Entries hold the column values of an entity, never its relationships,
+    so collections like Place.amenities are always loaded from the database.
+    Columns in `exclude` (secrets such as password hashes) are left out too
+    and loaded on first access.
+    Any flush touching a cached entity (direct update, delete, collection
+    change, aggregate update from a review) invalidates it when the session
+    commits or rolls back; ORM bulk UPDATE/DELETE statements drop every
+    entry of the model.
+    """
+
+    def __init__(self, repository, cache=None, attributes=(), exclude=()):
+        self.repository = repository
+        self.model = repository.model
+        self.cache = cache if cache is not None else LRUCache()
+        self.attributes = frozenset(attributes)
+        self.namespace = self.model.__tablename__
+        self._columns = [attr.key for attr in inspect(self.model).column_attrs
+                         if attr.key not in exclude]
+        _repositories.add(self)
+
+    def __getattr__(self, name):
+        if name == 'repository':
+            raise AttributeError(name)
+        return getattr(self.repository, name)
+
+    # ---------- Keys and (de)serialization ---------- #
+
+    def _key(self, *parts):
+        generation = self.cache.get_generation(self.namespace)
+        return ':'.join([self.namespace, str(generation), *map(str, parts)])
+
+    def _dump(self, obj):
+        return {column: getattr(obj, column) for column in self._columns}
+
+    def _load(self, data):
+        """Attach a cached entity to the session without querying"""
+        from app import db
+        existing = db.session.identity_map.get(identity_key(self.model, data['id']))
+        if existing is not None:
+            return existing
+        obj = inspect(self.model).class_manager.new_instance()
+        for column, value in data.items():
+            set_committed_value(obj, column, value)
+        make_transient_to_detached(obj)
+        return db.session.merge(obj, load=False)
+
+    def _store(self, obj):
+        from app import db
+        # Never publish values that are not committed yet; flushed but
+        # uncommitted ones are dropped again at commit/rollback
+        state = inspect(obj)
+        if state.pending or state.modified or db.session.info.get('transaction_depth'):
+            return
+        self.cache.set(self._key('id', obj.id), self._dump(obj))
+
+    # ---------- Reads ---------- #
+
+    def get(self, obj_id):
+        if obj_id is None:
+            return None
+        data = self.cache.get(self._key('id', obj_id))
+        if data is not None:
+            return self._load(data)
+        obj = self.repository.get(obj_id)
+        if obj is not None:
+            self._store(obj)
+        return obj
+
+    def get_many(self, obj_ids):
+        obj_ids = list(dict.fromkeys(obj_ids))
+        found = {}
+        missing = []
+        for obj_id in obj_ids:
+            data = self.cache.get(self._key('id', obj_id))
+            if data is None:
+                missing.append(obj_id)
+            else:
+                found[obj_id] = self._load(data)
+        for obj in self.repository.get_many(missing):
+            self._store(obj)
+            found[obj.id] = obj
+        return [found[obj_id] for obj_id in obj_ids if obj_id in found]
+
+    def get_by_attribute(self, attr_name, attr_value):
+        if attr_name not in self.attributes:
+            return self.repository.get_by_attribute(attr_name, attr_value)
+        key = self._key(attr_name, attr_value)
+        obj_id = self.cache.get(key)
+        if obj_id is not None:
+            obj = self.get(obj_id)
+            # The entity may have been deleted or changed since the entry was made
+            if obj is not None and getattr(obj, attr_name) == attr_value:
+                return obj
+        obj = self.repository.get_by_attribute(attr_name, attr_value)
+        if obj is not None:
+            self._store(obj)
+            self.cache.set(key, obj.id)
+        return obj
+
+    def get_all(self):
+        return self.repository.get_all()
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        return self.repository.get_all_by_attribute(attr_name, attr_value)
+
+    # ---------- Writes (invalidated through session events) ---------- #
+
+    def add(self, obj):
+        return self.repository.add(obj)
+
+    def add_many(self, objs):
+        return self.repository.add_many(objs)
+
+    def update(self, obj_id, data):
+        return self.repository.update(obj_id, data)
+
+    def update_many(self, updates):
+        return self.repository.update_many(updates)
+
+    def delete(self, obj_id):
+        return self.repository.delete(obj_id)
+
+    def delete_many(self, obj_ids):
+        return self.repository.delete_many(obj_ids)
+
+    # ---------- Invalidation ---------- #
+
+    def invalidate(self, *obj_ids):
+        self.cache.delete(*(self._key('id', obj_id) for obj_id in obj_ids))
+
+    def invalidate_all(self):
+        """Drop every entry of this model, e.g. after a set-based UPDATE"""
+        self.cache.bump_generation(self.namespace)
+
+    def _pending(self, session):
+        return session.info.setdefault(PENDING_KEY, {}).setdefault(self, set())
+
+    def _after_flush(self, session, flush_context):
+        obj_ids = {obj.id for obj in (*session.dirty, *session.deleted)
+                   if isinstance(obj, self.model)}
+        if obj_ids:
+            # Drop now so this session re-reads, and again once the outcome is known
+            self.invalidate(*obj_ids)
+            self._pending(session).update(obj_ids)
+
+    def _after_end(self, session, *args):
+        pending = session.info.get(PENDING_KEY, {}).pop(self, None)
+        if pending is None:
+            return
+        if None in pending:
+            self.invalidate_all()
+        else:
+            self.invalidate(*pending)
+
+    def _on_orm_execute(self, state):
+        if not (state.is_update or state.is_delete):
+            return
+        mapper = state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, self.model):
+            self.invalidate_all()
+            # None marks "everything" for the commit/rollback pass
+            self._pending(state.session).add(None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    for repository in list(_repositories):
+        repository._after_flush(session, flush_context)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _after_end(session, *args):
+    for repository in list(_repositories):
+        repository._after_end(session, *args)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_orm_execute(state):
+    for repository in list(_repositories):
+        repository._on_orm_execute(state)
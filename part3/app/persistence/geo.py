@@ -0,0 +1,188 @@
+"""Geospatial helpers shared by the SQL and in-memory repositories.
+
+Places carry a geohash: nearby points share a prefix, so a region can be
+fetched with a few index range scans on that column, then refined with an
+exact distance computed in Python.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Sorts after every geohash character; `cell <= geohash < cell + GEOHASH_END`
+# matches all hashes starting with cell
+GEOHASH_END = "{"
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return (height, width) in degrees of a geohash cell"""
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (math.sin(d_phi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(value):
+    """
+    Parse "min_lon,min_lat,max_lon,max_lat" (GeoJSON order).
+
+    min_lon may be greater than max_lon for a box crossing the antimeridian.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox latitudes must be ordered and between -90 and 90")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("bbox longitudes must be between -180 and 180")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Return the smallest bbox containing the circle around a point"""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - d_lat, latitude + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole: every longitude is in range
+        return -180.0, max(min_lat, -90.0), 180.0, min(max_lat, 90.0)
+
+    d_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    if d_lon >= 180:
+        return -180.0, min_lat, 180.0, max_lat
+    min_lon = longitude - d_lon
+    max_lon = longitude + d_lon
+    # Wrap around the antimeridian
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def bbox_center(bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon > max_lon:
+        max_lon += 360
+    longitude = (min_lon + max_lon) / 2
+    if longitude > 180:
+        longitude -= 360
+    return (min_lat + max_lat) / 2, longitude
+
+
+def search_center(latitude, longitude, radius_km, bbox):
+    """
+    Return the (latitude, longitude) distances of a search are measured
+    from: the given point, else the bbox centre. Raise ValueError when
+    neither a radius search nor a bbox is fully specified.
+    """
+    if bbox is None:
+        if latitude is None or longitude is None or radius_km is None:
+            raise ValueError("lat, lon and radius_km are required together")
+        if radius_km <= 0:
+            raise ValueError("radius_km must be positive")
+    elif latitude is None or longitude is None:
+        return bbox_center(bbox)
+    return latitude, longitude
+
+
+def _split_antimeridian(bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon <= max_lon:
+        return [bbox]
+    return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+
+
+def in_bbox(latitude, longitude, bbox):
+    return any(
+        min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+        for min_lon, min_lat, max_lon, max_lat in _split_antimeridian(bbox)
+    )
+
+
+def covering_cells(bbox, max_cells=16):
+    """
+    Return geohash prefixes whose cells together cover the bbox.
+
+    Uses the finest precision needing at most max_cells cells, so the
+    candidate set stays close to the box itself.
+    """
+    parts = _split_antimeridian(bbox)
+    best = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size(precision)
+        cells = set()
+        for min_lon, min_lat, max_lon, max_lat in parts:
+            rows = range(math.floor((min_lat + 90) / height),
+                         math.floor((max_lat + 90) / height) + 1)
+            columns = range(math.floor((min_lon + 180) / width),
+                            math.floor((max_lon + 180) / width) + 1)
+            if len(cells) + len(rows) * len(columns) > max_cells:
+                return best
+            for row in rows:
+                for column in columns:
+                    # Encode the centre of each cell, clamped inside the world
+                    latitude = min(-90 + (row + 0.5) * height, 90.0)
+                    longitude = min(-180 + (column + 0.5) * width, 180.0)
+                    cells.add(encode_geohash(latitude, longitude, precision))
+        best = sorted(cells)
+    return best
+
+
+def page_by_distance(results, after=None, limit=20):
+    """
+    Return (results, next_cursor) for one page of (obj, distance) pairs.
+
+    `results` must be sorted by (distance, id); cursors are "<distance>,<id>".
+    """
+    if after:
+        try:
+            distance, obj_id = after.split(',', 1)
+            distance = float(distance)
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid cursor")
+        results = [(obj, d) for obj, d in results if (d, obj.id) > (distance, obj_id)]
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last, distance = results[-1]
+        next_cursor = f"{distance!r},{last.id}"
+    return results, next_cursor
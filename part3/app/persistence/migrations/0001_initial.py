@@ -0,0 +1,24 @@
+"""Initial schema: every model table, created when missing.
+
+Databases made with db.create_all() before migrations existed are adopted
+as they are; later migrations bring them up to date.
+"""
+
+
+def _metadata():
+    from app import db
+    # Register every model on the metadata
+    import app.models.amenity  # noqa: F401
+    import app.models.job  # noqa: F401
+    import app.models.place  # noqa: F401
+    import app.models.review  # noqa: F401
+    import app.models.user  # noqa: F401
+    return db.metadata
+
+
+def upgrade(connection):
+    _metadata().create_all(connection)
+
+
+def downgrade(connection):
+    _metadata().drop_all(connection)
@@ -0,0 +1,75 @@
+"""Columns added after the first schema, backfilled.
+
+    places.geohash          geo search cell, computed from the coordinates
+    places.review_count, rating_sum, rating_avg, rating_1..rating_5
+                            rating aggregates, recomputed from the reviews
+    users.token_version     access token revocation counter
+
+Columns that already exist are left alone.
+"""
+from sqlalchemy import column, func, inspect, select, table, update
+
+from app.persistence.geo import encode_geohash
+
+STARS = range(1, 6)
+
+COLUMNS = [
+    ("places", "geohash", "VARCHAR(12)"),
+    ("places", "review_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("places", "rating_sum", "INTEGER NOT NULL DEFAULT 0"),
+    ("places", "rating_avg", "FLOAT NOT NULL DEFAULT 0"),
+    *(("places", f"rating_{star}", "INTEGER NOT NULL DEFAULT 0") for star in STARS),
+    ("users", "token_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def _backfill_geohash(connection):
+    places = table("places", column("id"), column("latitude"), column("longitude"),
+                   column("geohash"))
+    rows = connection.execute(
+        select(places.c.id, places.c.latitude, places.c.longitude)
+        .where(places.c.geohash.is_(None), places.c.latitude.is_not(None),
+               places.c.longitude.is_not(None))).all()
+    for row in rows:
+        connection.execute(update(places).where(places.c.id == row.id)
+                           .values(geohash=encode_geohash(row.latitude, row.longitude)))
+
+
+def _recompute_ratings(connection):
+    places = table("places", column("id"), *(column(name) for _, name, _ in COLUMNS[1:-1]))
+    reviews = table("reviews", column("place_id"), column("rating"))
+
+    def of_place(aggregate, *where):
+        return (select(aggregate).where(reviews.c.place_id == places.c.id, *where)
+                .scalar_subquery())
+
+    connection.execute(update(places).values(
+        review_count=of_place(func.count()),
+        rating_sum=of_place(func.coalesce(func.sum(reviews.c.rating), 0)),
+        rating_avg=of_place(func.coalesce(func.avg(reviews.c.rating), 0.0)),
+        **{f"rating_{star}": of_place(func.count(), reviews.c.rating == star)
+           for star in STARS}))
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    existing = {name: {c["name"] for c in inspector.get_columns(name)}
+                for name in ("places", "users")}
+    added = set()
+    for table_name, name, ddl in COLUMNS:
+        if name not in existing[table_name]:
+            connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}")
+            added.add(name)
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_places_geohash ON places (geohash)")
+    if "geohash" in added:
+        _backfill_geohash(connection)
+    if "review_count" in added:
+        _recompute_ratings(connection)
+
+
+def downgrade(connection):
+    # DROP COLUMN needs SQLite 3.35+, and no index left on the column
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_places_geohash")
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_places_rating_avg")
+    for table_name, name, _ in reversed(COLUMNS):
+        connection.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN {name}")
@@ -0,0 +1,50 @@
+"""Indexes for the lookups, filters and sorts the facade issues.
+
+    places          keyset pages (created_at, id) and (rating_avg desc, id),
+                    price filters, owner_id, updated_at version probe
+    reviews         per-place pages (place_id, created_at, id), user_id,
+                    updated_at version probe
+    place_amenity   places by amenity (the primary key starts with place_id)
+    users, amenities  updated_at version probes
+
+The two indexes they extend are dropped.
+"""
+
+INDEXES = [
+    ("ix_places_created_at_id", "places", "created_at, id"),
+    ("ix_places_rating_avg_id", "places", "rating_avg DESC, id"),
+    ("ix_places_price", "places", "price"),
+    ("ix_places_owner_id", "places", "owner_id"),
+    ("ix_places_updated_at", "places", "updated_at"),
+    ("ix_reviews_place_id_created_at_id", "reviews", "place_id, created_at, id"),
+    ("ix_reviews_user_id", "reviews", "user_id"),
+    ("ix_reviews_updated_at", "reviews", "updated_at"),
+    ("ix_place_amenity_amenity_id", "place_amenity", "amenity_id, place_id"),
+    ("ix_users_updated_at", "users", "updated_at"),
+    ("ix_amenities_updated_at", "amenities", "updated_at"),
+]
+
+REPLACED = [
+    ("ix_places_rating_avg", "places", "rating_avg"),
+    ("ix_reviews_place_id_created_at", "reviews", "place_id, created_at"),
+]
+
+
+def _create(connection, indexes):
+    for name, table, columns in indexes:
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _drop(connection, indexes):
+    for name, _, _ in indexes:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def upgrade(connection):
+    _drop(connection, REPLACED)
+    _create(connection, INDEXES)
+
+
+def downgrade(connection):
+    _drop(connection, INDEXES)
+    _create(connection, REPLACED)
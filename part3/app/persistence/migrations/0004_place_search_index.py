@@ -0,0 +1,20 @@
+"""Full-text index over places.title and places.description.
+
+Creates places_fts and the triggers keeping it in sync (see
+app.persistence.search), then indexes the existing places. SQLite only.
+"""
+from app.persistence import search
+
+
+def upgrade(connection):
+    if connection.dialect.name != "sqlite":
+        return
+    # Keyed by rowid until 0007
+    search.create(connection, rowid_column='rowid')
+    search.rebuild(connection)
+
+
+def downgrade(connection):
+    if connection.dialect.name != "sqlite":
+        return
+    search.drop(connection)
@@ -0,0 +1,14 @@
+"""Background job queue table, see app.jobs."""
+
+
+def _table():
+    from app.models.job import Job
+    return Job.__table__
+
+
+def upgrade(connection):
+    _table().create(connection, checkfirst=True)
+
+
+def downgrade(connection):
+    _table().drop(connection, checkfirst=True)
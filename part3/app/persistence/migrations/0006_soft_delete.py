@@ -0,0 +1,28 @@
+"""Soft deletion, see app.persistence.soft_delete.
+
+    users.deleted_at, places.deleted_at, reviews.deleted_at
+                    set when the row is deleted, until it is purged
+    ix_places_deleted_at
+                    place reads and counts skip soft-deleted rows
+
+Columns that already exist are left alone.
+"""
+from sqlalchemy import inspect
+
+TABLES = ("users", "places", "reviews")
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    for table_name in TABLES:
+        if "deleted_at" not in {c["name"] for c in inspector.get_columns(table_name)}:
+            connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN deleted_at DATETIME")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_places_deleted_at ON places (deleted_at)")
+
+
+def downgrade(connection):
+    # DROP COLUMN needs SQLite 3.35+, and no index left on the column
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_places_deleted_at")
+    for table_name in reversed(TABLES):
+        connection.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN deleted_at")
@@ -0,0 +1,36 @@
+"""Stable key for the place search index.
+
+    places.search_rowid
+                    INTEGER keying places_fts, assigned by its insert
+                    trigger; existing places get their current rowid
+    ix_places_search_rowid
+                    unique, joins index rows back to places
+
+places_fts and its triggers are recreated on the new key and the index
+rebuilt (see app.persistence.search). SQLite only for the index.
+"""
+from sqlalchemy import inspect
+
+from app.persistence import search
+
+
+def upgrade(connection):
+    if "search_rowid" not in {c["name"] for c in inspect(connection).get_columns("places")}:
+        connection.exec_driver_sql("ALTER TABLE places ADD COLUMN search_rowid INTEGER")
+    connection.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_places_search_rowid ON places (search_rowid)")
+    if connection.dialect.name != "sqlite":
+        return
+    connection.exec_driver_sql("UPDATE places SET search_rowid = rowid WHERE search_rowid IS NULL")
+    search.drop(connection)
+    search.create(connection)
+    search.rebuild(connection)
+
+
+def downgrade(connection):
+    if connection.dialect.name == "sqlite":
+        search.drop(connection)
+        search.create(connection, rowid_column='rowid')
+        search.rebuild(connection)
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_places_search_rowid")
+    connection.exec_driver_sql("ALTER TABLE places DROP COLUMN search_rowid")
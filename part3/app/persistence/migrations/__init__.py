@@ -0,0 +1,101 @@
+"""Schema migrations.
+
+Migrations are the modules of this package named NNNN_<description>.py,
+applied in version order. Each defines upgrade(connection) and
+downgrade(connection) and runs in its own transaction; applied versions
+are recorded in the schema_migrations table.
+
+    from app.persistence import migrations
+    migrations.upgrade(db.engine)            # apply everything pending
+    migrations.downgrade(db.engine, '0001')  # revert what came after 0001
+
+0001 creates every missing table from the current models, so a fresh
+database already has what later migrations add: write those to be
+idempotent (CREATE ... IF NOT EXISTS, sqlalchemy.inspect checks).
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+
+_MODULE_NAME = re.compile(r'^(\d{4})_\w+$')
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', metadata,
+    Column('version', String(4), primary_key=True),
+    Column('name', String(128), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+class Migration:
+    """One migration module"""
+
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    def __repr__(self):
+        return f"<Migration {self.name}>"
+
+
+def discover():
+    """Every migration of this package, ordered by version"""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            found.append(Migration(match.group(1), info.name, module))
+    return sorted(found, key=lambda migration: migration.version)
+
+
+def applied_versions(engine):
+    """Versions already applied to this database"""
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def status(engine):
+    """[(migration, applied)] for every known migration"""
+    applied = applied_versions(engine)
+    return [(migration, migration.version in applied) for migration in discover()]
+
+
+def upgrade(engine, target=None):
+    """Apply pending migrations up to `target` (default: all); return them"""
+    applied = applied_versions(engine)
+    done = []
+    for migration in discover():
+        if target is not None and migration.version > target:
+            break
+        if migration.version in applied:
+            continue
+        with engine.begin() as connection:
+            migration.module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name,
+                applied_at=datetime.utcnow()))
+        done.append(migration)
+    return done
+
+
+def downgrade(engine, target):
+    """Revert applied migrations newer than `target`, newest first; return them"""
+    applied = applied_versions(engine)
+    done = []
+    for migration in reversed(discover()):
+        if migration.version <= target or migration.version not in applied:
+            continue
+        with engine.begin() as connection:
+            migration.module.downgrade(connection)
+            connection.execute(schema_migrations.delete().where(
+                schema_migrations.c.version == migration.version))
+        done.append(migration)
+    return done
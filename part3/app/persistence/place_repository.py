@@ -0,0 +1,333 @@
+from datetime import datetime
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import joinedload, lazyload, selectinload
+
+from app.models.amenity import Amenity
+from app.models.place import Place, RATING_STARS, place_amenity
+from app.models.review import Review
+from app.persistence import geo, search
+from app.persistence.sqlalchemy_repository import SQLAlchemyRepository, commit
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    """Place repository with keyset pagination and SQL-side filters"""
+
+    def __init__(self):
+        super().__init__(Place)
+
+    # sort name -> (cursor key attribute, parser, descending)
+    SORTS = {
+        'created': ('created_at', datetime.fromisoformat, False),
+        'rating': ('rating_avg', float, True),
+    }
+
+    @classmethod
+    def encode_cursor(cls, place, sort='created'):
+        """Build the `after` cursor pointing just past this place"""
+        key = getattr(place, cls.SORTS[sort][0])
+        key = key.isoformat() if isinstance(key, datetime) else repr(key)
+        return f"{key},{place.id}"
+
+    @classmethod
+    def decode_cursor(cls, cursor, sort='created'):
+        """Parse a `<sort key>,<id>` cursor, raise ValueError if malformed"""
+        parse = cls.SORTS[sort][1]
+        try:
+            key, place_id = cursor.split(',', 1)
+            key = parse(key)
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not place_id:
+            raise ValueError("Invalid cursor")
+        return key, place_id
+
+    @staticmethod
+    def filter_criteria(filters):
+        """Return the WHERE criteria for the given filters"""
+        filters = filters or {}
+        criteria = []
+
+        if filters.get('min_price') is not None:
+            criteria.append(Place.price >= filters['min_price'])
+        if filters.get('max_price') is not None:
+            criteria.append(Place.price <= filters['max_price'])
+        if filters.get('min_capacity') is not None:
+            criteria.append(Place.capacity >= filters['min_capacity'])
+        if filters.get('min_rooms') is not None:
+            criteria.append(Place.rooms >= filters['min_rooms'])
+        if filters.get('max_rooms') is not None:
+            criteria.append(Place.rooms <= filters['max_rooms'])
+
+        # A place must offer every requested amenity
+        for amenity_id in filters.get('amenities') or []:
+            criteria.append(Place.amenities.any(Amenity.id == amenity_id))
+
+        return criteria
+
+    @staticmethod
+    def _amenities_loader():
+        # Amenity.places defaults to a subquery load, which would pull every
+        # place sharing an amenity back into the session
+        return selectinload(Place.amenities).options(lazyload(Amenity.places))
+
+    def get_detail(self, place_id):
+        """
+        Load a place with its owner, amenities and reviews with their authors.
+
+        Issues a fixed number of queries whatever the number of reviews.
+        """
+        from app import db
+        return db.session.scalars(self.detail_statement(place_id)).unique().one_or_none()
+
+    def detail_statement(self, place_id):
+        return (select(Place)
+                .options(joinedload(Place.owner),
+                         self._amenities_loader(),
+                         selectinload(Place.reviews).joinedload(Review.author))
+                .where(Place.id == place_id))
+
+    def get_detail_version(self, place_id):
+        """
+        Return a tuple that changes whenever get_detail's result does, or
+        None if the place does not exist. One query, no rows loaded.
+
+        Covers the place, its owner, its amenities and its reviews with
+        their authors; amenity links themselves are tracked through
+        Place.updated_at, which the facade touches when they change.
+        """
+        from app import db
+        row = db.session.execute(self.detail_version_statement(place_id)).one_or_none()
+        return tuple(row) if row is not None else None
+
+    def detail_version_statement(self, place_id):
+        from app.models.user import User
+        from app.persistence.review_repository import ReviewRepository
+
+        amenities = [
+            select(aggregate)
+            .select_from(Amenity)
+            .join(place_amenity, place_amenity.c.amenity_id == Amenity.id)
+            .where(place_amenity.c.place_id == place_id)
+            .scalar_subquery()
+            for aggregate in (func.count(Amenity.id), func.max(Amenity.updated_at))
+        ]
+        return (select(Place.updated_at, User.updated_at,
+                       *ReviewRepository.place_version_columns(place_id), *amenities)
+                .select_from(Place)
+                .join(User, Place.owner_id == User.id)
+                .where(Place.id == place_id))
+
+    def get_page(self, filters=None, after=None, limit=20, sort='created'):
+        """
+        Return (places, next_cursor) for one page.
+
+        Pages are ordered by (created_at, id), or by (rating_avg desc, id)
+        with sort='rating'. `after` is a cursor as produced by encode_cursor
+        for the same sort; next_cursor is None on the last page.
+        """
+        from app import db
+        places = db.session.scalars(self.page_statement(filters, after, limit, sort)).all()
+        return self.paginate(places, limit, sort)
+
+    def page_statement(self, filters=None, after=None, limit=20, sort='created'):
+        """SELECT for get_page, raise ValueError on a bad sort or cursor"""
+        if sort not in self.SORTS:
+            raise ValueError(f"sort must be one of {', '.join(self.SORTS)}")
+        attribute, _, descending = self.SORTS[sort]
+        key_column = getattr(Place, attribute)
+
+        statement = select(Place).where(*self.filter_criteria(filters))
+
+        if after:
+            key, place_id = self.decode_cursor(after, sort)
+            beyond = key_column < key if descending else key_column > key
+            # The redundant bound lets the (key, id) index seek to the cursor
+            # instead of walking every row before it
+            statement = statement.where(
+                key_column <= key if descending else key_column >= key,
+                or_(beyond, and_(key_column == key, Place.id > place_id))
+            )
+
+        # Fetch one extra row to know whether another page exists
+        return (statement.options(self._amenities_loader())
+                .order_by(key_column.desc() if descending else key_column, Place.id)
+                .limit(limit + 1))
+
+    @classmethod
+    def paginate(cls, places, limit, sort='created'):
+        """Split the rows of page_statement into (places, next_cursor)"""
+        next_cursor = None
+        if len(places) > limit:
+            places = places[:limit]
+            next_cursor = cls.encode_cursor(places[-1], sort)
+        return places, next_cursor
+
+    def get_nearby(self, latitude, longitude, radius_km=None, bbox=None,
+                   filters=None, after=None, limit=20):
+        """
+        Return ([(place, distance_km)], next_cursor) sorted by (distance, id).
+
+        Candidates come from geohash range scans over the cells covering the
+        radius (or bbox) and are ranked on their coordinates alone; only the
+        requested page is loaded as Place objects.
+        """
+        from app import db
+        statement, bbox = self.nearby_statement(latitude, longitude, radius_km, bbox, filters)
+        results, next_cursor = self.rank_nearby(db.session.execute(statement), latitude,
+                                                longitude, radius_km, bbox, after, limit)
+        places = {place.id: place for place in db.session.scalars(
+            self.by_ids_statement([row.id for row, _ in results]))}
+        return [(places[row.id], distance) for row, distance in results], next_cursor
+
+    def nearby_statement(self, latitude, longitude, radius_km=None, bbox=None, filters=None):
+        """Return (candidate SELECT, bbox) for get_nearby"""
+        if bbox is None:
+            bbox = geo.radius_bbox(latitude, longitude, radius_km)
+        min_lon, min_lat, max_lon, max_lat = bbox
+
+        cells = geo.covering_cells(bbox)
+        statement = (select(Place.id, Place.latitude, Place.longitude)
+                     .where(*self.filter_criteria(filters),
+                            Place.latitude.between(min_lat, max_lat)))
+        if cells != [""]:
+            statement = statement.where(or_(*(
+                and_(Place.geohash >= cell, Place.geohash < cell + geo.GEOHASH_END)
+                for cell in cells
+            )))
+        return statement, bbox
+
+    @staticmethod
+    def rank_nearby(rows, latitude, longitude, radius_km, bbox, after=None, limit=20):
+        """Keep the candidate rows within reach, sorted; return (page, next_cursor)"""
+        results = []
+        for row in rows:
+            if not geo.in_bbox(row.latitude, row.longitude, bbox):
+                continue
+            distance = geo.haversine_km(latitude, longitude, row.latitude, row.longitude)
+            if radius_km is None or distance <= radius_km:
+                results.append((row, distance))
+        results.sort(key=lambda result: (result[1], result[0].id))
+        return geo.page_by_distance(results, after=after, limit=limit)
+
+    def by_ids_statement(self, place_ids):
+        """SELECT of the places with these ids, amenities preloaded"""
+        return (select(Place).options(self._amenities_loader())
+                .where(Place.id.in_(place_ids)))
+
+    def search_window(self, query):
+        """
+        Subquery (id, rank) of the places matching a full-text query: the
+        newest search.RANK_WINDOW of them, soft-deleted ones left out
+        """
+        fts = search.places_fts
+        return (select(Place.id, search.bm25().label('rank'))
+                .select_from(fts)
+                .join(Place, Place.search_rowid == fts.c.rowid)
+                .where(search.matches(search.parse_query(query)))
+                .order_by(fts.c.rowid.desc())
+                .limit(search.RANK_WINDOW)
+                .subquery())
+
+    def search(self, query, after=None, limit=20):
+        """
+        Return (places, next_cursor) for one page of places matching a
+        full-text query, best match first (see app.persistence.search).
+
+        The FTS5 index yields the matches of search_window() with their
+        rank; only the requested page is loaded as Place objects.
+        """
+        from app import db
+        window = self.search_window(query)
+        page = select(window.c.id, window.c.rank)
+        if after:
+            rank, place_id = search.decode_cursor(after)
+            page = page.where(or_(window.c.rank > rank,
+                                  and_(window.c.rank == rank, window.c.id > place_id)))
+        rows = db.session.execute(
+            page.order_by(window.c.rank, window.c.id).limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = search.encode_cursor(rows[-1].rank, rows[-1].id)
+
+        places = {place.id: place for place in db.session.scalars(
+            self.by_ids_statement([row.id for row in rows]))}
+        return [places[row.id] for row in rows], next_cursor
+
+    def count_search(self, query):
+        """Count places matching a full-text query: the rows search() pages through"""
+        from app import db
+        return db.session.execute(
+            select(func.count()).select_from(self.search_window(query))).scalar_one()
+
+    def count(self, filters=None):
+        """Count places matching the filters"""
+        from app import db
+        return db.session.execute(self.count_statement(filters)).scalar_one()
+
+    def count_statement(self, filters=None):
+        return select(func.count()).select_from(Place).where(*self.filter_criteria(filters))
+
+    def recompute_rating_stats(self, *criteria):
+        """
+        Rebuild the rating aggregates of the places matching `criteria`
+        (default: every place) from their reviews, soft-deleted ones left out.
+
+        Runs as a single set-based UPDATE; returns the number of places.
+        """
+        from app import db
+
+        def reviews_of_place(column, *where):
+            return (select(column)
+                    .where(Review.place_id == Place.id, Review.deleted_at.is_(None), *where)
+                    .scalar_subquery())
+
+        values = {
+            # Aggregates are derived data: leave updated_at untouched
+            'updated_at': Place.updated_at,
+            'review_count': reviews_of_place(func.count(Review.id)),
+            'rating_sum': reviews_of_place(func.coalesce(func.sum(Review.rating), 0)),
+            'rating_avg': reviews_of_place(func.coalesce(func.avg(Review.rating), 0.0)),
+        }
+        for star in RATING_STARS:
+            values[f'rating_{star}'] = reviews_of_place(func.count(Review.id),
+                                                        Review.rating == star)
+
+        result = db.session.execute(
+            update(Place).where(*criteria).values(**values)
+            .execution_options(synchronize_session=False))
+        commit()
+        return result.rowcount
+
+    def purge(self, *criteria, batch_size=1000):
+        """
+        Delete the places matching `criteria`, soft-deleted or not, with
+        their reviews and amenity links, without loading them. Works a
+        batch of places at a time and commits every batch; return the
+        counts per table.
+
+        Children are deleted first rather than left to the ON DELETE
+        CASCADE foreign keys, which SQLite only enforces with
+        PRAGMA foreign_keys=ON. The full-text index follows through its
+        triggers on places.
+        """
+        from app import db
+        from app.persistence.review_repository import ReviewRepository
+        reviews = ReviewRepository()
+        batch = (select(Place.id).where(*criteria).limit(batch_size)
+                 .execution_options(include_deleted=True))
+        counts = {'places': 0, 'reviews': 0, 'amenity_links': 0}
+        while True:
+            place_ids = db.session.execute(batch).scalars().all()
+            if not place_ids:
+                return counts
+            counts['reviews'] += reviews.delete_where(Review.place_id.in_(place_ids),
+                                                      batch_size=batch_size)
+            counts['amenity_links'] += db.session.execute(
+                delete(place_amenity).where(place_amenity.c.place_id.in_(place_ids))).rowcount
+            counts['places'] += db.session.execute(
+                delete(Place).where(Place.id.in_(place_ids))
+                .execution_options(synchronize_session=False)).rowcount
+            commit()
@@ -0,0 +1,136 @@
+"""Read replica routing.
+
+With SQLALCHEMY_REPLICA_URIS set, create_app opens an engine named
+`replica<n>` for each URI (same SQLALCHEMY_ENGINE_OPTIONS and
+SQLITE_PROFILE as the primary), and db.session, a RoutingSession, sends
+plain SELECTs to one replica, chosen per session so a request reads one
+consistent copy; everything else goes to the primary. A session stays on
+the primary, for reads too, once it has written, inside
+facade.transaction() blocks, and for the whole of POST/PUT/PATCH/DELETE
+requests, so a request reads its own writes and never updates from a
+stale read.
+
+Requests only pin themselves: a replica lagging behind may still serve
+the previous state to the next request, and the entity cache may keep
+that copy until its entry is invalidated or expires.
+
+Every engine counts its statements, see query_counts(). SQLiteReplication
+stands in for real replication when trying this with local SQLite files.
+"""
+import random
+import threading
+from collections import Counter
+
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql import Select
+
+from app.persistence.sqlite import configure_engine
+
+REPLICA_PREFIX = 'replica'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class RoutingSession(Session):
+    """Session sending reads to a replica engine, see the module docstring"""
+
+    def pin_primary(self):
+        """Send every following statement of this session to the primary"""
+        self.info['use_primary'] = True
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing:
+                self.pin_primary()
+            elif isinstance(clause, Select):
+                replica = self._replica()
+                if replica is not None:
+                    return replica
+            elif clause is not None:
+                # Writes, and statements we can't tell apart from writes
+                self.pin_primary()
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        info = self.info
+        if info.get('use_primary') or info.get('transaction_depth'):
+            return None
+        replicas = current_app.extensions.get('replicas')
+        if not replicas:
+            return None
+        if 'replica' not in info:
+            info['replica'] = random.choice(list(replicas))
+        return replicas[info['replica']]
+
+
+def init_app(app, db):
+    """
+    Open the replica engines, count statements per engine and pin unsafe
+    requests to the primary. Needs an app context.
+    """
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    replicas = app.extensions['replicas'] = {
+        f"{REPLICA_PREFIX}{index}": create_engine(uri, **options)
+        for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS', []))
+    }
+    for engine in replicas.values():
+        configure_engine(engine, app.config.get('SQLITE_PROFILE', 'default'))
+
+    counts = app.extensions['query_counts'] = Counter()
+    lock = threading.Lock()
+    engines = {(key or 'primary'): engine for key, engine in db.engines.items()}
+    for name, engine in {**engines, **replicas}.items():
+        def count(conn, cursor, statement, parameters, context, executemany, name=name):
+            with lock:
+                counts[name] += 1
+
+        event.listen(engine, 'before_cursor_execute', count)
+
+    @app.before_request
+    def _pin_unsafe_methods():
+        if app.extensions['replicas'] and request.method not in SAFE_METHODS:
+            db.session().pin_primary()
+
+
+def query_counts():
+    """Statements executed per bind ('primary', 'replica0', ...) by this app"""
+    return dict(current_app.extensions['query_counts'])
+
+
+def reset_query_counts():
+    current_app.extensions['query_counts'].clear()
+
+
+class SQLiteReplication:
+    """
+    Replication stand-in for SQLite files: sync() copies the primary into
+    every replica with the online backup API. Call it after commits to
+    simulate (lagging) replication, or pass auto=True to sync after each
+    commit of db.session.
+    """
+
+    def __init__(self, db, auto=False):
+        self.db = db
+        self.auto = auto
+        if auto:
+            event.listen(RoutingSession, 'after_commit', self._after_commit)
+
+    def _after_commit(self, session):
+        self.sync()
+
+    def sync(self):
+        source = self.db.engine.raw_connection()
+        try:
+            for engine in current_app.extensions['replicas'].values():
+                target = engine.raw_connection()
+                try:
+                    source.driver_connection.backup(target.driver_connection)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+    def close(self):
+        if self.auto:
+            event.remove(RoutingSession, 'after_commit', self._after_commit)
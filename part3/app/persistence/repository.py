@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from app.persistence import geo, search
 
 
 class Repository(ABC):
@@ -6,10 +7,18 @@ class Repository(ABC):
     def add(self, obj):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
     @abstractmethod
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
@@ -18,36 +27,213 @@ class Repository(ABC):
     def update(self, obj_id, data):
         pass
 
+    @abstractmethod
+    def update_many(self, updates):
+        pass
+
     @abstractmethod
     def delete(self, obj_id):
         pass
 
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_all_by_attribute(self, attr_name, attr_value):
+        pass
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Dict-backed repository.
+
+    Attributes listed in `indexes` (non-unique) or `unique_indexes` get a
+    hash index kept up to date by add, update and delete, so
+    get_by_attribute and get_all_by_attribute on them are O(1).
+    `search_fields` ({attribute: weight}) gets an inverted index for search.
+    """
+
+    def __init__(self, indexes=(), unique_indexes=(), search_fields=None):
         self._storage = {}
+        self._search = search.InvertedIndex(search_fields) if search_fields else None
+        self._unique = set(unique_indexes)
+        # attr name -> {value: {obj_id: None}} (dicts keep insertion order)
+        self._indexes = {attr: {} for attr in (*indexes, *unique_indexes)}
+        # attr name -> {obj_id: value}, what each object is indexed under
+        self._indexed_values = {attr: {} for attr in self._indexes}
+
+    def _check_unique(self, obj_id, values):
+        for attr_name, value in values.items():
+            if attr_name not in self._unique or value is None:
+                continue
+            owners = self._indexes[attr_name].get(value, {})
+            if any(owner != obj_id for owner in owners):
+                raise ValueError(f"{attr_name} '{value}' already exists")
+
+    def _index(self, obj):
+        if self._search is not None:
+            self._search.add(obj)
+        for attr_name, index in self._indexes.items():
+            value = getattr(obj, attr_name, None)
+            index.setdefault(value, {})[obj.id] = None
+            self._indexed_values[attr_name][obj.id] = value
+
+    def _unindex(self, obj_id):
+        for attr_name, index in self._indexes.items():
+            if obj_id not in self._indexed_values[attr_name]:
+                continue
+            value = self._indexed_values[attr_name].pop(obj_id)
+            owners = index[value]
+            del owners[obj_id]
+            if not owners:
+                del index[value]
 
     def add(self, obj):
+        self._check_unique(obj.id, {attr_name: getattr(obj, attr_name, None)
+                                    for attr_name in self._unique})
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
+
+    def add_many(self, objs):
+        """Add several objects; nothing is stored if one breaks a unique index"""
+        for attr_name in self._unique:
+            seen = {}
+            for obj in objs:
+                value = getattr(obj, attr_name, None)
+                if value is not None and seen.setdefault(value, obj.id) != obj.id:
+                    raise ValueError(f"{attr_name} '{value}' already exists")
+        for obj in objs:
+            self._check_unique(obj.id, {attr_name: getattr(obj, attr_name, None)
+                                        for attr_name in self._unique})
+        for obj in objs:
+            self._unindex(obj.id)
+            self._storage[obj.id] = obj
+            self._index(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids):
+        """Return the objects with these ids, in order, skipping unknown ones"""
+        return [self._storage[obj_id] for obj_id in dict.fromkeys(obj_ids)
+                if obj_id in self._storage]
+
     def get_all(self):
         return list(self._storage.values())
 
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
+            self._check_unique(obj_id, data)
             obj.update(data)
+            # Re-read the values: callers may also have set attributes directly
+            self._unindex(obj_id)
+            self._index(obj)
+
+    def update_many(self, updates):
+        """Apply {obj_id: data} updates, return the updated objects"""
+        updated = []
+        for obj_id, data in updates.items():
+            obj = self.get(obj_id)
+            if obj:
+                self.update(obj_id, data)
+                updated.append(obj)
+        return updated
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
+            if self._search is not None:
+                # Left out of _unindex: an update keeps its search position
+                self._search.remove(obj_id)
             del self._storage[obj_id]
 
+    def delete_many(self, obj_ids):
+        """Delete several objects, return how many existed"""
+        deleted = 0
+        for obj_id in obj_ids:
+            if obj_id in self._storage:
+                self.delete(obj_id)
+                deleted += 1
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._indexes:
+            owners = self._indexes[attr_name].get(attr_value)
+            return self._storage[next(iter(owners))] if owners else None
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._indexes:
+            owners = self._indexes[attr_name].get(attr_value, {})
+            return [self._storage[obj_id] for obj_id in owners]
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+
+    @staticmethod
+    def _matches(obj, filters):
+        """Check min_<attr>/max_<attr> bounds and required amenity ids"""
+        for key, value in (filters or {}).items():
+            if value is None:
+                continue
+            if key == 'amenities':
+                owned = {amenity.id for amenity in obj.amenities}
+                if not set(value) <= owned:
+                    return False
+                continue
+            bound, attr_name = key.split('_', 1)
+            attr_value = getattr(obj, attr_name)
+            if bound == 'min' and attr_value < value:
+                return False
+            if bound == 'max' and attr_value > value:
+                return False
+        return True
+
+    def get_nearby(self, latitude, longitude, radius_km=None, bbox=None,
+                   filters=None, after=None, limit=20):
+        """
+        Pure-Python geo search by full scan.
+
+        Returns ([(obj, distance_km)], next_cursor) sorted by (distance, id).
+        """
+        if bbox is None:
+            bbox = geo.radius_bbox(latitude, longitude, radius_km)
+        results = []
+        for obj in self._storage.values():
+            if obj.latitude is None or obj.longitude is None:
+                continue
+            if not self._matches(obj, filters):
+                continue
+            if not geo.in_bbox(obj.latitude, obj.longitude, bbox):
+                continue
+            distance = geo.haversine_km(latitude, longitude, obj.latitude, obj.longitude)
+            if radius_km is None or distance <= radius_km:
+                results.append((obj, distance))
+        results.sort(key=lambda result: (result[1], result[0].id))
+        return geo.page_by_distance(results, after=after, limit=limit)
+
+    def _search_index(self):
+        if self._search is None:
+            raise ValueError("No search_fields to search on")
+        return self._search
+
+    def search(self, query, after=None, limit=20):
+        """
+        Full-text search with the inverted index.
+
+        Returns (objs, next_cursor) ordered by (rank, id), best match first.
+        """
+        ranks = self._search_index().search(search.parse_query(query))
+        results = sorted(((self._storage[obj_id], rank) for obj_id, rank in ranks.items()),
+                         key=lambda result: (result[1], result[0].id))
+        results, next_cursor = search.page_by_rank(results, after=after, limit=limit)
+        return [obj for obj, _ in results], next_cursor
+
+    def count_search(self, query):
+        """Count full-text matches, up to search.RANK_WINDOW"""
+        return self._search_index().count(search.parse_query(query))
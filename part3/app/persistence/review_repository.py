@@ -0,0 +1,62 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.sqlalchemy_repository import SQLAlchemyRepository
+
+
+class ReviewRepository(SQLAlchemyRepository):
+    """Review repository with indexed per-place queries"""
+
+    def __init__(self):
+        super().__init__(Review)
+
+    def get_by_place(self, place_id, order='desc', limit=None, offset=0):
+        """
+        Return the reviews of a place ordered by created_at, authors preloaded.
+
+        Served by the (place_id, created_at) index, so the cost depends on the
+        page size rather than on the total number of reviews.
+        """
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        created_at = Review.created_at.asc() if order == 'asc' else Review.created_at.desc()
+        review_id = Review.id.asc() if order == 'asc' else Review.id.desc()
+
+        query = (self.model.query
+                 .options(joinedload(Review.author))
+                 .filter(Review.place_id == place_id)
+                 .order_by(created_at, review_id))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def count_by_place(self, place_id):
+        return self.model.query.filter(Review.place_id == place_id).count()
+
+    def delete_by_user(self, user_id, batch_size=1000):
+        """Delete the reviews written by a user in committed batches, return the count"""
+        return self.delete_where(Review.user_id == user_id, batch_size=batch_size)
+
+    @staticmethod
+    def place_version_columns(place_id):
+        """Scalar subqueries: count, latest review update, latest author update"""
+        return [
+            select(aggregate)
+            .select_from(Review)
+            .join(User, Review.user_id == User.id)
+            .where(Review.place_id == place_id)
+            .correlate(None)
+            .scalar_subquery()
+            for aggregate in (func.count(Review.id), func.max(Review.updated_at),
+                              func.max(User.updated_at))
+        ]
+
+    def get_place_version(self, place_id):
+        """Version probe for the reviews of a place, authors included"""
+        from app import db
+        return tuple(db.session.execute(select(*self.place_version_columns(place_id))).one())
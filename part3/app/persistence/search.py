@@ -0,0 +1,311 @@
+"""Full-text search over places.
+
+On SQLite, places_fts is an FTS5 index over places.title and
+places.description. It stores no text of its own (external content: the
+columns are read back from places by places.search_rowid) and triggers on
+places keep it in sync with every insert, delete and title/description
+change, whoever issues them. It is created along with the places table
+(create_all) and by migrations 0004 and 0007.
+
+search_rowid is an INTEGER the insert trigger assigns (one more than the
+largest so far), not the implicit rowid, which VACUUM may renumber in a
+table keyed by a string.
+
+InvertedIndex gives InMemoryRepository the same search: same tokens
+(lowercased, accents folded, split on anything but letters and digits),
+same matching, same BM25 ranking.
+
+Every word of a query must match; the last one also matches as a prefix
+once it has MIN_PREFIX letters, so "lyon lof" finds "Lyon loft". Stopwords ("the", "with", ...) are left
+out of queries holding other words: they match most places, and ranking
+pays for every place a word matches. Results are ordered by rank, the
+BM25 score as FTS5 reports it (negative, lower is better), then by id;
+cursors are "<rank>,<id>".
+
+To bound the cost of broad queries, only the RANK_WINDOW most recently
+created matches (soft-deleted places left out) are ranked. Counts are
+taken over the same window: they never promise more than paging reaches.
+"""
+import bisect
+import heapq
+import itertools
+import math
+import re
+import unicodedata
+
+from sqlalchemy import column, func, literal_column, table
+
+FTS_TABLE = 'places_fts'
+
+# Searched columns and their BM25 weights: a word in the title counts
+# as much as five in the description
+WEIGHTS = {'title': 5.0, 'description': 1.0}
+
+MAX_TERMS = 10
+# Shorter prefixes match too much of the index to rank it quickly
+MIN_PREFIX = 3
+
+# Matches ranked and counted per query (the newest ones)
+RANK_WINDOW = 1000
+
+# Column of places keying the index
+ROWID_COLUMN = 'search_rowid'
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its near of on
+    or our the this to with you your
+""".split())
+
+# BM25 parameters, FTS5's own
+K1 = 1.2
+B = 0.75
+
+
+def create_statements(rowid_column=ROWID_COLUMN):
+    """
+    Statements creating the index and its triggers, keyed by `rowid_column`
+    of places ('rowid' for the index of migration 0004)
+    """
+    assign = ""
+    if rowid_column != 'rowid':
+        assign = f"""UPDATE places SET {rowid_column} = (
+            SELECT coalesce(max({rowid_column}), 0) + 1 FROM places)
+        WHERE rowid = new.rowid AND new.{rowid_column} IS NULL;"""
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            title, description, content='places', content_rowid='{rowid_column}',
+            tokenize='unicode61 remove_diacritics 2', prefix='3 4 5 6')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON places BEGIN
+            {assign}
+            INSERT INTO {FTS_TABLE} (rowid, title, description)
+            SELECT {rowid_column}, title, description FROM places WHERE rowid = new.rowid;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON places BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.{rowid_column}, old.title, old.description);
+        END""",
+        # Rating aggregate updates leave the index alone
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF title, description ON places BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.{rowid_column}, old.title, old.description);
+            INSERT INTO {FTS_TABLE} (rowid, title, description)
+            VALUES (new.{rowid_column}, new.title, new.description);
+        END""",
+    ]
+
+
+DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create(connection, rowid_column=ROWID_COLUMN):
+    """Create the index and its triggers if missing; the index starts empty"""
+    for statement in create_statements(rowid_column):
+        connection.exec_driver_sql(statement)
+
+
+def drop(connection):
+    for statement in DROP:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild(connection):
+    """Re-index every place from the places table"""
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+# ---------- Queries ---------- #
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Words of `text` as the unicode61 tokenizer sees them"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.lower())
+    return _WORD.findall(''.join(char for char in text if not unicodedata.combining(char)))
+
+
+def parse_query(query):
+    """
+    Return the [(term, prefix)] to match for a search string; raise
+    ValueError when it holds no word or too many.
+    """
+    words = tokenize(query)
+    if not words:
+        raise ValueError("q must contain at least one word")
+    # Stopwords only count when nothing else is left
+    terms = list(dict.fromkeys([word for word in words if word not in STOPWORDS] or words))
+    if len(terms) > MAX_TERMS:
+        raise ValueError(f"q is limited to {MAX_TERMS} words")
+    return [(term, index == len(terms) - 1 and len(term) >= MIN_PREFIX)
+            for index, term in enumerate(terms)]
+
+
+def match_expression(terms):
+    """FTS5 query string for parsed terms"""
+    # Terms are letters and digits only: quoting never needs escaping
+    return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+
+
+places_fts = table(FTS_TABLE, column('rowid'))
+
+
+def matches(terms):
+    """WHERE clause selecting the index rows matching parsed terms"""
+    return literal_column(FTS_TABLE).op('MATCH')(match_expression(terms))
+
+
+def bm25():
+    """Rank of the current match, to select alongside matches()"""
+    return func.bm25(literal_column(FTS_TABLE), *WEIGHTS.values())
+
+
+def encode_cursor(rank, obj_id):
+    return f"{rank!r},{obj_id}"
+
+
+def decode_cursor(cursor):
+    """Parse a `<rank>,<id>` cursor, raise ValueError if malformed"""
+    try:
+        rank, obj_id = cursor.split(',', 1)
+        rank = float(rank)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not obj_id or math.isnan(rank):
+        raise ValueError("Invalid cursor")
+    return rank, obj_id
+
+
+def page_by_rank(results, after=None, limit=20):
+    """
+    Return (results, next_cursor) for one page of (obj, rank) pairs
+    sorted by (rank, id).
+    """
+    if after:
+        rank, obj_id = decode_cursor(after)
+        results = [(obj, r) for obj, r in results if (r, obj.id) > (rank, obj_id)]
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last, rank = results[-1]
+        next_cursor = encode_cursor(rank, last.id)
+    return results, next_cursor
+
+
+# ---------- In-memory index ---------- #
+
+class InvertedIndex:
+    """
+    Term -> documents index over text attributes of objects, ranked like
+    FTS5's bm25() with `weights` ({attribute: weight}) as column weights.
+    Documents keep the position of their first add, like a rowid.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = dict(weights or WEIGHTS)
+        # term -> {obj_id: occurrences per attribute}
+        self._postings = {}
+        # Every term, sorted, for prefix lookups
+        self._terms = []
+        # obj_id -> (position, token count, terms)
+        self._documents = {}
+        self._positions = itertools.count()
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, obj):
+        """Index `obj`, replacing what was indexed under its id"""
+        known = self._documents.get(obj.id)
+        position = known[0] if known else next(self._positions)
+        self.remove(obj.id)
+        occurrences = {}
+        length = 0
+        for column_index, attr_name in enumerate(self.weights):
+            tokens = tokenize(getattr(obj, attr_name, None))
+            length += len(tokens)
+            for token in tokens:
+                counts = occurrences.setdefault(token, [0] * len(self.weights))
+                counts[column_index] += 1
+        for term, counts in occurrences.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[obj.id] = tuple(counts)
+        self._documents[obj.id] = (position, length, tuple(occurrences))
+        self._total_length += length
+
+    def remove(self, obj_id):
+        document = self._documents.pop(obj_id, None)
+        if document is None:
+            return
+        _, length, terms = document
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            del postings[obj_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _postings_of(self, term, prefix):
+        """{obj_id: occurrences} of the documents holding the term (or a word it starts)"""
+        if not prefix:
+            return self._postings.get(term, {})
+        merged = {}
+        index = bisect.bisect_left(self._terms, term)
+        while index < len(self._terms) and self._terms[index].startswith(term):
+            for obj_id, counts in self._postings[self._terms[index]].items():
+                known = merged.get(obj_id)
+                merged[obj_id] = counts if known is None else tuple(
+                    a + b for a, b in zip(known, counts))
+            index += 1
+        return merged
+
+    def _match(self, terms):
+        """Return (postings of each term, ids of the documents matching them all)"""
+        postings = [self._postings_of(term, prefix) for term, prefix in terms]
+        candidates = set(min(postings, key=len))
+        for matched in postings:
+            candidates.intersection_update(matched)
+        return postings, candidates
+
+    def count(self, terms):
+        return min(len(self._match(terms)[1]), RANK_WINDOW)
+
+    def search(self, terms):
+        """Return {obj_id: rank} for the RANK_WINDOW newest documents matching every term"""
+        postings, candidates = self._match(terms)
+        if not candidates:
+            return {}
+        if len(candidates) > RANK_WINDOW:
+            candidates = heapq.nlargest(RANK_WINDOW, candidates,
+                                        key=lambda obj_id: self._documents[obj_id][0])
+
+        total = len(self._documents)
+        average_length = self._total_length / total
+        weights = tuple(self.weights.values())
+        idfs = []
+        for matched in postings:
+            idf = math.log((total - len(matched) + 0.5) / (len(matched) + 0.5))
+            idfs.append(idf if idf > 0 else 1e-6)
+
+        ranks = {}
+        for obj_id in candidates:
+            norm = K1 * (1 - B + B * self._documents[obj_id][1] / average_length)
+            score = 0.0
+            for idf, matched in zip(idfs, postings):
+                frequency = sum(w * count for w, count in zip(weights, matched[obj_id]))
+                score += idf * frequency * (K1 + 1) / (frequency + norm)
+            ranks[obj_id] = -score
+        return ranks
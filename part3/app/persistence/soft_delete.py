@@ -0,0 +1,28 @@
+"""Soft deletion.
+
+Models with SoftDeleteMixin get a deleted_at column. Rows where it is set
+are left out of every ORM SELECT, and of the relationships loaded from
+its results, unless the statement carries the include_deleted execution
+option:
+
+    select(Place).execution_options(include_deleted=True)
+
+They stay in their table until purged (see HBnBFacade.delete_user and
+delete_place). Core statements on the tables, and objects already in the
+session or the entity cache, still see them: soft deletes go through
+flushes or ORM bulk UPDATEs, which invalidate the cache entries.
+"""
+from sqlalchemy import Column, DateTime, event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+
+class SoftDeleteMixin:
+    deleted_at = Column(DateTime)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_deleted(state):
+    if (state.is_select and not state.is_column_load and not state.is_relationship_load
+            and not state.execution_options.get('include_deleted', False)):
+        state.statement = state.statement.options(with_loader_criteria(
+            SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True))
@@ -1,6 +1,55 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import delete, func, inspect, select, update
+
 from app.persistence.repository import Repository
 
 
+@contextmanager
+def transaction():
+    """
+    Unit of work: repository writes inside the block are flushed as they
+    happen and committed once when the outermost block exits.
+
+    An exception rolls everything back. Blocks nest; an exception escaping
+    an inner block makes the outer one roll back even if it was caught.
+    """
+    from app import db
+    info = db.session.info
+    outermost = not info.get('transaction_depth')
+    if outermost:
+        info['transaction_failed'] = False
+    info['transaction_depth'] = info.get('transaction_depth', 0) + 1
+    try:
+        yield
+    except BaseException:
+        info['transaction_failed'] = True
+        raise
+    finally:
+        info['transaction_depth'] -= 1
+        if outermost:
+            if info['transaction_failed']:
+                db.session.rollback()
+            else:
+                try:
+                    db.session.commit()
+                except BaseException:
+                    db.session.rollback()
+                    raise
+
+
+def commit():
+    """Commit now, or only flush when a transaction() block commits later"""
+    from app import db
+    if db.session.info.get('transaction_depth'):
+        # Writes staged as SQL expressions (counters, aggregates) must reach
+        # the database before the next write to the same row restages them
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
 class SQLAlchemyRepository(Repository):
     """Generic repository implementation using SQLAlchemy"""
 
@@ -10,32 +59,151 @@ class SQLAlchemyRepository(Repository):
     def add(self, obj):
         from app import db
         db.session.add(obj)
-        db.session.commit()
+        commit()
+
+    def add_many(self, objs):
+        """Add several objects in a single transaction"""
+        from app import db
+        # Client-side UUID keys let the flush batch rows into executemany
+        db.session.add_all(objs)
+        commit()
 
     def get(self, obj_id):
         return self.model.query.get(obj_id)
 
+    def get_many(self, obj_ids):
+        """Return the objects with these ids in one IN query, in order, skipping unknown ones"""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return []
+        found = {obj.id: obj for obj in
+                 self.model.query.filter(self.model.id.in_(obj_ids))}
+        return [found[obj_id] for obj_id in obj_ids if obj_id in found]
+
     def get_all(self):
         return self.model.query.all()
 
-    def update(self, obj_id, data):
+    def iter_rows(self, attributes=None, batch_size=1000):
+        """
+        Yield every row as a read-only Row of the given attributes (default:
+        all columns), fetched batch_size at a time from a server-side cursor.
+
+        No ORM entity is built and nothing is kept in the session, so memory
+        stays bounded whatever the table size. Exhaust or close the
+        generator before the session ends.
+        """
         from app import db
+        if attributes is None:
+            columns = [getattr(self.model, attr.key)
+                       for attr in inspect(self.model).column_attrs]
+        else:
+            columns = [getattr(self.model, name) for name in attributes]
+        result = db.session.execute(
+            select(*columns).execution_options(yield_per=batch_size))
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
+    def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
         return obj
 
+    def update_many(self, updates):
+        """Apply {obj_id: data} updates in a single transaction"""
+        objs = self.get_many(updates)
+        for obj in objs:
+            for key, value in updates[obj.id].items():
+                setattr(obj, key, value)
+        commit()
+        return objs
+
     def delete(self, obj_id):
         from app import db
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
             return True
         return False
 
+    def delete_many(self, obj_ids):
+        """Delete several objects in a single transaction, return the count"""
+        from app import db
+        objs = self.get_many(obj_ids)
+        for obj in objs:
+            db.session.delete(obj)
+        commit()
+        return len(objs)
+
+    def get_version(self):
+        """
+        Return (row count, latest updated_at): changes whenever a row is
+        added, updated or deleted, without loading any row.
+        """
+        from app import db
+        return tuple(db.session.execute(self.version_statement()).one())
+
+    def version_statement(self):
+        # Soft deletes touch updated_at: counting soft-deleted rows keeps
+        # the probe an index lookup
+        return (select(func.count(), func.max(self.model.updated_at)).select_from(self.model)
+                .execution_options(include_deleted=True))
+
+    def get_value(self, obj_id, attr_name):
+        """Return one column of the object, read from the database, or None if not found"""
+        from app import db
+        column = getattr(self.model, attr_name)
+        return db.session.scalar(select(column).where(self.model.id == obj_id))
+
+    def get_deleted(self, obj_id):
+        """Return the object if it is soft-deleted, else None"""
+        return (self.model.query.execution_options(include_deleted=True)
+                .filter(self.model.id == obj_id, self.model.deleted_at.is_not(None))
+                .one_or_none())
+
+    def soft_delete_where(self, *criteria):
+        """
+        Soft-delete the rows matching `criteria` in one UPDATE, without
+        loading them (the model needs SoftDeleteMixin). Return the count.
+        """
+        from app import db
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(self.model)
+            .where(*criteria, self.model.deleted_at.is_(None))
+            .values(deleted_at=now, updated_at=now)
+            .execution_options(synchronize_session=False))
+        commit()
+        return result.rowcount
+
+    def delete_where(self, *criteria, batch_size=1000):
+        """
+        Delete the rows matching `criteria` without loading them, committing
+        every batch so no transaction holds the write lock for long.
+        Return the count.
+        """
+        from app import db
+        batch = select(self.model.id).where(*criteria).limit(batch_size)
+        total = 0
+        while True:
+            deleted = db.session.execute(
+                delete(self.model).where(self.model.id.in_(batch.scalar_subquery()))
+                .execution_options(synchronize_session=False)).rowcount
+            commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
     def get_by_attribute(self, attr_name, attr_value):
         """Return first object matching a given attribute"""
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """Return every object matching a given attribute"""
+        return self.model.query.filter_by(**{attr_name: attr_value}).all()
@@ -0,0 +1,228 @@
+"""Login throttling, checked before any bcrypt work is spent.
+
+Each attempt takes a token from a per-IP and a per-account bucket; an
+empty bucket means 429 with Retry-After. Repeated failures on an account
+lock it for a while, and a credential pair that just failed is rejected
+again without re-running bcrypt.
+
+Configuration (read by init_app):
+    LOGIN_RATE_LIMIT          False disables every check (default True)
+    LOGIN_RATE_PER_IP         (attempts, seconds) bucket per client IP (default 20 per 60)
+    LOGIN_RATE_PER_ACCOUNT    (attempts, seconds) bucket per email (default 5 per 60)
+    LOGIN_LOCKOUT_THRESHOLD   failures within the lockout window locking an account (default 10)
+    LOGIN_LOCKOUT_SECONDS     lockout window and duration (default 900)
+    LOGIN_RATE_CLIENT         redis-style client to share state between workers (default: none)
+"""
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from app.persistence.cache import LRUCache
+
+
+class RateLimitStore(ABC):
+    """Storage for buckets, failure counters and lockouts"""
+
+    @abstractmethod
+    def consume(self, key, capacity, period):
+        """
+        Take one token from a bucket refilled with `capacity` tokens per
+        `period` seconds; return 0 if allowed, else seconds until a token.
+        """
+
+    @abstractmethod
+    def increment(self, key, window):
+        """Add one to a counter that expires `window` seconds after its first hit"""
+
+    @abstractmethod
+    def lock(self, key, seconds):
+        pass
+
+    @abstractmethod
+    def locked_for(self, key):
+        """Seconds left on a lock, 0 if unlocked"""
+
+    @abstractmethod
+    def delete(self, *keys):
+        pass
+
+
+def _take(bucket, capacity, period, now):
+    """Refill and take from a (tokens, updated) bucket; return (bucket, retry_after)"""
+    tokens, updated = bucket if bucket else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process store; idle entries are pruned once max_keys is reached"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        value, expires_at = self._entries.get(key, (None, None))
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            return None
+        return value
+
+    def _set(self, key, value, expires_at):
+        if key not in self._entries and len(self._entries) >= self.max_keys:
+            now = time.monotonic()
+            for stale in [k for k, (_, exp) in self._entries.items() if exp <= now]:
+                del self._entries[stale]
+        self._entries[key] = (value, expires_at)
+
+    def consume(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            bucket, retry_after = _take(self._get(key, now), capacity, period, now)
+            # A bucket left alone for a period is full again: no need to keep it
+            self._set(key, bucket, now + period)
+        return retry_after
+
+    def increment(self, key, window):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                entry = (0, now + window)
+            self._set(key, entry[0] + 1, entry[1])
+            return entry[0] + 1
+
+    def lock(self, key, seconds):
+        with self._lock:
+            self._set(key, True, time.monotonic() + seconds)
+
+    def locked_for(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if self._get(key, now) is None:
+                return 0.0
+            return self._entries[key][1] - now
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class SharedRateLimitStore(RateLimitStore):
+    """
+    Store kept in a redis-style server (get/set(ex=)/delete/incr, as used
+    by SharedCache), so every worker sees the same buckets and lockouts.
+
+    Bucket updates are read-modify-write: concurrent workers may let a
+    few extra attempts through, which is acceptable for throttling.
+    Times are wall-clock since they are compared across processes.
+    """
+
+    def __init__(self, client, prefix='hbnb:login:'):
+        self.client = client
+        self.prefix = prefix
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        raw = self.client.get(self.prefix + key)
+        bucket, retry_after = _take(json.loads(raw) if raw else None, capacity, period, now)
+        self.client.set(self.prefix + key, json.dumps(bucket), ex=math.ceil(period))
+        return retry_after
+
+    def increment(self, key, window):
+        count = self.client.incr(self.prefix + key)
+        if count == 1:
+            # First failure opens the window
+            self.client.set(self.prefix + key, count, ex=math.ceil(window))
+        return count
+
+    def lock(self, key, seconds):
+        self.client.set(self.prefix + key, time.time() + seconds, ex=math.ceil(seconds))
+
+    def locked_for(self, key):
+        until = self.client.get(self.prefix + key)
+        return max(0.0, float(until) - time.time()) if until else 0.0
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+
+class LoginLimiter:
+    """Throttling and lockout policy for the login endpoint"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.store = InMemoryRateLimitStore()
+        self.failures = LRUCache(max_entries=10000, ttl=300)
+        self._secret = b''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get('LOGIN_RATE_LIMIT', True)
+        self.per_ip = config.get('LOGIN_RATE_PER_IP', (20, 60))
+        self.per_account = config.get('LOGIN_RATE_PER_ACCOUNT', (5, 60))
+        self.lockout_threshold = config.get('LOGIN_LOCKOUT_THRESHOLD', 10)
+        self.lockout_seconds = config.get('LOGIN_LOCKOUT_SECONDS', 900)
+        client = config.get('LOGIN_RATE_CLIENT')
+        self.store = SharedRateLimitStore(client) if client else InMemoryRateLimitStore()
+        self.failures = LRUCache(max_entries=10000, ttl=self.lockout_seconds)
+        self._secret = str(config.get('SECRET_KEY', '')).encode()
+        app.extensions['login_limiter'] = self
+
+    @staticmethod
+    def _account(email):
+        return (email or '').strip().lower()
+
+    def check(self, ip, email):
+        """
+        Return 0 if this attempt may go on to verify the password, else the
+        seconds to wait. Call before any database or bcrypt work.
+        """
+        if not self.enabled:
+            return 0
+        account = self._account(email)
+        locked = self.store.locked_for(f"lock:{account}")
+        if locked:
+            return math.ceil(locked)
+        for key, (capacity, period) in ((f"ip:{ip}", self.per_ip),
+                                        (f"account:{account}", self.per_account)):
+            retry_after = self.store.consume(key, capacity, period)
+            if retry_after:
+                return math.ceil(retry_after)
+        return 0
+
+    def _fingerprint(self, email, password):
+        # Keyed so the in-memory entries can't be brute-forced offline
+        message = f"{self._account(email)}\0{password}".encode()
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def known_failure(self, email, password, password_hash):
+        """True if this exact pair already failed against the current hash"""
+        return self.enabled and self.failures.get(
+            self._fingerprint(email, password)) == password_hash
+
+    def failed(self, email, password, password_hash=None):
+        """Record a failed attempt; lock the account past the threshold"""
+        if not self.enabled:
+            return
+        account = self._account(email)
+        if password_hash:
+            self.failures.set(self._fingerprint(email, password), password_hash)
+        if self.store.increment(f"failures:{account}", self.lockout_seconds) >= self.lockout_threshold:
+            self.store.lock(f"lock:{account}", self.lockout_seconds)
+            self.store.delete(f"failures:{account}")
+
+    def succeeded(self, email):
+        if self.enabled:
+            self.store.delete(f"failures:{self._account(email)}")
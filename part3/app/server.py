@@ -0,0 +1,371 @@
+"""Prefork WSGI server for production.
+
+    python serve.py --workers 4 --threads 8
+
+The master process creates the app once and preloads it: models and
+mappers configured, namespaces registered, the Swagger spec rendered, the
+URL map compiled, then gc.freeze() so the collector leaves those objects
+(and their pages) alone. It binds the listening socket and forks the
+workers, which share the preloaded memory copy-on-write and accept from
+the same socket. Each worker serves requests in a pool of SERVER_THREADS
+threads.
+
+Signals to the master:
+
+    SIGHUP          graceful reload: fresh workers are forked, the old ones
+                    finish their requests (at most SERVER_GRACEFUL_TIMEOUT
+                    seconds, then they are killed) and exit. The preloaded
+                    code is kept, restart the master to deploy new code.
+    SIGTERM/SIGINT  graceful stop: workers finish their requests (at most
+                    SERVER_GRACEFUL_TIMEOUT seconds) and exit.
+
+A worker exits on its own after SERVER_MAX_REQUESTS requests (plus a
+random 0..SERVER_MAX_REQUESTS_JITTER so they don't all go at once), which
+bounds the memory a worker can grow to, and the master replaces it.
+
+Per-process state is per worker: the entity cache ('lru' backend), the
+in-memory login throttling buckets (set LOGIN_RATE_CLIENT to share them),
+the password hashing and image pools and the job threads (JOB_WORKERS per
+worker, or 0 and worker.py).
+
+Config keys (serve.py options override them):
+
+    SERVER_BIND                 host:port to listen on (default 127.0.0.1:5000)
+    SERVER_WORKERS              worker processes (default: CPU count)
+    SERVER_THREADS              threads per worker (default 8)
+    SERVER_MAX_REQUESTS         requests before a worker is replaced (0 = never)
+    SERVER_MAX_REQUESTS_JITTER  random extra requests per worker
+    SERVER_PRELOAD              create the app in the master (default) or in
+                                each worker after the fork
+    SERVER_KEEPALIVE            seconds an idle keep-alive connection holds a thread
+    SERVER_GRACEFUL_TIMEOUT     seconds workers get to finish on stop and reload
+"""
+import errno
+import gc
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# Exit status of a worker that could not create the app: the master stops
+# instead of forking it again and again
+WORKER_BOOT_ERROR = 3
+
+
+def parse_bind(bind):
+    """(host, port) of a 'host:port' or ':port' address"""
+    host, sep, port = bind.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid bind address {bind!r}, expected host:port")
+    return host.strip('[]') or '0.0.0.0', int(port)
+
+
+def preload(app):
+    """Do the lazy per-process setup work of `app` now, before forking"""
+    from sqlalchemy.orm import configure_mappers
+
+    configure_mappers()
+    app.url_map.update()
+    with app.test_request_context():
+        app.extensions['restx_api'].__schema__
+    # Connections must not be shared with the workers
+    _dispose_engines(app)
+    gc.collect()
+    gc.freeze()
+
+
+def _dispose_engines(app, close=True):
+    from app import db
+    with app.app_context():
+        for engine in [*db.engines.values(), *app.extensions['replicas'].values()]:
+            engine.dispose(close=close)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def handle_one_request(self):
+        # Left over from the previous request when reading this one times out
+        self.raw_requestline = b''
+        super().handle_one_request()
+        if self.raw_requestline:
+            self.server.request_done()
+        if self.server.draining:
+            self.close_connection = True
+
+    def log_request(self, code='-', size='-'):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections closing after SERVER_KEEPALIVE
+        if not format.startswith('Request timed out'):
+            super().log_error(format, *args)
+
+
+class WorkerServer(BaseWSGIServer):
+    """
+    WSGI server of one worker: accepts from the inherited socket `fd` and
+    runs connections in a pool of `threads` threads. It accepts only while a
+    thread is free, so waiting connections stay in the listen queue where
+    an idle worker can take them. Stops accepting after
+    `max_requests` requests (0 = never) or stop(), then drains the pool.
+    """
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, app, fd, threads=8, max_requests=0, keepalive=5, access_log=False):
+        handler = type('RequestHandler', (_RequestHandler,), {'timeout': keepalive})
+        super().__init__('0.0.0.0', 0, app, handler=handler, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._slots = threading.BoundedSemaphore(threads)
+        self.max_requests = max_requests
+        self.access_log = access_log
+        self.requests = 0
+        self.draining = False
+        self._lock = threading.Lock()
+
+    def verify_request(self, request, client_address):
+        self._slots.acquire()
+        return True
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def request_done(self):
+        with self._lock:
+            self.requests += 1
+            if self.max_requests and self.requests == self.max_requests:
+                logger.info("Worker %s served %s requests, recycling", os.getpid(),
+                            self.requests)
+                self.stop()
+
+    def stop(self):
+        """Stop accepting; serve() returns once the requests in flight are done"""
+        if not self.draining:
+            self.draining = True
+            # shutdown() waits for the accept loop, which may be this thread's caller
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def serve(self):
+        try:
+            self.serve_forever()
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+class PreforkServer:
+    """Master process, see the module docstring"""
+
+    def __init__(self, app_factory, bind='127.0.0.1:5000', workers=1, threads=8,
+                 max_requests=0, max_requests_jitter=0, preload=True, keepalive=5,
+                 graceful_timeout=30, access_log=False):
+        if workers < 1 or threads < 1:
+            raise ValueError("workers and threads must be at least 1")
+        self.app_factory = app_factory
+        self.bind = bind
+        self.workers = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.preload = preload
+        self.keepalive = keepalive
+        self.graceful_timeout = graceful_timeout
+        self.access_log = access_log
+        self.app = None
+        self.socket = None
+        self.children = {}      # pid -> generation, None once retired
+        self.retiring = {}      # pid -> deadline to exit before being killed
+        self.generation = 0
+        self._signals = []
+
+    @classmethod
+    def from_config(cls, app_factory, config, **overrides):
+        """Server set up from the SERVER_* attributes of a config class"""
+        options = {
+            'bind': getattr(config, 'SERVER_BIND', '127.0.0.1:5000'),
+            'workers': getattr(config, 'SERVER_WORKERS', os.cpu_count() or 1),
+            'threads': getattr(config, 'SERVER_THREADS', 8),
+            'max_requests': getattr(config, 'SERVER_MAX_REQUESTS', 0),
+            'max_requests_jitter': getattr(config, 'SERVER_MAX_REQUESTS_JITTER', 0),
+            'preload': getattr(config, 'SERVER_PRELOAD', True),
+            'keepalive': getattr(config, 'SERVER_KEEPALIVE', 5),
+            'graceful_timeout': getattr(config, 'SERVER_GRACEFUL_TIMEOUT', 30),
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(app_factory, **options)
+
+    # ---------- Master ---------- #
+
+    def run(self):
+        """Serve until SIGTERM or SIGINT; return the exit status"""
+        started = time.monotonic()
+        if self.preload:
+            self.app = self.app_factory()
+            preload(self.app)
+            logger.info("Preloaded the app in %.2fs", time.monotonic() - started)
+
+        host, port = parse_bind(self.bind)
+        self.socket = socket.create_server((host, port), backlog=2048)
+        self.socket.set_inheritable(True)
+        host, port = self.socket.getsockname()[:2]
+        logger.info("Listening at http://%s:%s (%s workers x %s threads, master %s)",
+                    host, port, self.workers, self.threads, os.getpid())
+
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, lambda signum, frame: self._signals.append(signum))
+        try:
+            return self._loop(wakeup_read)
+        finally:
+            signal.set_wakeup_fd(-1)
+            os.close(wakeup_read)
+            os.close(wakeup_write)
+            self.socket.close()
+
+    def _loop(self, wakeup_read):
+        while True:
+            if self._reap():
+                self._stop_workers(signal.SIGTERM)
+                return 1
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("Stopping")
+                    self._stop_workers(signal.SIGTERM)
+                    return 0
+                if signum == signal.SIGHUP:
+                    logger.info("Reloading workers")
+                    self.generation += 1
+            self._spawn_missing()
+            self._retire_old()
+            self._kill_overdue()
+            try:
+                select.select([wakeup_read], [], [], 1.0)
+                while os.read(wakeup_read, 4096):
+                    pass
+            except (BlockingIOError, InterruptedError):
+                pass
+
+    def _reap(self):
+        """Forget exited workers; True when one failed to boot"""
+        boot_error = False
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return boot_error
+            if not pid:
+                return boot_error
+            self.retiring.pop(pid, None)
+            if self.children.pop(pid, None) is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == WORKER_BOOT_ERROR:
+                logger.error("Worker %s failed to boot", pid)
+                boot_error = True
+            elif code:
+                logger.warning("Worker %s exited with status %s", pid, code)
+
+    def _spawn_missing(self):
+        current = sum(1 for generation in self.children.values()
+                      if generation == self.generation)
+        for _ in range(self.workers - current):
+            pid = os.fork()
+            if pid == 0:
+                os._exit(self._worker())
+            self.children[pid] = self.generation
+            logger.info("Booted worker %s", pid)
+
+    def _retire_old(self):
+        for pid, generation in list(self.children.items()):
+            if generation is not None and generation != self.generation:
+                self._kill(pid, signal.SIGTERM)
+                # Counted as retired from now on
+                self.children[pid] = None
+                self.retiring[pid] = time.monotonic() + self.graceful_timeout
+
+    def _kill_overdue(self):
+        """Kill retired workers still running after their deadline; _reap waits for them"""
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now >= deadline:
+                logger.warning("Worker %s did not stop within %ss, killing", pid,
+                               self.graceful_timeout)
+                self._kill(pid, signal.SIGKILL)
+                del self.retiring[pid]
+
+    def _stop_workers(self, signum):
+        for pid in self.children:
+            self._kill(pid, signum)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in self.children:
+            self._kill(pid, signal.SIGKILL)
+        while self.children:
+            pid, _ = os.waitpid(-1, 0)
+            self.children.pop(pid, None)
+        self.retiring.clear()
+
+    @staticmethod
+    def _kill(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    # ---------- Worker ---------- #
+
+    def _worker(self):
+        """Body of a forked worker; return its exit status"""
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        # Ctrl-C reaches the whole process group, the master decides
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        random.seed()
+        try:
+            if self.app is None:
+                self.app = self.app_factory()
+            else:
+                _dispose_engines(self.app, close=False)
+            max_requests = self.max_requests
+            if max_requests and self.max_requests_jitter:
+                max_requests += random.randint(0, self.max_requests_jitter)
+            server = WorkerServer(self.app, self.socket.fileno(), self.threads,
+                                  max_requests, self.keepalive, self.access_log)
+        except Exception:
+            logger.exception("Worker %s failed to boot", os.getpid())
+            return WORKER_BOOT_ERROR
+        logger.info("Worker %s ready", os.getpid())
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        try:
+            server.serve()
+        except Exception:
+            logger.exception("Worker %s failed", os.getpid())
+            return 1
+        return 0
@@ -0,0 +1,119 @@
+"""Async counterparts of the facade's hot read paths, for the ASGI mode.
+
+AsyncFacade runs the statements the repositories build for HBnBFacade
+(same models, same filters, same soft-delete rules) on an AsyncEngine, so
+a request waiting on the database holds no thread. Needs an async driver:
+aiosqlite for SQLite, asyncpg for PostgreSQL.
+
+    async_facade.init_app(app)      # see app.asgi
+    places, cursor = await async_facade.get_places_page(limit=20)
+
+Reads go to the primary database and bypass the entity cache; writes stay
+with HBnBFacade.
+"""
+from sqlalchemy.engine import make_url
+
+from app.models.place import Place
+from app.models.amenity import Amenity
+from app.models.review import Review
+from app.persistence import geo
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.sqlalchemy_repository import SQLAlchemyRepository
+
+# Sync driver name -> async driver for the same database
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_url(url):
+    """Async counterpart of a database URL, raise ValueError if there is none"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend} databases")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        # Each connection would get its own empty database
+        raise ValueError("An in-memory SQLite database cannot be shared with the async engine")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncFacade:
+    """Read-only facade on an async SQLAlchemy engine"""
+
+    def __init__(self):
+        self.engine = None
+        self.sessionmaker = None
+        self.place_repo = PlaceRepository()
+        self.review_repo = SQLAlchemyRepository(Review)
+        self.amenity_repo = SQLAlchemyRepository(Amenity)
+
+    def init_app(self, app):
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.persistence.sqlite import configure_engine
+
+        url = app.config.get('ASYNC_DATABASE_URL') or async_url(
+            app.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        configure_engine(self.engine.sync_engine, app.config.get('SQLITE_PROFILE', 'default'))
+        # Objects are handed to serializers after the session closes
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def _scalars(self, statement):
+        async with self.sessionmaker() as session:
+            return (await session.scalars(statement)).unique().all()
+
+    async def _row(self, statement):
+        async with self.sessionmaker() as session:
+            return (await session.execute(statement)).one_or_none()
+
+    # ---------- Place ---------- #
+
+    async def get_place(self, place_id):
+        async with self.sessionmaker() as session:
+            return await session.get(Place, place_id)
+
+    async def get_place_detail(self, place_id):
+        places = await self._scalars(self.place_repo.detail_statement(place_id))
+        return places[0] if places else None
+
+    async def get_place_detail_version(self, place_id):
+        row = await self._row(self.place_repo.detail_version_statement(place_id))
+        return tuple(row) if row is not None else None
+
+    async def get_places_version(self):
+        async with self.sessionmaker() as session:
+            version = ()
+            for repo in (self.place_repo, self.amenity_repo, self.review_repo):
+                version += tuple((await session.execute(repo.version_statement())).one())
+            return version
+
+    async def get_places_page(self, filters=None, after=None, limit=20, sort='created'):
+        places = await self._scalars(self.place_repo.page_statement(filters, after, limit, sort))
+        return self.place_repo.paginate(places, limit, sort)
+
+    async def get_places_nearby(self, latitude=None, longitude=None, radius_km=None,
+                                bbox=None, filters=None, after=None, limit=20):
+        latitude, longitude = geo.search_center(latitude, longitude, radius_km, bbox)
+        repo = self.place_repo
+        statement, bbox = repo.nearby_statement(latitude, longitude, radius_km, bbox, filters)
+        async with self.sessionmaker() as session:
+            rows = (await session.execute(statement)).all()
+            results, next_cursor = repo.rank_nearby(rows, latitude, longitude, radius_km, bbox,
+                                                    after, limit)
+            places = {place.id: place for place in (await session.scalars(
+                repo.by_ids_statement([row.id for row, _ in results]))).all()}
+        return [(places[row.id], distance) for row, distance in results], next_cursor
+
+    async def count_places(self, filters=None):
+        row = await self._row(self.place_repo.count_statement(filters))
+        return row[0]
+
+
+async_facade = AsyncFacade()
@@ -1,4 +1,14 @@
-from app.persistence.sqlalchemy_repository import SQLAlchemyRepository
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import jobs
+from app.persistence.sqlalchemy_repository import SQLAlchemyRepository, transaction
+from app.persistence.cached_repository import CachedRepository
+from app.persistence.cache import LRUCache
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.review_repository import ReviewRepository
+from app.persistence import geo, replicas
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
@@ -13,10 +23,42 @@ class HBnBFacade:
         users, places, reviews, and amenities.
         """
 
-        self.user_repo = SQLAlchemyRepository(User)
-        self.place_repo = SQLAlchemyRepository(Place)
-        self.review_repo = SQLAlchemyRepository(Review)
-        self.amenity_repo = SQLAlchemyRepository(Amenity)
+        self.cache = LRUCache()
+        # Password hashes stay out of the cache, which may be shared
+        self.user_repo = CachedRepository(SQLAlchemyRepository(User), self.cache,
+                                          attributes=('email',), exclude=('password',))
+        self.place_repo = CachedRepository(PlaceRepository(), self.cache)
+        self.review_repo = CachedRepository(ReviewRepository(), self.cache)
+        self.amenity_repo = CachedRepository(SQLAlchemyRepository(Amenity), self.cache,
+                                             attributes=('name',))
+
+    def configure_cache(self, cache):
+        """Switch every repository to another cache backend"""
+        self.cache = cache
+        for repo in (self.user_repo, self.place_repo, self.review_repo, self.amenity_repo):
+            repo.cache = cache
+
+    def get_cache_stats(self):
+        """Hit/miss/eviction counters of the entity cache"""
+        return self.cache.stats()
+
+    def get_query_counts(self):
+        """Statements executed per database bind ('primary', 'replica0', ...)"""
+        return replicas.query_counts()
+
+    def transaction(self):
+        """
+        Group several facade calls into a single commit.
+
+            with facade.transaction():
+                place = facade.create_place(data)
+                facade.create_review(review_data)
+
+        Each write is flushed, so later calls in the block see it, and
+        everything is committed when the block exits or rolled back if it
+        raises.
+        """
+        return transaction()
 
     # ---------- User ---------- #
 
@@ -31,22 +73,124 @@ class HBnBFacade:
     def get_user_by_email(self, email):
         return self.user_repo.get_by_attribute('email', email)
 
+    def authenticate(self, email, password, limiter=None):
+        """
+        Return the user if the password matches, else None.
+
+        Hashes made with an older cost factor are upgraded on the way.
+        Outcomes are reported to `limiter` (a LoginLimiter), and a pair it
+        already saw fail is rejected without running bcrypt again.
+        """
+        user = self.user_repo.get_by_attribute('email', email)
+        if not user:
+            if limiter:
+                limiter.failed(email, password)
+            return None
+        if limiter and limiter.known_failure(email, password, user.password):
+            limiter.failed(email, password)
+            return None
+        if not user.verify_password(password):
+            if limiter:
+                limiter.failed(email, password, user.password)
+            return None
+        if limiter:
+            limiter.succeeded(email)
+        if user.password_needs_rehash():
+            user.hash_password(password)
+            self.user_repo.update(user.id, {'password': user.password})
+        return user
+
     def get_all_users(self):
         """Retrieve all users."""
         return self.user_repo.get_all()
 
+    def iter_users(self, attributes=None, batch_size=1000):
+        """Stream every user as a read-only row, batch_size at a time"""
+        return self.user_repo.iter_rows(attributes, batch_size)
+
+    def get_users_version(self):
+        """Cheap probe that changes whenever the user list does."""
+        return self.user_repo.get_version()
+
     def update_user(self, user_id, data):
         """Update a user’s information."""
         user = self.user_repo.get(user_id)
         if not user:
             return None
 
+        data = dict(data)
+        # Only bumped here, never set by callers
+        data.pop('token_version', None)
+        password = data.pop('password', None)
+        if password:
+            # Stored hashed, like at signup; may raise HasherBusy
+            user.hash_password(password)
+        if 'is_admin' in data and bool(data['is_admin']) != bool(user.is_admin):
+            # Tokens carry is_admin: issued ones must not keep the old role
+            data['token_version'] = User.token_version + 1
+
         try:
             updated_user = self.user_repo.update(user_id, data)
             return updated_user
         except ValueError as e:
             raise e
 
+    def get_token_version(self, user_id):
+        """
+        Current token version of a user, None if there is no such user.
+
+        Read past the entity cache: other workers' caches may still hold
+        the version a revocation replaced.
+        """
+        return self.user_repo.get_value(user_id, 'token_version')
+
+    def revoke_tokens(self, user_id):
+        """Invalidate every access token issued to a user so far."""
+        return self.user_repo.update(user_id, {'token_version': User.token_version + 1})
+
+    def delete_user(self, user_id, purge=False):
+        """
+        Delete a user with their places and reviews.
+
+        The user, their places and their reviews are soft-deleted at once,
+        in one transaction of set-based UPDATEs: hidden from every read,
+        tokens revoked, email free for a new account, rating aggregates of
+        the places they reviewed recomputed. The rows are purged by a
+        background job (purge_user), or before returning with purge=True.
+        """
+        user = self.user_repo.get(user_id)
+        if not user:
+            return None
+        with self.transaction():
+            self.user_repo.update(user_id, {
+                'deleted_at': datetime.utcnow(),
+                'email': f"{user_id}@deleted.invalid",
+                'token_version': User.token_version + 1,
+            })
+            self.place_repo.soft_delete_where(Place.owner_id == user_id)
+            reviewed = select(Review.place_id).where(Review.user_id == user_id)
+            self.review_repo.soft_delete_where(Review.user_id == user_id)
+            self.place_repo.recompute_rating_stats(Place.id.in_(reviewed))
+            if not purge:
+                jobs.enqueue('purge_user', key=f'purge-user:{user_id}', user_id=user_id)
+        if purge:
+            self.purge_user(user_id)
+        return user
+
+    def purge_user(self, user_id, batch_size=1000):
+        """
+        Remove a soft-deleted user with their places (and everything
+        purge_place removes with them) and their reviews, in committed
+        batches; return the counts per table. Users that are not
+        soft-deleted are left alone.
+        """
+        if self.user_repo.get_deleted(user_id) is None:
+            return {'users': 0, 'places': 0, 'reviews': 0, 'amenity_links': 0}
+        counts = self.place_repo.purge(Place.owner_id == user_id, batch_size=batch_size)
+        counts['reviews'] += self.review_repo.delete_by_user(user_id, batch_size)
+        counts['users'] = self.user_repo.delete_where(User.id == user_id)
+        return counts
+
     # ---------- Amenity ---------- #
 
     def create_amenity(self, amenity_data):
@@ -57,9 +201,26 @@ class HBnBFacade:
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
+    def get_amenities(self, amenity_ids):
+        """
+        Load amenities by id with a single query.
+
+        Raises ValueError naming every unknown id.
+        """
+        amenities = self.amenity_repo.get_many(amenity_ids)
+        found = {amenity.id for amenity in amenities}
+        unknown = [a_id for a_id in dict.fromkeys(amenity_ids) if a_id not in found]
+        if unknown:
+            raise ValueError(f"Unknown amenity ids: {', '.join(unknown)}")
+        return amenities
+
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_version(self):
+        """Cheap probe that changes whenever the amenity list does."""
+        return self.amenity_repo.get_version()
+
     def get_amenity_by_name(self, name: str):
         if hasattr(self.amenity_repo, "get_by_attribute"):
             return self.amenity_repo.get_by_attribute("name", name)
@@ -85,43 +246,166 @@ class HBnBFacade:
         if not owner:
             raise ValueError("Owner is not found")
 
-        amenity_ids = place_data.pop('amenities', [])
+        amenities = self.get_amenities(place_data.pop('amenities', []))
 
         place = Place(**place_data)
-
-        for a_id in amenity_ids:
-            amenity = self.amenity_repo.get(a_id)
-            if amenity:
-                place.amenities.append(amenity)
+        place.amenities = amenities
 
         self.place_repo.add(place)
         return place
 
+    def create_places_bulk(self, places_data):
+        """
+        Validate and insert many places in a single transaction.
+
+        Owners and amenities are resolved with one query each. If any row
+        is invalid, a ValueError listing every failing row is raised and
+        nothing is written.
+        """
+        owner_ids = {data.get('owner_id') for data in places_data} - {None}
+        owners = {owner.id for owner in self.user_repo.get_many(owner_ids)}
+        amenity_ids = {a_id for data in places_data for a_id in data.get('amenities', [])}
+        amenities = {a.id: a for a in self.amenity_repo.get_many(amenity_ids)}
+
+        places, errors = [], []
+        for index, data in enumerate(places_data):
+            data = dict(data)
+            place_amenities = data.pop('amenities', [])
+            try:
+                if data.get('owner_id') not in owners:
+                    raise ValueError("Owner is not found")
+                unknown = [a_id for a_id in place_amenities if a_id not in amenities]
+                if unknown:
+                    raise ValueError(f"Unknown amenity ids: {', '.join(unknown)}")
+                place = Place(**data)
+            except (ValueError, TypeError) as e:
+                errors.append(f"place {index}: {e}")
+                continue
+            places.append((place, place_amenities))
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        for place, place_amenities in places:
+            place.amenities = [amenities[a_id] for a_id in dict.fromkeys(place_amenities)]
+        places = [place for place, _ in places]
+        self.place_repo.add_many(places)
+        return places
+
     def get_place(self, place_id):
         return self.place_repo.get(place_id)
 
+    def get_place_detail(self, place_id):
+        """Return a place with owner, amenities and reviewers preloaded."""
+        return self.place_repo.get_detail(place_id)
+
+    def get_place_detail_version(self, place_id):
+        """Cheap probe that changes whenever get_place_detail's result does, None if unknown."""
+        return self.place_repo.get_detail_version(place_id)
+
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def get_places_version(self):
+        """
+        Cheap probe that changes whenever any listed place does, amenity
+        names and rating aggregates included.
+        """
+        return (self.place_repo.get_version() + self.amenity_repo.get_version()
+                + self.review_repo.get_version())
+
+    def get_places_page(self, filters=None, after=None, limit=20, sort='created'):
+        """Return (places, next_cursor) for one keyset page of places."""
+        return self.place_repo.get_page(filters, after=after, limit=limit, sort=sort)
+
+    def get_places_nearby(self, latitude=None, longitude=None, radius_km=None,
+                          bbox=None, filters=None, after=None, limit=20):
+        """
+        Return ([(place, distance_km)], next_cursor) sorted by distance.
+
+        Searches a radius around (latitude, longitude), or a bbox whose
+        distances are measured from its centre when no point is given.
+        """
+        latitude, longitude = geo.search_center(latitude, longitude, radius_km, bbox)
+        return self.place_repo.get_nearby(latitude, longitude, radius_km, bbox,
+                                          filters, after=after, limit=limit)
+
+    def count_places(self, filters=None):
+        return self.place_repo.count(filters)
+
+    def search_places(self, query, after=None, limit=20):
+        """Return (places, next_cursor) for one page of full-text matches, best first."""
+        return self.place_repo.search(query, after=after, limit=limit)
+
+    def count_search_places(self, query):
+        return self.place_repo.count_search(query)
+
     def update_place(self, place_id, place_data):
         place = self.place_repo.get(place_id)
         if not place:
             return None
 
-        for key, value in place_data.items():
-            if key == 'amenities':
-                new_amenities = []
-                for amenity_id in value:
-                    amenity = self.amenity_repo.get(amenity_id)
-                    if amenity:
-                        new_amenities.append(amenity)
-                place.amenities = new_amenities
-            elif hasattr(place, key):
-                setattr(place, key, value)
-
-        self.place_repo.update(place_id, place_data)
+        place_data = dict(place_data)
+        if 'amenities' in place_data:
+            place.amenities = self.get_amenities(place_data.pop('amenities'))
+            # A link change alone issues no UPDATE: touch the place so its
+            # updated_at (and HTTP validators) reflect it
+            place.updated_at = datetime.utcnow()
+
+        self.place_repo.update(place_id, {key: value for key, value in place_data.items()
+                                          if hasattr(place, key)})
+        return place
+
+    def add_place_photo(self, place_id, photo_id):
+        """Append an ingested photo to a place; None if the place is unknown."""
+        place = self.place_repo.get(place_id)
+        if not place:
+            return None
+        photos = list(place.photos or [])
+        if photo_id not in photos:
+            # A new list: the JSON column does not track in-place changes
+            self.place_repo.update(place_id, {'photos': photos + [photo_id]})
+        return place
+
+    def remove_place_photo(self, place_id, photo_id):
+        """
+        Detach a photo from a place. Its files stay: other places may use
+        the same photo. Returns False when the place does not hold it.
+        """
+        place = self.place_repo.get(place_id)
+        photos = list(place.photos or []) if place else []
+        if photo_id not in photos:
+            return False
+        photos.remove(photo_id)
+        self.place_repo.update(place_id, {'photos': photos})
+        return True
+
+    def delete_place(self, place_id, purge=False):
+        """
+        Delete a place. It is soft-deleted at once, hidden from every read
+        and search; the row, its reviews and amenity links are purged by a
+        background job (purge_place), or before returning with purge=True.
+        Either way the cost does not depend on how many reviews it has.
+        """
+        place = self.place_repo.get(place_id)
+        if not place:
+            return None
+        with self.transaction():
+            self.place_repo.update(place_id, {'deleted_at': datetime.utcnow()})
+            if not purge:
+                jobs.enqueue('purge_place', key=f'purge-place:{place_id}', place_id=place_id)
+        if purge:
+            self.purge_place(place_id)
         return place
 
+    def purge_place(self, place_id, batch_size=1000):
+        """
+        Remove a soft-deleted place with its reviews and amenity links, in
+        committed batches; return the counts per table. Places that are not
+        soft-deleted are left alone.
+        """
+        return self.place_repo.purge(Place.id == place_id, Place.deleted_at.is_not(None),
+                                     batch_size=batch_size)
+
     # ---------- Reviews ---------- #
 
     def create_review(self, review_data):
@@ -140,44 +424,116 @@ class HBnBFacade:
             place=place
             
         )
+        # Flushed together with the review by the repository commit
+        place.update_rating_stats(added=[review.rating])
         self.review_repo.add(review)
         return review
 
+    def create_reviews_bulk(self, reviews_data):
+        """
+        Validate and insert many reviews in a single transaction.
+
+        Rating aggregates are updated once per place. If any row is invalid,
+        a ValueError listing every failing row is raised and nothing is written.
+        """
+        user_ids = {data.get('user_id') for data in reviews_data} - {None}
+        users = {user.id: user for user in self.user_repo.get_many(user_ids)}
+        place_ids = {data.get('place_id') for data in reviews_data} - {None}
+        places = {place.id: place for place in self.place_repo.get_many(place_ids)}
+
+        # Validate everything first: building a Review attaches it to the session
+        errors = []
+        for index, data in enumerate(reviews_data):
+            try:
+                if not users.get(data.get('user_id')):
+                    raise ValueError("User not found")
+                if not places.get(data.get('place_id')):
+                    raise ValueError("Place not found")
+                Review.validate(data.get('text'), data.get('rating'))
+            except (ValueError, TypeError) as e:
+                errors.append(f"review {index}: {e}")
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        reviews = []
+        ratings = {}
+        for data in reviews_data:
+            place = places[data['place_id']]
+            review = Review(
+                text=data['text'],
+                rating=data['rating'],
+                user=users[data['user_id']],
+                place=place
+            )
+            reviews.append(review)
+            ratings.setdefault(place.id, []).append(review.rating)
+
+        for place_id, place_ratings in ratings.items():
+            places[place_id].update_rating_stats(added=place_ratings)
+        self.review_repo.add_many(reviews)
+        return reviews
+
     def get_review(self, review_id):
         return self.review_repo.get(review_id)
 
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
-    def get_reviews_by_place(self, place_id):
+    def iter_reviews(self, attributes=None, batch_size=1000):
+        """Stream every review as a read-only row, batch_size at a time"""
+        return self.review_repo.iter_rows(attributes, batch_size)
+
+    def get_reviews_version(self):
+        """Cheap probe that changes whenever the review list does."""
+        return self.review_repo.get_version()
+
+    def get_reviews_by_place(self, place_id, order='desc', limit=None, offset=0):
         place = self.place_repo.get(place_id)
         if not place:
             raise ValueError("Place not found")
-        reviews = []
-        for r in self.review_repo.get_all():
-            if r.place.id == place_id:
-                reviews.append(r)
-        return reviews
+        return self.review_repo.get_by_place(place_id, order=order,
+                                             limit=limit, offset=offset)
+
+    def get_place_reviews_version(self, place_id):
+        """Cheap probe that changes whenever a place's reviews or their authors do."""
+        if not self.place_repo.get(place_id):
+            raise ValueError("Place not found")
+        return self.review_repo.get_place_version(place_id)
+
+    def count_reviews_by_place(self, place_id):
+        return self.review_repo.count_by_place(place_id)
 
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
         if not review:
             return None
 
+        changes = {}
         if 'text' in review_data:
-            review.text = review_data['text']
+            changes['text'] = review_data['text']
         if 'rating' in review_data:
             rating = review_data['rating']
             if not (1 <= rating <= 5):
                 raise ValueError("Rating must be between 1 and 5")
-            review.rating = rating
+            # A review of a deleted place has no aggregates left to maintain
+            if rating != review.rating and review.place is not None:
+                review.place.update_rating_stats(added=[rating], removed=[review.rating])
+            changes['rating'] = rating
+
+        return self.review_repo.update(review_id, changes)
 
     def delete_review(self, review_id):
         review = self.review_repo.get(review_id)
         if not review:
             return None
+        if review.place is not None:
+            review.place.update_rating_stats(removed=[review.rating])
         self.review_repo.delete(review_id)
         return review
 
+    def recompute_rating_stats(self):
+        """Rebuild every place's rating aggregates from the reviews table."""
+        return self.place_repo.recompute_rating_stats()
+
 
 facade = HBnBFacade()
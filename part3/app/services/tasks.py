@@ -0,0 +1,21 @@
+"""Background tasks, run by the app.jobs workers.
+
+Each one may run more than once for the same job: keep them idempotent.
+"""
+from app import images, jobs
+from app.services.facade import facade
+
+
+@jobs.task('purge_place')
+def purge_place(place_id):
+    facade.purge_place(place_id)
+
+
+@jobs.task('purge_user')
+def purge_user(user_id):
+    facade.purge_user(user_id)
+
+
+@jobs.task('render_photo')
+def render_photo(photo_id):
+    images.render(photo_id)
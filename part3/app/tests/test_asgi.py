@@ -0,0 +1,126 @@
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from urllib.parse import urlsplit
+from app import create_app, db
+from app.asgi import ASGIApp
+from app.config import TestingConfig
+from app.services import facade
+from app.services.async_facade import async_facade
+
+
+async def call(application, method, url, headers=(), body=b''):
+    """Send one request through an ASGI app; return (status, headers, body)"""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': parts.path, 'query_string': parts.query.encode(), 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    return (sent[0]['status'],
+            {name.decode(): value.decode() for name, value in sent[0]['headers']},
+            b''.join(message.get('body', b'') for message in sent[1:]))
+
+
+@unittest.skipUnless(importlib.util.find_spec('aiosqlite'), "aiosqlite is not installed")
+class TestASGI(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{self.path}"
+            ASGI_THREADS = 4
+
+        self.app = create_app(FileConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        async_facade.init_app(self.app)
+        self.asgi = ASGIApp(self.app)
+
+        owner = facade.create_user({"first_name": "Owner", "last_name": "Doe",
+                                    "email": "owner@example.com", "password": "secret"})
+        self.amenity_id = facade.create_amenity({"name": "Wifi"}).id
+        self.place_ids = [place.id for place in facade.create_places_bulk([
+            {"title": f"Loft {index}", "price": 50.0 + index, "latitude": 45.0 + index / 100,
+             "longitude": 5.0, "owner_id": owner.id,
+             "amenities": [self.amenity_id] if index % 2 else []}
+            for index in range(5)
+        ])]
+        facade.create_review({"user_id": owner.id, "place_id": self.place_ids[0],
+                              "rating": 4, "text": "Nice"})
+        db.session.remove()
+
+    def tearDown(self):
+        asyncio.run(async_facade.dispose())
+        self.asgi.executor.shutdown()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        os.remove(self.path)
+
+    def request(self, method, url, headers=(), body=b''):
+        return asyncio.run(call(self.asgi, method, url, headers, body))
+
+    def assertSameResponse(self, url, headers=()):
+        status, asgi_headers, body = self.request('GET', url, headers)
+        expected = self.client.get(url, headers=dict(headers))
+        self.assertEqual(status, expected.status_code, url)
+        self.assertEqual(body, expected.data, url)
+        for name in ('etag', 'x-next-cursor', 'x-total-count', 'content-type'):
+            self.assertEqual(asgi_headers.get(name), expected.headers.get(name), (url, name))
+        return status, asgi_headers
+
+    def test_async_routes_match_sync_ones(self):
+        _, headers = self.assertSameResponse('/api/v1/places/?limit=2')
+        self.assertSameResponse(f"/api/v1/places/?limit=2&after={headers['x-next-cursor']}")
+        self.assertSameResponse(f'/api/v1/places/?amenities={self.amenity_id}&sort=rating')
+        self.assertSameResponse('/api/v1/places/?lat=45&lon=5&radius_km=3&fields=id,distance_km')
+        self.assertSameResponse('/api/v1/places/?fields=nope')
+        self.assertSameResponse('/api/v1/places/?min_price=1000')
+        self.assertSameResponse(f'/api/v1/places/{self.place_ids[0]}')
+        self.assertSameResponse(f'/api/v1/places/{self.place_ids[0]}?fields=id,title')
+        self.assertSameResponse('/api/v1/places/unknown')
+
+    def test_conditional_get(self):
+        _, headers = self.assertSameResponse(f'/api/v1/places/{self.place_ids[0]}')
+        status, _, body = self.request('GET', f'/api/v1/places/{self.place_ids[0]}',
+                                       [('If-None-Match', headers['etag'])])
+        self.assertEqual((status, body), (304, b''))
+
+    def test_other_routes_run_the_wsgi_app(self):
+        payload = json.dumps({"first_name": "Jane", "last_name": "Doe",
+                              "email": "jane@example.com", "password": "secret"}).encode()
+        status, _, body = self.request('POST', '/api/v1/users/',
+                                       [('Content-Type', 'application/json')], payload)
+        self.assertEqual(status, 201)
+        self.assertIsNotNone(facade.get_user(json.loads(body)['id']))
+        self.assertSameResponse('/api/v1/amenities/')
+        self.assertSameResponse('/api/v1/nowhere')
+
+    def test_concurrent_requests(self):
+        async def run():
+            return await asyncio.gather(*(
+                call(self.asgi, 'GET', f'/api/v1/places/{self.place_ids[index % 5]}')
+                for index in range(50)))
+        self.assertEqual({status for status, _, _ in asyncio.run(run())}, {200})
+
+
+if __name__ == '__main__':
+    unittest.main()
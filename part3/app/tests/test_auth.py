@@ -0,0 +1,197 @@
+import threading
+import unittest
+from flask import Flask
+from app import create_app, db, hasher
+from app.config import TestingConfig
+from app.hashing import HasherBusy, PasswordHasher, hash_rounds
+from app.persistence.cache import InMemorySharedClient
+from app.ratelimit import SharedRateLimitStore
+from app.services import facade
+
+
+class TestSignupAndLogin(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def signup(self):
+        return self.client.post('/api/v1/users/', json={
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+
+    def login(self, password="secret"):
+        return self.client.post('/api/v1/auth/login', json={
+            "email": "jane.doe@example.com",
+            "password": password
+        })
+
+    def test_signup_hashes_once(self):
+        self.assertEqual(self.signup().status_code, 201)
+        self.assertEqual(hasher.stats()["hash_count"], 1)
+
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access_token", response.json)
+        self.assertEqual(self.login("wrong").status_code, 401)
+
+    def test_rehash_on_login_after_cost_change(self):
+        self.signup()
+        hasher.rounds = 5
+        self.assertEqual(self.login().status_code, 200)
+        db.session.remove()
+        user = facade.get_user_by_email("jane.doe@example.com")
+        self.assertEqual(hash_rounds(user.password), 5)
+        self.assertTrue(user.verify_password("secret"))
+
+    def test_update_keeps_passwords_hashed(self):
+        user_id = self.signup().json["id"]
+        headers = {"Authorization": f"Bearer {self.login().json['access_token']}"}
+        payload = {"first_name": "Janet", "last_name": "Doe",
+                   "email": "jane.doe@example.com", "password": "secret"}
+        response = self.client.put(f'/api/v1/users/{user_id}', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        # The unchanged password is not hashed again
+        self.assertEqual(hasher.stats()["hash_count"], 1)
+        self.assertEqual(self.login().status_code, 200)
+
+        facade.create_user({"first_name": "Admin", "last_name": "Doe", "password": "admin",
+                            "email": "admin@example.com", "is_admin": True})
+        admin = self.client.post('/api/v1/auth/login', json={
+            "email": "admin@example.com", "password": "admin"}).json['access_token']
+        response = self.client.put(f'/api/v1/users/{user_id}',
+                                   json={**payload, "password": "changed"},
+                                   headers={"Authorization": f"Bearer {admin}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hash_rounds(facade.get_user(user_id).password), hasher.rounds)
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login("changed").status_code, 200)
+
+
+class ThrottledConfig(TestingConfig):
+    LOGIN_RATE_PER_IP = (4, 60)
+    LOGIN_RATE_PER_ACCOUNT = (3, 60)
+    LOGIN_LOCKOUT_THRESHOLD = 5
+
+
+class TestLoginThrottling(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(ThrottledConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        facade.create_user({"first_name": "Jane", "last_name": "Doe",
+                            "email": "jane.doe@example.com", "password": "secret"})
+        hasher.reset_stats()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self, password, email="jane.doe@example.com", ip="10.0.0.1"):
+        return self.client.post('/api/v1/auth/login',
+                                json={"email": email, "password": password},
+                                environ_base={"REMOTE_ADDR": ip})
+
+    def test_account_bucket(self):
+        for _ in range(3):
+            self.assertEqual(self.login("wrong").status_code, 401)
+        response = self.login("secret", ip="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 0)
+        # The repeated bad pair was only checked by bcrypt once
+        self.assertEqual(hasher.stats()["verify_count"], 1)
+
+    def test_ip_bucket(self):
+        for i in range(4):
+            self.assertEqual(self.login("x", email=f"user{i}@example.com").status_code, 401)
+        self.assertEqual(self.login("secret").status_code, 429)
+        self.assertEqual(self.login("secret", ip="10.0.0.2").status_code, 200)
+
+    def test_lockout(self):
+        self.app.extensions['login_limiter'].per_account = (100, 60)
+        for i in range(5):
+            self.assertEqual(self.login(f"wrong{i}", ip=f"10.0.1.{i}").status_code, 401)
+        # Even the right password is refused until the lockout ends
+        response = self.login("secret", ip="10.0.3.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 60)
+
+    def test_success_resets_failures(self):
+        self.app.extensions['login_limiter'].per_account = (100, 60)
+        for round_ in range(3):
+            for i in range(4):
+                self.login(f"wrong{i}", ip=f"10.{round_}.0.{i}")
+            self.assertEqual(self.login("secret", ip=f"10.{round_}.1.1").status_code, 200)
+
+    def test_shared_store(self):
+        client = InMemorySharedClient()
+        first, second = SharedRateLimitStore(client), SharedRateLimitStore(client)
+        self.assertEqual(first.consume("ip:a", 2, 60), 0)
+        self.assertEqual(second.consume("ip:a", 2, 60), 0)
+        self.assertGreater(first.consume("ip:a", 2, 60), 0)
+        self.assertEqual(first.increment("failures:a", 60), 1)
+        self.assertEqual(second.increment("failures:a", 60), 2)
+        second.lock("lock:a", 30)
+        self.assertGreater(first.locked_for("lock:a"), 29)
+
+
+class TestPasswordHasherPool(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.config.update(BCRYPT_LOG_ROUNDS=4, PASSWORD_HASH_WORKERS=1,
+                          PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_TIMEOUT=0.01)
+        self.hasher = PasswordHasher(app)
+
+    def tearDown(self):
+        self.hasher.shutdown()
+
+    def test_hash_and_verify_in_pool(self):
+        password_hash = self.hasher.hash("secret")
+        self.assertEqual(hash_rounds(password_hash), 4)
+        self.assertTrue(self.hasher.verify(password_hash, "secret"))
+        self.assertFalse(self.hasher.verify(password_hash, "other"))
+        stats = self.hasher.stats()
+        self.assertEqual((stats["hash_count"], stats["verify_count"]), (1, 2))
+        self.assertEqual(stats["pending"], 0)
+
+    def test_full_queue_rejects(self):
+        # Hold the only slot as a running hash would
+        self.hasher._slots.acquire()
+        try:
+            with self.assertRaises(HasherBusy):
+                self.hasher.hash("secret")
+        finally:
+            self.hasher._slots.release()
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+    def test_concurrent_requests_share_pool(self):
+        app = Flask(__name__)
+        app.config.update(BCRYPT_LOG_ROUNDS=4, PASSWORD_HASH_WORKERS=1,
+                          PASSWORD_HASH_QUEUE=8)
+        self.hasher.init_app(app)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.hasher.hash("pw")))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.hasher.stats()["hash_count"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
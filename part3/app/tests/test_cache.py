@@ -0,0 +1,163 @@
+import gc
+import time
+import unittest
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence import cached_repository
+from app.persistence.cache import LRUCache, SharedCache, InMemorySharedClient
+from app.services import facade
+from app.services.facade import HBnBFacade
+
+
+class TestCacheBackends(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_lru_ttl(self):
+        cache = LRUCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_shared_round_trip(self):
+        client = InMemorySharedClient()
+        writer, reader = SharedCache(client), SharedCache(client)
+        created = datetime(2024, 5, 1, 12, 30)
+        writer.set("k", {"created_at": created, "photos": ["a.jpg"]})
+        self.assertEqual(reader.get("k"), {"created_at": created, "photos": ["a.jpg"]})
+
+        # Generations are shared between workers
+        before = reader.get_generation("places")
+        writer.bump_generation("places")
+        self.assertNotEqual(reader.get_generation("places"), before)
+
+
+class TestFacadeCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({"first_name": "Jane", "last_name": "Doe",
+                                    "email": "jane@example.com", "password": "secret"})
+        wifi = facade.create_amenity({"name": "Wifi"})
+        pool = facade.create_amenity({"name": "Pool"})
+        place = facade.create_place({"title": "Loft", "price": 80.0, "latitude": 45.0,
+                                     "longitude": 4.0, "owner_id": owner.id,
+                                     "amenities": [wifi.id]})
+        self.owner_id, self.place_id = owner.id, place.id
+        self.wifi_id, self.pool_id = wifi.id, pool.id
+        db.session.remove()
+
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def fresh(self):
+        """Start a new request: empty session, no recorded statements"""
+        db.session.remove()
+        self.statements.clear()
+
+    def test_get_served_from_cache(self):
+        facade.get_user(self.owner_id)
+        self.fresh()
+        user = facade.get_user(self.owner_id)
+        self.assertEqual(user.email, "jane@example.com")
+        self.assertEqual(self.statements, [])
+        self.assertGreaterEqual(facade.get_cache_stats()["hits"], 1)
+
+    def test_attribute_lookup_and_update(self):
+        facade.get_user_by_email("jane@example.com")
+        self.fresh()
+        self.assertEqual(facade.get_user_by_email("jane@example.com").id, self.owner_id)
+        self.assertEqual(self.statements, [])
+
+        facade.update_user(self.owner_id, {"email": "jd@example.com"})
+        self.fresh()
+        self.assertIsNone(facade.get_user_by_email("jane@example.com"))
+        self.assertEqual(facade.get_user(self.owner_id).email, "jd@example.com")
+
+    def test_password_not_cached(self):
+        facade.get_user(self.owner_id)
+        repo = facade.user_repo
+        self.assertNotIn("password", repo.cache.get(repo._key('id', self.owner_id)))
+        self.fresh()
+        user = facade.authenticate("jane@example.com", "secret")
+        self.assertEqual(user.id, self.owner_id)
+        # Loaded on demand, the rest of the user came from the cache
+        self.assertEqual(len(self.statements), 1)
+
+    def test_amenities_change_invalidates_place(self):
+        facade.get_place(self.place_id)
+        self.fresh()
+        facade.update_place(self.place_id, {"amenities": [self.pool_id]})
+        self.fresh()
+        place = facade.get_place(self.place_id)
+        self.assertEqual([a.name for a in place.amenities], ["Pool"])
+
+    def test_review_updates_cached_aggregates(self):
+        facade.get_place(self.place_id)
+        self.fresh()
+        facade.create_review({"text": "Great", "rating": 4,
+                              "user_id": self.owner_id, "place_id": self.place_id})
+        self.fresh()
+        self.assertEqual(facade.get_place(self.place_id).review_count, 1)
+
+        # Set-based UPDATE bypasses the flush: the whole model is dropped
+        db.session.execute(db.update(facade.place_repo.model).values(review_count=7))
+        db.session.commit()
+        self.fresh()
+        self.assertEqual(facade.get_place(self.place_id).review_count, 7)
+
+    def test_rolled_back_changes_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            with facade.transaction():
+                facade.update_place(self.place_id, {"title": "Castle"})
+                facade.get_place(self.place_id)
+                raise RuntimeError
+        self.fresh()
+        self.assertEqual(facade.get_place(self.place_id).title, "Loft")
+
+    def test_delete_invalidates(self):
+        facade.get_place(self.place_id)
+        self.fresh()
+        facade.delete_place(self.place_id)
+        self.fresh()
+        self.assertIsNone(facade.get_place(self.place_id))
+
+    def test_repositories_share_session_listeners(self):
+        live = len(cached_repository._repositories)
+        other = HBnBFacade()
+        other.get_place(self.place_id)
+        facade.update_place(self.place_id, {"title": "Castle"})
+        self.fresh()
+        self.assertEqual(other.get_place(self.place_id).title, "Castle")
+        self.assertEqual(len(cached_repository._repositories), live + 4)
+
+        del other
+        gc.collect()
+        self.assertEqual(len(cached_repository._repositories), live)
+
+
+if __name__ == '__main__':
+    unittest.main()
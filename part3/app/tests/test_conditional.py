@@ -0,0 +1,122 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+from app.services import facade
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        wifi = facade.create_amenity({"name": "Wifi"})
+        pool = facade.create_amenity({"name": "Pool"})
+        place = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": owner.id,
+            "amenities": [wifi.id]
+        })
+        self.owner_id, self.place_id = owner.id, place.id
+        self.wifi_id, self.pool_id = wifi.id, pool.id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, headers={"If-None-Match": etag})
+
+    def test_place_detail_not_modified(self):
+        url = f'/api/v1/places/{self.place_id}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        response = self.revalidate(url, etag)
+        event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        # Only the version probe runs: no place, amenity or review is loaded
+        self.assertEqual(len(statements), 1)
+
+        response = self.client.get(
+            url, headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_place_detail_changes(self):
+        url = f'/api/v1/places/{self.place_id}'
+        etag = self.client.get(url).headers['ETag']
+
+        facade.update_place(self.place_id, {"amenities": [self.pool_id]})
+        db.session.remove()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a["name"] for a in response.json["amenities"]], ["Pool"])
+
+        etag = response.headers['ETag']
+        facade.update_user(self.owner_id, {"first_name": "Janet"})
+        db.session.remove()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["owner"]["first_name"], "Janet")
+
+    def test_collection_etags(self):
+        places = self.client.get('/api/v1/places/')
+        amenities = self.client.get('/api/v1/amenities/')
+        self.assertEqual(self.revalidate('/api/v1/amenities/',
+                                         amenities.headers['ETag']).status_code, 304)
+
+        facade.create_review({"text": "Great", "rating": 5,
+                              "user_id": self.owner_id, "place_id": self.place_id})
+        db.session.remove()
+        # Rating aggregates are part of the place list
+        response = self.revalidate('/api/v1/places/', places.headers['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]["review_count"], 1)
+        self.assertEqual(self.revalidate('/api/v1/amenities/',
+                                         amenities.headers['ETag']).status_code, 304)
+
+        facade.create_amenity({"name": "Parking"})
+        self.assertEqual(self.revalidate('/api/v1/amenities/',
+                                         amenities.headers['ETag']).status_code, 200)
+
+    def test_place_reviews(self):
+        url = f'/api/v1/places/{self.place_id}/reviews'
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response.headers['ETag']).status_code, 304)
+
+        facade.create_review({"text": "Great", "rating": 5,
+                              "user_id": self.owner_id, "place_id": self.place_id})
+        response = self.revalidate(url, response.headers['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Total-Count'], '1')
+
+        self.assertEqual(self.revalidate('/api/v1/places/unknown/reviews', '"x"').status_code,
+                         404)
+
+
+if __name__ == '__main__':
+    unittest.main()
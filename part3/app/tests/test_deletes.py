@@ -0,0 +1,121 @@
+import unittest
+from sqlalchemy import select
+from app import create_app, db, jobs
+from app.config import TestingConfig
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.models.user import User
+from app.persistence import search
+from app.services import facade
+
+
+class TestDeleteUser(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner_id = self.create_user("owner").id
+        self.guest_id = self.create_user("guest").id
+        amenity = facade.create_amenity({"name": "Wifi"})
+        self.place_ids = [place.id for place in facade.create_places_bulk([
+            {"title": f"Harbour loft {index}", "price": 80.0, "latitude": 45.0,
+             "longitude": 5.0, "owner_id": self.owner_id, "amenities": [amenity.id]}
+            for index in range(3)
+        ])]
+        self.other_place_id = facade.create_place({
+            "title": "Guest cabin", "price": 50.0, "latitude": 46.0, "longitude": 6.0,
+            "owner_id": self.guest_id}).id
+        facade.create_reviews_bulk(
+            [{"user_id": self.guest_id, "place_id": place_id, "rating": 2, "text": "Meh"}
+             for place_id in self.place_ids]
+            + [{"user_id": self.owner_id, "place_id": self.other_place_id, "rating": 5,
+                "text": "Great"}])
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_user(self, name):
+        return facade.create_user({"first_name": name.title(), "last_name": "Doe",
+                                   "email": f"{name}@example.com", "password": "secret"})
+
+    def token(self, name):
+        return self.client.post('/api/v1/auth/login', json={
+            "email": f"{name}@example.com", "password": "secret"}).json["access_token"]
+
+    def rows(self, model, *criteria):
+        return model.query.execution_options(include_deleted=True).filter(*criteria).count()
+
+    def test_soft_delete_hides_everything_at_once(self):
+        facade.get_user(self.owner_id)
+        facade.get_place(self.place_ids[0])
+        facade.delete_user(self.owner_id)
+        db.session.remove()
+
+        self.assertIsNone(facade.get_user(self.owner_id))
+        self.assertIsNone(facade.get_user_by_email("owner@example.com"))
+        self.assertIsNone(facade.get_place(self.place_ids[0]))
+        self.assertEqual(facade.count_places(), 1)
+        self.assertEqual(facade.count_search_places("harbour"), 0)
+        self.assertEqual(facade.search_places("harbour")[0], [])
+
+        other = facade.get_place(self.other_place_id)
+        self.assertEqual((other.review_count, other.rating_sum), (0, 0))
+
+        # Rows stay until purged, the email is free again
+        self.assertEqual(self.rows(Place, Place.owner_id == self.owner_id), 3)
+        self.assertEqual(self.create_user("owner").email, "owner@example.com")
+
+    def test_purged_by_job(self):
+        self.assertEqual(db.session.query(place_amenity).count(), 3)
+        facade.delete_user(self.owner_id)
+        self.assertEqual(jobs.run_pending(), 1)
+
+        self.assertEqual(self.rows(User, User.id == self.owner_id), 0)
+        self.assertEqual(self.rows(Place), 1)
+        self.assertEqual(self.rows(Review), 0)
+        self.assertEqual(db.session.query(place_amenity).count(), 0)
+        # The full-text index forgets the purged places
+        indexed = select(search.places_fts.c.rowid).where(
+            search.matches(search.parse_query("harbour")))
+        self.assertEqual(db.session.execute(indexed).all(), [])
+        self.assertEqual(facade.purge_user(self.owner_id)['users'], 0)
+
+    def test_purge_inline_in_batches(self):
+        facade.delete_user(self.owner_id, purge=True)
+        self.assertEqual(self.rows(User), 1)
+        self.assertEqual(self.rows(Place), 1)
+        self.assertEqual(self.rows(Review), 0)
+
+        facade.delete_user(self.guest_id)
+        self.assertEqual(facade.purge_user(self.guest_id, batch_size=1),
+                         {'users': 1, 'places': 1, 'reviews': 0, 'amenity_links': 0})
+
+    def test_live_user_is_not_purged(self):
+        self.assertEqual(facade.purge_user(self.owner_id)['users'], 0)
+        self.assertEqual(facade.purge_place(self.place_ids[0])['places'], 0)
+        self.assertEqual(self.rows(Place), 4)
+
+    def test_delete_endpoint(self):
+        guest = {"Authorization": f"Bearer {self.token('guest')}"}
+        owner = {"Authorization": f"Bearer {self.token('owner')}"}
+
+        response = self.client.delete(f'/api/v1/users/{self.owner_id}', headers=guest)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete(f'/api/v1/users/{self.owner_id}', headers=owner)
+        self.assertEqual(response.status_code, 204)
+
+        # Tokens are revoked with the account
+        response = self.client.get(f'/api/v1/users/{self.guest_id}', headers=owner)
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(f'/api/v1/users/{self.owner_id}', headers=guest)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
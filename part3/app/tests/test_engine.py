@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from app.config import ProductionConfig, TestingConfig, get_config
+
+
+class TestEngineConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_app(self, profile, base=TestingConfig):
+        class FileConfig(base):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, profile + '.db')}"
+            SQLITE_PROFILE = profile
+        return create_app(FileConfig)
+
+    def pragmas(self, app):
+        with app.app_context():
+            with db.engine.connect() as connection:
+                values = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                          for name in ('journal_mode', 'synchronous', 'busy_timeout')}
+            db.engine.dispose()
+        return values
+
+    def test_wal_profile(self):
+        self.assertEqual(self.pragmas(self.make_app('wal')),
+                         {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000})
+
+    def test_default_profile(self):
+        self.assertEqual(self.pragmas(self.make_app('default'))['journal_mode'], 'delete')
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            self.make_app('turbo')
+
+    def test_production_pool(self):
+        app = self.make_app('wal', base=ProductionConfig)
+        with app.app_context():
+            options = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+            self.assertEqual(db.engine.pool.size(), options['pool_size'])
+            self.assertTrue(db.engine.pool._pre_ping)
+            db.create_all()
+            self.assertEqual(db.session.execute(text("SELECT count(*) FROM places")).scalar(), 0)
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_get_config(self):
+        self.assertIs(get_config('production'), ProductionConfig)
+        with self.assertRaises(ValueError):
+            get_config('staging')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+from app import create_app, db, images, imaging
+from app.config import TestingConfig
+from app.services import facade
+
+
+def encode(size=(2000, 1000), fmt='JPEG', mode='RGB', color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+        self.legacy = tempfile.mkdtemp()
+        with open(os.path.join(self.legacy, 'old.jpg'), 'wb') as file:
+            file.write(encode((40, 30)))
+
+        class ImageConfig(TestingConfig):
+            IMAGE_STORE = self.store
+            IMAGES_FOLDER = self.legacy
+
+        self.app = create_app(ImageConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.store)
+        shutil.rmtree(self.legacy)
+
+    def open_variant(self, photo_id, variant, fmt):
+        return Image.open(images.variant_path(imaging.variant_name(photo_id, variant, fmt)))
+
+    def test_variants(self):
+        photo_id = images.ingest(encode())
+        self.assertTrue(imaging.is_photo_id(photo_id))
+        for variant, size in imaging.VARIANTS.items():
+            for fmt in imaging.FORMATS:
+                with self.subTest(variant=variant, fmt=fmt):
+                    with self.open_variant(photo_id, variant, fmt) as image:
+                        self.assertEqual(image.size, (size, size // 2))
+                        self.assertEqual(image.format, fmt.upper())
+        self.assertEqual(images.stats()['rendered'], 1)
+
+        # Same bytes, same photo, nothing rendered again
+        self.assertEqual(images.ingest(encode()), photo_id)
+        self.assertEqual(images.stats()['rendered'], 1)
+
+    def test_small_and_transparent(self):
+        photo_id = images.ingest(encode((100, 50), 'PNG', 'RGBA', (0, 0, 255, 0)))
+        with self.open_variant(photo_id, 'full', 'jpeg') as image:
+            self.assertEqual((image.size, image.mode), ((100, 50), 'RGB'))
+        with self.open_variant(photo_id, 'thumb', 'webp') as image:
+            self.assertIn('A', image.getbands())
+
+    def test_exif_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90° clockwise
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 200)).save(buffer, 'JPEG', exif=exif)
+        photo_id = images.ingest(buffer.getvalue())
+        with self.open_variant(photo_id, 'thumb', 'jpeg') as image:
+            self.assertEqual(image.size, (160, 320))
+            self.assertNotIn(0x0112, image.getexif())
+
+    def test_rejected(self):
+        for data in (b'', b'not an image', encode(fmt='GIF', mode='P', color=1)):
+            with self.assertRaises(ValueError):
+                images.ingest(data)
+        images.max_pixels = 1000
+        with self.assertRaises(ValueError):
+            images.ingest(encode((100, 100)))
+
+    def test_serving(self):
+        photo_id = images.ingest(encode())
+        url = imaging.variant_urls(photo_id)['card']['webp']
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        cache_control = response.headers['Cache-Control']
+        for directive in ('public', 'max-age=31536000', 'immutable'):
+            self.assertIn(directive, cache_control)
+        etag = response.headers['ETag']
+        body = response.data
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, body[10:20])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 10-19/{len(body)}')
+
+        # Rendered again from the original when missing
+        os.remove(images.variant_path(url.rsplit('/', 1)[1]))
+        self.assertEqual(self.client.get(url).data, body)
+
+        self.assertEqual(self.client.get(f'/images/{"0" * 32}.card.webp').status_code, 404)
+        self.assertEqual(self.client.get(f'/images/{photo_id}').status_code, 404)
+
+    def test_legacy_files(self):
+        response = self.client.get('/images/old.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(self.client.get('/images/../secret').status_code, 404)
+
+
+class TestPlacePhotos(unittest.TestCase):
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+
+        class ImageConfig(TestingConfig):
+            IMAGE_STORE = self.store
+
+        self.app = create_app(ImageConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        for name in ("owner", "other"):
+            facade.create_user({
+                "first_name": name.title(),
+                "last_name": "Doe",
+                "email": f"{name}@example.com",
+                "password": "secret"
+            })
+        self.place_id = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": facade.get_user_by_email("owner@example.com").id,
+            "photos": ["/images/old.jpg"]
+        }).id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.store)
+
+    def token(self, name):
+        response = self.client.post('/api/v1/auth/login', json={
+            "email": f"{name}@example.com", "password": "secret"})
+        return {"Authorization": f"Bearer {response.json['access_token']}"}
+
+    def upload(self, name, data):
+        return self.client.post(f'/api/v1/places/{self.place_id}/photos',
+                                data={'photo': (io.BytesIO(data), 'photo.jpg')},
+                                headers=self.token(name))
+
+    def test_upload(self):
+        response = self.upload("owner", encode())
+        self.assertEqual(response.status_code, 202)
+        photo_id = response.json['id']
+        self.assertEqual(response.json['variants']['thumb']['jpeg'],
+                         f'/images/{photo_id}.thumb.jpg')
+
+        place = facade.get_place(self.place_id).to_dict()
+        self.assertEqual(place['photos'], ['/images/old.jpg', f'/images/{photo_id}.full.jpg'])
+        self.assertEqual(place['images'][0], {'id': None, 'src': '/images/old.jpg',
+                                              'variants': {}})
+        self.assertEqual(place['images'][1], response.json)
+
+        listed = self.client.get('/api/v1/places/?fields=id,images').json[0]
+        self.assertEqual(listed['images'][1]['variants']['card']['webp'],
+                         f'/images/{photo_id}.card.webp')
+
+        response = self.client.delete(f'/api/v1/places/{self.place_id}/photos/{photo_id}',
+                                      headers=self.token("owner"))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(facade.get_place(self.place_id).photos, ['/images/old.jpg'])
+
+    def test_rejected(self):
+        self.assertEqual(self.upload("other", encode()).status_code, 403)
+        self.assertEqual(self.upload("owner", b'not an image').status_code, 400)
+        images.max_bytes = 100
+        self.assertEqual(self.upload("owner", encode()).status_code, 413)
+        self.assertEqual(facade.get_place(self.place_id).photos, ['/images/old.jpg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
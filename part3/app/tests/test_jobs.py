@@ -0,0 +1,221 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db, jobs
+from app.config import TestingConfig
+from app.jobs import UnknownTask
+from app.models.job import Job
+from app.models.review import Review
+from app.services import facade
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.calls = []
+        self.failures = 0
+
+        @jobs.task('test_record')
+        def record(value):
+            self.calls.append(value)
+
+        @jobs.task('test_flaky')
+        def flaky():
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("boom")
+            self.calls.append('flaky')
+
+    def tearDown(self):
+        for name in ('test_record', 'test_flaky'):
+            jobs.tasks.pop(name, None)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def job(self, name):
+        db.session.expire_all()
+        return Job.query.filter_by(name=name).one()
+
+    def make_due(self, name):
+        Job.query.filter_by(name=name).update({'run_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+    def test_run(self):
+        self.assertTrue(jobs.enqueue('test_record', value=1))
+        self.assertTrue(jobs.enqueue('test_record', value=2, delay=60))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [1])
+
+        stats = jobs.stats()
+        self.assertEqual(stats['succeeded'], 1)
+        self.assertEqual(stats['tasks'], {'test_record': {'succeeded': 1, 'retried': 0, 'failed': 0}})
+        self.assertEqual(stats['queue'], {'queued': 1, 'running': 0, 'done': 1, 'failed': 0})
+        self.assertEqual(stats['due'], 0)
+
+        with self.assertRaises(UnknownTask):
+            jobs.enqueue('test_missing')
+
+    def test_idempotency_key(self):
+        self.assertTrue(jobs.enqueue('test_record', key='once', value=1))
+        self.assertFalse(jobs.enqueue('test_record', key='once', value=2))
+        jobs.run_pending()
+        self.assertFalse(jobs.enqueue('test_record', key='once', value=3))
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(self.calls, [1])
+
+    def test_enqueued_with_the_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with facade.transaction():
+                jobs.enqueue('test_record', value=1)
+                raise RuntimeError
+        self.assertEqual(Job.query.count(), 0)
+
+    def test_retries_with_backoff(self):
+        self.failures = 2
+        jobs.enqueue('test_flaky', max_attempts=3)
+        self.assertEqual(jobs.run_pending(), 1)
+        job = self.job('test_flaky')
+        self.assertEqual((job.status, job.attempts, job.last_error),
+                         ('queued', 1, 'RuntimeError: boom'))
+        first_delay = (job.run_at - datetime.utcnow()).total_seconds()
+        self.assertGreater(first_delay, jobs.backoff_seconds * 0.7)
+
+        self.make_due('test_flaky')
+        jobs.run_pending()
+        job = self.job('test_flaky')
+        self.assertEqual((job.status, job.attempts), ('queued', 2))
+        self.assertGreater((job.run_at - datetime.utcnow()).total_seconds(), first_delay)
+
+        self.make_due('test_flaky')
+        jobs.run_pending()
+        job = self.job('test_flaky')
+        self.assertEqual((job.status, job.attempts, job.last_error), ('done', 3, None))
+        self.assertEqual(self.calls, ['flaky'])
+        self.assertEqual(jobs.stats()['retried'], 2)
+
+    def test_fails_after_max_attempts(self):
+        self.failures = 5
+        jobs.enqueue('test_flaky', max_attempts=1)
+        jobs.run_pending()
+        job = self.job('test_flaky')
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.stats()['failed'], 1)
+
+    def test_expired_lease_is_reclaimed(self):
+        jobs.enqueue('test_record', value=1)
+        Job.query.update({'status': 'running', 'locked_by': 'dead-worker',
+                          'locked_until': datetime.utcnow() + timedelta(seconds=60)})
+        db.session.commit()
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.query.update({'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(self.job('test_record').attempts, 1)
+
+    def test_prune(self):
+        jobs.enqueue('test_record', value=1)
+        jobs.run_pending()
+        self.assertEqual(jobs.prune(), 0)
+        Job.query.update({'finished_at': datetime.utcnow() - timedelta(days=2)})
+        db.session.commit()
+        self.assertEqual(jobs.prune(), 1)
+
+
+class TestDeletePlace(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({"first_name": "Owner", "last_name": "Doe",
+                                    "email": "owner@example.com", "password": "secret"})
+        self.place_id = facade.create_place({"title": "Loft", "price": 80.0, "latitude": 45.0,
+                                             "longitude": 5.0, "owner_id": owner.id}).id
+        authors = [facade.create_user({"first_name": "Guest", "last_name": str(index),
+                                       "email": f"guest{index}@example.com",
+                                       "password": "secret"})
+                   for index in range(5)]
+        facade.create_reviews_bulk([{"user_id": author.id, "place_id": self.place_id,
+                                     "rating": 4, "text": "Nice"} for author in authors])
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_reviews_purged_by_job(self):
+        facade.delete_place(self.place_id)
+        self.assertIsNone(facade.get_place(self.place_id))
+        self.assertEqual(Review.query.filter_by(place_id=self.place_id).count(), 5)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Review.query.filter_by(place_id=self.place_id).count(), 0)
+        self.assertEqual(facade.purge_place(self.place_id)['places'], 0)
+
+    def test_purge_in_batches(self):
+        facade.delete_place(self.place_id)
+        self.assertEqual(facade.purge_place(self.place_id, batch_size=2),
+                         {'places': 1, 'reviews': 5, 'amenity_links': 0})
+
+
+class TestWorkerThreads(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{self.path}"
+            SQLITE_PROFILE = 'wal'
+            JOB_POLL_SECONDS = 0.05
+
+        self.app = create_app(FileConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.seen = []
+        self.lock = threading.Lock()
+
+        @jobs.task('test_collect')
+        def collect(value):
+            with self.lock:
+                self.seen.append(value)
+
+    def tearDown(self):
+        jobs.stop()
+        jobs.tasks.pop('test_collect', None)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_threads_run_every_job_once(self):
+        jobs.start(3)
+        with facade.transaction():
+            for value in range(20):
+                jobs.enqueue('test_collect', value=value)
+        deadline = time.monotonic() + 20
+        while len(self.seen) < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(sorted(self.seen), list(range(20)))
+        self.assertEqual(jobs.stats()['queue']['done'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
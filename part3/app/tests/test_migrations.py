@@ -0,0 +1,199 @@
+import re
+import unittest
+from sqlalchemy import event, inspect, text
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence import migrations
+from app.persistence.geo import encode_geohash
+from app.services import facade
+
+# A table walked row by row: "SCAN places", but not "SCAN places USING INDEX ..."
+# nor a bounded subquery ("SCAN anon_1")
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def schema_layout(engine):
+    inspector = inspect(engine)
+    return {
+        table: (sorted(column['name'] for column in inspector.get_columns(table)),
+                sorted((index['name'], tuple(index['column_names']))
+                       for index in inspector.get_indexes(table)))
+        for table in inspector.get_table_names() if table != 'schema_migrations'
+    }
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        migrations.schema_migrations.drop(db.engine, checkfirst=True)
+        self.ctx.pop()
+
+    def test_upgrade(self):
+        applied = migrations.upgrade(db.engine)
+        self.assertEqual([m.name for m in applied], [m.name for m in migrations.discover()])
+        self.assertEqual(migrations.upgrade(db.engine), [])
+        self.assertTrue(all(done for _, done in migrations.status(db.engine)))
+
+    def test_legacy_database_matches_models(self):
+        # Back to the schema of databases created before the migrations existed
+        migrations.upgrade(db.engine)
+        migrations.downgrade(db.engine, '0001')
+        self.assertNotIn('token_version',
+                         [column['name'] for column in inspect(db.engine).get_columns('users')])
+        self.assertNotIn('ix_reviews_user_id',
+                         [index['name'] for index in inspect(db.engine).get_indexes('reviews')])
+        migrations.upgrade(db.engine)
+        migrated = schema_layout(db.engine)
+
+        db.drop_all()
+        db.create_all()
+        self.assertEqual(migrated, schema_layout(db.engine))
+
+    def test_backfill(self):
+        migrations.upgrade(db.engine)
+        migrations.downgrade(db.engine, '0001')
+        db.session.execute(text(
+            "INSERT INTO users (id, first_name, last_name, email, password, is_admin) "
+            "VALUES ('u1', 'Jane', 'Doe', 'jane@example.com', 'x', 0)"))
+        db.session.execute(text(
+            "INSERT INTO places (id, title, price, latitude, longitude, owner_id) "
+            "VALUES ('p1', 'Loft', 80, 45.0, 5.0, 'u1')"))
+        db.session.execute(text(
+            "INSERT INTO reviews (id, text, rating, user_id, place_id) "
+            "VALUES ('r1', 'Good', 4, 'u1', 'p1'), ('r2', 'Great', 5, 'u1', 'p1')"))
+        db.session.commit()
+
+        migrations.upgrade(db.engine)
+        place = facade.get_place('p1')
+        self.assertEqual(place.geohash, encode_geohash(45.0, 5.0))
+        self.assertEqual(place.rating_stats()['rating_avg'], 4.5)
+        self.assertEqual(place.rating_stats()['rating_histogram']['5'], 1)
+        self.assertEqual(facade.get_user('u1').token_version, 0)
+
+
+class TestQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        migrations.upgrade(db.engine)
+
+        with facade.transaction():
+            users = [facade.create_user({
+                "first_name": "User",
+                "last_name": str(i),
+                "email": f"user{i}@example.com",
+                "password": "secret"
+            }) for i in range(10)]
+            amenities = [facade.create_amenity({"name": f"Amenity {i}"}) for i in range(5)]
+        places = facade.create_places_bulk([{
+            "title": f"Place {i}",
+            "price": float(20 + i),
+            "latitude": 43.0 + i % 7,
+            "longitude": 1.0 + i % 5,
+            "owner_id": users[i % 10].id,
+            "amenities": [amenities[i % 5].id]
+        } for i in range(200)])
+        facade.create_reviews_bulk([{
+            "user_id": user.id,
+            "place_id": place.id,
+            "rating": 4,
+            "text": "Nice"
+        } for place in places[:20] for user in users[:5]])
+        self.user_ids = [user.id for user in users]
+        self.amenity_id = amenities[1].id
+        self.place_ids = [place.id for place in places]
+        self.review_id = places[0].reviews[0].id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        migrations.schema_migrations.drop(db.engine, checkfirst=True)
+        self.ctx.pop()
+
+    def full_scans(self, call):
+        """Run `call` on cold caches; return the statements it issued that scan a table"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+        db.session.remove()
+        facade.cache.clear()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            call()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        db.session.remove()
+
+        scans = []
+        tables = set(inspect(db.engine).get_table_names())
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                plan = connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                if any(match and match.group(1) in tables
+                       for match in (FULL_SCAN.match(row[-1]) for row in plan)):
+                    scans.append(statement)
+        return scans
+
+    def test_facade_queries_use_indexes(self):
+        place_id, other_place_id = self.place_ids[0], self.place_ids[1]
+        user_id = self.user_ids[0]
+        cursor = facade.get_places_page(limit=5)[1]
+        rating_cursor = facade.get_places_page(limit=5, sort='rating')[1]
+        amenity_filter = {'amenities': [self.amenity_id]}
+
+        # Whole-collection exports (get_all_*, iter_*) scan by definition
+        calls = {
+            'get_user': lambda: facade.get_user(user_id),
+            'get_user_by_email': lambda: facade.get_user_by_email('user3@example.com'),
+            'authenticate': lambda: facade.authenticate('user3@example.com', 'secret'),
+            'get_users_version': facade.get_users_version,
+            'get_amenity_by_name': lambda: facade.get_amenity_by_name('Amenity 2'),
+            'get_amenities': lambda: facade.get_amenities([self.amenity_id]),
+            'get_amenities_version': facade.get_amenities_version,
+            'get_place': lambda: facade.get_place(place_id),
+            'get_place_detail': lambda: facade.get_place_detail(place_id),
+            'get_place_detail_version': lambda: facade.get_place_detail_version(place_id),
+            'get_places_version': facade.get_places_version,
+            'get_places_page': lambda: facade.get_places_page(limit=5),
+            'get_places_page after': lambda: facade.get_places_page(after=cursor, limit=5),
+            'get_places_page rating': lambda: facade.get_places_page(
+                after=rating_cursor, limit=5, sort='rating'),
+            'get_places_page price': lambda: facade.get_places_page(
+                {'min_price': 50, 'max_price': 60}, limit=5),
+            'get_places_page amenity': lambda: facade.get_places_page(amenity_filter, limit=5),
+            'count_places price': lambda: facade.count_places({'min_price': 200}),
+            'count_places amenity': lambda: facade.count_places(amenity_filter),
+            'get_places_nearby': lambda: facade.get_places_nearby(45.0, 3.0, 50),
+            'search_places': lambda: facade.search_places('place 1', limit=5),
+            'count_search_places': lambda: facade.count_search_places('place'),
+            'get_reviews_by_place': lambda: facade.get_reviews_by_place(place_id, limit=5),
+            'get_place_reviews_version': lambda: facade.get_place_reviews_version(place_id),
+            'count_reviews_by_place': lambda: facade.count_reviews_by_place(place_id),
+            'get_reviews_version': facade.get_reviews_version,
+            'create_review': lambda: facade.create_review({
+                'user_id': user_id, 'place_id': self.place_ids[50], 'rating': 5, 'text': 'Great'}),
+            'update_review': lambda: facade.update_review(self.review_id, {'rating': 2}),
+            'delete_review': lambda: facade.delete_review(self.review_id),
+            'update_place': lambda: facade.update_place(other_place_id, {
+                'price': 99.0, 'amenities': [self.amenity_id]}),
+            'update_user': lambda: facade.update_user(user_id, {'is_admin': True}),
+            'delete_place': lambda: facade.delete_place(other_place_id),
+        }
+        for name, call in calls.items():
+            with self.subTest(name):
+                self.assertEqual(self.full_scans(call), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
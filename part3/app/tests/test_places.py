@@ -0,0 +1,297 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+from app.services import facade
+
+
+class TestPlaceListEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        self.wifi = facade.create_amenity({"name": "Wifi"})
+        self.pool = facade.create_amenity({"name": "Pool"})
+
+        self.places = []
+        for i in range(5):
+            amenities = [self.wifi.id] if i % 2 == 0 else []
+            if i == 4:
+                amenities.append(self.pool.id)
+            self.places.append(facade.create_place({
+                "title": f"Place {i}",
+                "price": 50.0 * (i + 1),
+                "latitude": 45.0,
+                "longitude": 5.0,
+                "owner_id": self.owner.id,
+                "rooms": i + 1,
+                "capacity": 2 * (i + 1),
+                "amenities": amenities
+            }))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_pages_follow_cursor(self):
+        response = self.client.get('/api/v1/places/?limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Total-Count'], '5')
+
+        seen = [p['id'] for p in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        while cursor:
+            response = self.client.get('/api/v1/places/',
+                                       query_string={'limit': 2, 'after': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Total-Count', response.headers)
+            seen.extend(p['id'] for p in response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+
+        self.assertEqual(seen, [p.id for p in self.places])
+
+    def test_filters(self):
+        response = self.client.get('/api/v1/places/?min_price=100&max_price=200')
+        self.assertEqual([p['title'] for p in response.get_json()],
+                         ['Place 1', 'Place 2', 'Place 3'])
+
+        response = self.client.get('/api/v1/places/?min_capacity=6&max_rooms=4')
+        self.assertEqual([p['title'] for p in response.get_json()],
+                         ['Place 2', 'Place 3'])
+
+        response = self.client.get(
+            f'/api/v1/places/?amenities={self.wifi.id},{self.pool.id}')
+        self.assertEqual([p['title'] for p in response.get_json()], ['Place 4'])
+        self.assertEqual(response.headers['X-Total-Count'], '1')
+
+    def test_sort_by_rating(self):
+        for place, rating in zip(self.places, [3, 5, 1, 5, 4]):
+            facade.create_review({
+                "text": "Stay",
+                "rating": rating,
+                "user_id": self.owner.id,
+                "place_id": place.id
+            })
+
+        response = self.client.get('/api/v1/places/?sort=rating&limit=3')
+        first_page = response.get_json()
+        self.assertEqual([p['rating_avg'] for p in first_page], [5.0, 5.0, 4.0])
+
+        response = self.client.get('/api/v1/places/', query_string={
+            'sort': 'rating', 'limit': 3, 'after': response.headers['X-Next-Cursor']})
+        self.assertEqual([p['title'] for p in response.get_json()],
+                         ['Place 0', 'Place 2'])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/places/?after=garbage')
+        self.assertEqual(response.status_code, 400)
+
+    def test_amenities_resolved_in_one_query(self):
+        amenity_ids = [facade.create_amenity({"name": f"Amenity {i}"}).id for i in range(10)]
+        statements = []
+
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            resolved = facade.get_amenities(list(reversed(amenity_ids)))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+        self.assertEqual([a.name for a in resolved],
+                         [f"Amenity {i}" for i in reversed(range(10))])
+        self.assertEqual(len(statements), 1)
+
+    def test_unknown_amenities_reported_together(self):
+        with self.assertRaises(ValueError) as error:
+            facade.create_place({
+                "title": "Nowhere",
+                "price": 10.0,
+                "latitude": 45.0,
+                "longitude": 5.0,
+                "owner_id": self.owner.id,
+                "amenities": [self.wifi.id, "missing-1", "missing-2"]
+            })
+        self.assertIn("missing-1, missing-2", str(error.exception))
+
+        place = facade.update_place(self.places[0].id, {"amenities": [self.pool.id]})
+        self.assertEqual([a.name for a in place.amenities], ["Pool"])
+
+    def test_create_places_bulk(self):
+        rows = [{
+            "title": f"Bulk {i}",
+            "price": 10.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.owner.id,
+            "amenities": [self.pool.id]
+        } for i in range(3)]
+
+        places = facade.create_places_bulk(rows)
+        self.assertEqual(len(places), 3)
+        self.assertEqual(facade.count_places({'amenities': [self.pool.id]}), 4)
+
+        rows[0]["price"] = -1.0
+        rows[2]["owner_id"] = "unknown"
+        with self.assertRaises(ValueError) as error:
+            facade.create_places_bulk(rows)
+        self.assertIn("place 0", str(error.exception))
+        self.assertIn("place 2", str(error.exception))
+        self.assertEqual(facade.count_places(), 8)
+
+
+class TestPlaceDetailEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        wifi = facade.create_amenity({"name": "Wifi"})
+        place = facade.create_place({
+            "title": "Chalet",
+            "price": 120.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": owner.id,
+            "amenities": [wifi.id]
+        })
+        self.place_id = place.id
+        self.review_count = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_reviews(self, count):
+        for _ in range(count):
+            index = self.review_count
+            self.review_count += 1
+            author = facade.create_user({
+                "first_name": "Guest",
+                "last_name": str(index),
+                "email": f"guest{index}@example.com",
+                "password": "secret"
+            })
+            facade.create_review({
+                "text": "Nice stay",
+                "rating": 4,
+                "user_id": author.id,
+                "place_id": self.place_id
+            })
+
+    def count_statements(self):
+        """GET the place on a cold session and return (response, statement count)"""
+        statements = []
+
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            response = self.client.get(f'/api/v1/places/{self.place_id}')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+        return response, len(statements)
+
+    def test_statement_count_independent_of_reviews(self):
+        self.add_reviews(1)
+        response, few = self.count_statements()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['reviews']), 1)
+
+        self.add_reviews(19)
+        response, many = self.count_statements()
+        self.assertEqual(response.status_code, 200)
+        reviews = response.get_json()['reviews']
+        self.assertEqual(len(reviews), 20)
+        self.assertEqual(len({r['user']['id'] for r in reviews}), 20)
+        self.assertEqual(few, many)
+
+    def test_unknown_place(self):
+        response = self.client.get('/api/v1/places/unknown')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestPlaceGeoSearch(unittest.TestCase):
+    CITIES = {
+        "Paris": (48.8566, 2.3522),
+        "Lyon": (45.7640, 4.8357),
+        "Villeurbanne": (45.7719, 4.8902),
+        "Marseille": (43.2965, 5.3698),
+    }
+
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        for title, (latitude, longitude) in self.CITIES.items():
+            facade.create_place({
+                "title": title,
+                "price": 100.0,
+                "latitude": latitude,
+                "longitude": longitude,
+                "owner_id": owner.id
+            })
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_radius_sorted_by_distance(self):
+        response = self.client.get('/api/v1/places/?lat=45.76&lon=4.84&radius_km=20')
+        self.assertEqual(response.status_code, 200)
+        places = response.get_json()
+        self.assertEqual([p['title'] for p in places], ['Lyon', 'Villeurbanne'])
+        self.assertLess(places[0]['distance_km'], places[1]['distance_km'])
+
+        response = self.client.get('/api/v1/places/?lat=45.76&lon=4.84&radius_km=500&limit=2')
+        self.assertEqual([p['title'] for p in response.get_json()], ['Lyon', 'Villeurbanne'])
+        response = self.client.get('/api/v1/places/', query_string={
+            'lat': 45.76, 'lon': 4.84, 'radius_km': 500, 'limit': 2,
+            'after': response.headers['X-Next-Cursor']})
+        self.assertEqual([p['title'] for p in response.get_json()], ['Marseille', 'Paris'])
+
+    def test_bbox(self):
+        response = self.client.get('/api/v1/places/?bbox=2,43,6,46')
+        self.assertEqual(sorted(p['title'] for p in response.get_json()),
+                         ['Lyon', 'Marseille', 'Villeurbanne'])
+
+    def test_invalid_geo_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/places/?lat=45').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/?bbox=1,2,3').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import weakref
+from unittest import mock
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence import cached_repository
+from app.services import facade
+from app.services.facade import HBnBFacade
+
+
+class TestPrincipalAuthorization(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.users = {}
+        for name, is_admin in (("owner", False), ("other", False), ("admin", True)):
+            self.users[name] = facade.create_user({
+                "first_name": name.title(),
+                "last_name": "Doe",
+                "email": f"{name}@example.com",
+                "password": "secret",
+                "is_admin": is_admin
+            }).id
+        self.place_id = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.users["owner"]
+        }).id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def token(self, name):
+        response = self.client.post('/api/v1/auth/login', json={
+            "email": f"{name}@example.com", "password": "secret"})
+        return {"Authorization": f"Bearer {response.json['access_token']}"}
+
+    def rename(self, headers, title="Renamed"):
+        return self.client.put(f'/api/v1/places/{self.place_id}',
+                               json={"title": title}, headers=headers)
+
+    def test_owner_or_admin(self):
+        self.assertEqual(self.rename(self.token("other")).status_code, 403)
+        self.assertEqual(self.rename(self.token("owner")).status_code, 200)
+        self.assertEqual(self.rename(self.token("admin"), "Admin's").status_code, 200)
+        self.assertEqual(self.rename({}).status_code, 401)
+
+    def test_denial_needs_one_query(self):
+        headers = self.token("other")
+        self.rename(headers)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        response = self.rename(headers)
+        event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 403)
+        # The token version is read, the place owner comes from the entity cache
+        self.assertEqual(len(statements), 1)
+        self.assertIn("token_version", statements[0])
+
+    def test_revoke(self):
+        headers = self.token("owner")
+        response = self.client.post('/api/v1/auth/revoke', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rename(headers).status_code, 401)
+        self.assertEqual(self.rename(self.token("owner")).status_code, 200)
+
+    def test_revoke_in_another_worker(self):
+        headers = self.token("owner")
+        self.assertEqual(self.rename(headers).status_code, 200)
+        repo = facade.user_repo
+        key = repo._key('id', self.users["owner"])
+        self.assertIsNotNone(repo.cache.get(key))
+
+        # Another worker's facade: its writes never reach this worker's cache
+        other = HBnBFacade()
+        workers = weakref.WeakSet([other.user_repo])
+        with mock.patch.object(cached_repository, '_repositories', workers):
+            other.revoke_tokens(self.users["owner"])
+        db.session.remove()
+        self.assertIsNotNone(repo.cache.get(key))
+        self.assertEqual(self.rename(headers).status_code, 401)
+
+    def test_role_change_revokes(self):
+        headers = self.token("admin")
+        facade.update_user(self.users["admin"], {"is_admin": False})
+        db.session.remove()
+        self.assertEqual(self.rename(headers).status_code, 401)
+        self.assertEqual(self.rename(self.token("admin")).status_code, 403)
+
+    def test_role_change_needs_an_admin(self):
+        payload = {"first_name": "Owner", "last_name": "Doe", "email": "owner@example.com",
+                   "password": "secret", "is_admin": True}
+        response = self.client.put(f'/api/v1/users/{self.users["owner"]}', json=payload,
+                                   headers=self.token("owner"))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(facade.get_user(self.users["owner"]).is_admin)
+
+        # Sending the current role back is not a change
+        payload["is_admin"] = False
+        response = self.client.put(f'/api/v1/users/{self.users["owner"]}', json=payload,
+                                   headers=self.token("owner"))
+        self.assertEqual(response.status_code, 200)
+
+        payload["is_admin"] = True
+        response = self.client.put(f'/api/v1/users/{self.users["owner"]}', json=payload,
+                                   headers=self.token("admin"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(facade.get_user(self.users["owner"]).is_admin)
+
+    def test_token_version_is_not_writable(self):
+        facade.update_user(self.users["owner"], {"first_name": "Own", "token_version": -1})
+        self.assertEqual(facade.get_user(self.users["owner"]).token_version, 0)
+
+    def test_admin_only(self):
+        response = self.client.post('/api/v1/amenities/', json={"name": "Wifi"},
+                                    headers=self.token("owner"))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/v1/amenities/', json={"name": "Wifi"},
+                                    headers=self.token("admin"))
+        self.assertEqual(response.status_code, 201)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence import replicas
+from app.persistence.replicas import SQLiteReplication
+from app.services import facade
+
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'primary.db')}"
+            SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}"]
+            CACHE_BACKEND = 'none'
+
+        self.app = create_app(ReplicaConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.replication = SQLiteReplication(db)
+
+        self.owner_id = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        }).id
+        self.place_id = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.owner_id
+        }).id
+        self.replication.sync()
+        db.session.remove()
+        replicas.reset_query_counts()
+
+    def tearDown(self):
+        db.session.remove()
+        self.replication.close()
+        for engine in [db.engine, *self.app.extensions['replicas'].values()]:
+            engine.dispose()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def test_reads_use_replica(self):
+        self.assertEqual(facade.get_user(self.owner_id).first_name, "Jane")
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        counts = facade.get_query_counts()
+        self.assertNotIn('primary', counts)
+        self.assertGreater(counts['replica0'], 1)
+
+    def test_replica_lags_until_sync(self):
+        facade.create_amenity({"name": "Wifi"})
+        db.session.remove()
+        self.assertIsNone(facade.get_amenity_by_name("Wifi"))
+        self.replication.sync()
+        db.session.remove()
+        self.assertIsNotNone(facade.get_amenity_by_name("Wifi"))
+
+    def test_read_your_writes(self):
+        facade.create_amenity({"name": "Wifi"})
+        # Same session: pinned to the primary since its write
+        self.assertIsNotNone(facade.get_amenity_by_name("Wifi"))
+        with facade.transaction():
+            self.assertIsNotNone(facade.get_user(self.owner_id))
+        self.assertNotIn('replica0', facade.get_query_counts())
+
+    def test_unsafe_requests_use_primary(self):
+        response = self.client.post('/api/v1/users/', json={
+            "first_name": "John",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        # The duplicate email was found by reading the primary
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('replica0', facade.get_query_counts())
+
+    def test_auto_replication(self):
+        self.replication.close()
+        self.replication = SQLiteReplication(db, auto=True)
+        facade.create_amenity({"name": "Pool"})
+        db.session.remove()
+        self.assertIsNotNone(facade.get_amenity_by_name("Pool"))
+        self.assertEqual(facade.get_query_counts()['replica0'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from types import SimpleNamespace
+from sqlalchemy import event
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence.repository import InMemoryRepository
+from app.services import facade
+
+
+class TestInMemoryGeoSearch(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository()
+        for obj_id, latitude, longitude, price in [
+            ("lyon", 45.7640, 4.8357, 80.0),
+            ("villeurbanne", 45.7719, 4.8902, 120.0),
+            ("paris", 48.8566, 2.3522, 90.0),
+            ("fiji", -17.7134, 178.0650, 100.0),
+        ]:
+            self.repo.add(SimpleNamespace(id=obj_id, latitude=latitude,
+                                          longitude=longitude, price=price,
+                                          amenities=[]))
+
+    def test_radius(self):
+        results, _ = self.repo.get_nearby(45.76, 4.84, radius_km=20)
+        self.assertEqual([obj.id for obj, _ in results], ["lyon", "villeurbanne"])
+
+    def test_filters(self):
+        results, _ = self.repo.get_nearby(45.76, 4.84, radius_km=20,
+                                       filters={"max_price": 100.0})
+        self.assertEqual([obj.id for obj, _ in results], ["lyon"])
+
+    def test_bbox_across_antimeridian(self):
+        results, _ = self.repo.get_nearby(-17.0, 180.0, bbox=(170.0, -20.0, -170.0, -10.0))
+        self.assertEqual([obj.id for obj, _ in results], ["fiji"])
+
+
+class TestFacadeTransaction(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.commits = 0
+        event.listen(db.session(), 'after_commit', self.count_commit)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_commit(self, session):
+        self.commits += 1
+
+    def create_user(self, email):
+        return facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": email,
+            "password": "secret"
+        })
+
+    def test_single_commit(self):
+        with facade.transaction():
+            user = self.create_user("jane@example.com")
+            facade.create_amenity({"name": "Wifi"})
+            # Flushed, not committed
+            self.assertIsNotNone(facade.get_user(user.id))
+            with facade.transaction():
+                facade.create_amenity({"name": "Pool"})
+            self.assertEqual(self.commits, 0)
+
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(len(facade.get_all_amenities()), 2)
+
+    def test_writes_to_one_row(self):
+        user = self.create_user("jane@example.com")
+        with facade.transaction():
+            facade.revoke_tokens(user.id)
+            facade.revoke_tokens(user.id)
+            facade.update_user(user.id, {"first_name": "Janet"})
+            facade.revoke_tokens(user.id)
+
+        self.assertEqual(self.commits, 2)
+        user = facade.get_user(user.id)
+        self.assertEqual(user.token_version, 3)
+        self.assertEqual(user.first_name, "Janet")
+
+    def test_rollback_on_exception(self):
+        with self.assertRaises(ValueError):
+            with facade.transaction():
+                self.create_user("jane@example.com")
+                facade.create_amenity({"name": ""})
+
+        self.assertEqual(self.commits, 0)
+        self.assertIsNone(facade.get_user_by_email("jane@example.com"))
+
+    def test_inner_failure_rolls_back_outer(self):
+        with facade.transaction():
+            self.create_user("jane@example.com")
+            try:
+                with facade.transaction():
+                    facade.create_amenity({"name": ""})
+            except ValueError:
+                pass
+
+        self.assertIsNone(facade.get_user_by_email("jane@example.com"))
+        # Without a block, each write commits on its own again
+        self.create_user("john@example.com")
+        self.assertEqual(self.commits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
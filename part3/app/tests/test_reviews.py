@@ -0,0 +1,215 @@
+import unittest
+from app import create_app, db
+from app.config import TestingConfig
+from app.services import facade
+
+
+class TestPlaceReviewsEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        self.place = facade.create_place({
+            "title": "Chalet",
+            "price": 120.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": owner.id
+        })
+        other = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 43.0,
+            "longitude": 5.0,
+            "owner_id": owner.id
+        })
+
+        self.reviews = []
+        for i in range(5):
+            author = facade.create_user({
+                "first_name": "Guest",
+                "last_name": str(i),
+                "email": f"guest{i}@example.com",
+                "password": "secret"
+            })
+            self.reviews.append(facade.create_review({
+                "text": f"Review {i}",
+                "rating": i % 5 + 1,
+                "user_id": author.id,
+                "place_id": self.place.id
+            }))
+            facade.create_review({
+                "text": "Elsewhere",
+                "rating": 3,
+                "user_id": author.id,
+                "place_id": other.id
+            })
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_reviews_namespace_paging(self):
+        url = f'/api/v1/reviews/places/{self.place.id}/reviews'
+
+        response = self.client.get(url, query_string={'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Total-Count'], '5')
+        self.assertEqual([r['text'] for r in response.get_json()],
+                         ['Review 4', 'Review 3'])
+
+        response = self.client.get(url, query_string={'order': 'asc',
+                                                      'limit': 2, 'offset': 2})
+        self.assertEqual([r['text'] for r in response.get_json()],
+                         ['Review 2', 'Review 3'])
+
+    def test_places_namespace_paging(self):
+        url = f'/api/v1/places/{self.place.id}/reviews'
+
+        response = self.client.get(url, query_string={'order': 'asc'})
+        self.assertEqual(response.status_code, 200)
+        reviews = response.get_json()
+        self.assertEqual([r['text'] for r in reviews],
+                         [f'Review {i}' for i in range(5)])
+        self.assertEqual(reviews[0]['user']['last_name'], '0')
+
+    def test_invalid_parameters(self):
+        url = f'/api/v1/places/{self.place.id}/reviews'
+        self.assertEqual(self.client.get(url, query_string={'order': 'up'}).status_code, 400)
+        self.assertEqual(self.client.get(url, query_string={'offset': -1}).status_code, 400)
+
+    def test_unknown_place(self):
+        response = self.client.get('/api/v1/reviews/places/unknown/reviews')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/v1/places/unknown/reviews')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestPlaceRatingAggregates(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        self.place = facade.create_place({
+            "title": "Chalet",
+            "price": 120.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.owner.id
+        })
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def review(self, rating):
+        return facade.create_review({
+            "text": "Stay",
+            "rating": rating,
+            "user_id": self.owner.id,
+            "place_id": self.place.id
+        })
+
+    def stats(self):
+        return facade.get_place(self.place.id).to_dict()
+
+    def test_maintained_on_review_writes(self):
+        first = self.review(5)
+        second = self.review(2)
+        stats = self.stats()
+        self.assertEqual(stats['review_count'], 2)
+        self.assertEqual(stats['rating_sum'], 7)
+        self.assertEqual(stats['rating_avg'], 3.5)
+        self.assertEqual(stats['rating_histogram'],
+                         {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1})
+
+        updated = facade.update_review(second.id, {'rating': 4})
+        self.assertEqual(updated.rating, 4)
+        stats = self.stats()
+        self.assertEqual(stats['rating_sum'], 9)
+        self.assertEqual(stats['rating_histogram']['2'], 0)
+        self.assertEqual(stats['rating_histogram']['4'], 1)
+
+        facade.delete_review(first.id)
+        facade.delete_review(second.id)
+        stats = self.stats()
+        self.assertEqual(stats['review_count'], 0)
+        self.assertEqual(stats['rating_sum'], 0)
+        self.assertEqual(stats['rating_avg'], 0.0)
+
+    def test_writes_before_one_commit(self):
+        first = self.review(1)
+        second = self.review(2)
+        with facade.transaction():
+            self.review(5)
+            self.review(4)
+            self.review(4)
+            facade.update_review(first.id, {'rating': 3})
+            facade.update_review(second.id, {'rating': 1})
+            facade.delete_review(second.id)
+        stats = self.stats()
+        self.assertEqual(stats['review_count'], 4)
+        self.assertEqual(stats['rating_sum'], 16)
+        self.assertEqual(stats['rating_avg'], 4.0)
+        self.assertEqual(stats['rating_histogram'],
+                         {'1': 0, '2': 0, '3': 1, '4': 2, '5': 1})
+
+    def test_create_reviews_bulk(self):
+        rows = [{
+            "text": "Stay",
+            "rating": rating,
+            "user_id": self.owner.id,
+            "place_id": self.place.id
+        } for rating in (5, 4, 4)]
+
+        reviews = facade.create_reviews_bulk(rows)
+        self.assertEqual(len(reviews), 3)
+        stats = self.stats()
+        self.assertEqual(stats['review_count'], 3)
+        self.assertEqual(stats['rating_sum'], 13)
+        self.assertEqual(stats['rating_histogram']['4'], 2)
+
+        rows[1]["rating"] = 9
+        with self.assertRaises(ValueError):
+            facade.create_reviews_bulk(rows)
+        self.assertEqual(self.stats()['review_count'], 3)
+        self.assertEqual(facade.count_reviews_by_place(self.place.id), 3)
+
+    def test_recompute_repairs_drift(self):
+        self.review(3)
+        self.review(4)
+        place = facade.get_place(self.place.id)
+        place.review_count = 10
+        place.rating_5 = 7
+        db.session.commit()
+
+        self.assertEqual(facade.recompute_rating_stats(), 1)
+        stats = self.stats()
+        self.assertEqual(stats['review_count'], 2)
+        self.assertEqual(stats['rating_sum'], 7)
+        self.assertEqual(stats['rating_avg'], 3.5)
+        self.assertEqual(stats['rating_histogram'],
+                         {'1': 0, '2': 0, '3': 1, '4': 1, '5': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
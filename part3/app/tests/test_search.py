@@ -0,0 +1,198 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from sqlalchemy import text
+from app import create_app, db
+from app.config import TestingConfig
+from app.persistence import search
+from app.persistence.repository import InMemoryRepository
+from app.services import facade
+
+PLACES = [
+    ("Lyon loft", "Bright loft near the Saône"),
+    ("Paris studio", "Small studio close to the Louvre, with a loft bed"),
+    ("Lyonnais house", "House with a garden, twenty minutes from Lyon"),
+    ("Café flat", "Flat above a café in Lyon"),
+    ("Garden cabin", "Wooden cabin at the end of a quiet garden"),
+]
+
+
+class Document(SimpleNamespace):
+    def update(self, data):
+        for key, value in data.items():
+            setattr(self, key, value)
+
+
+class TestQueryParsing(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(search.parse_query("Café  LYON-lof"),
+                         [("cafe", False), ("lyon", False), ("lof", True)])
+        self.assertEqual(search.parse_query("lyon lo"), [("lyon", False), ("lo", False)])
+
+    def test_stopwords(self):
+        self.assertEqual(search.parse_query("loft in the"), [("loft", True)])
+        self.assertEqual(search.parse_query("the"), [("the", True)])
+
+    def test_invalid(self):
+        for query in ("", " - ", " ".join(f"w{i}" for i in range(search.MAX_TERMS + 1))):
+            with self.assertRaises(ValueError):
+                search.parse_query(query)
+
+
+class TestInMemorySearch(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(search_fields=search.WEIGHTS)
+        for index, (title, description) in enumerate(PLACES):
+            self.repo.add(Document(id=f"p{index}", title=title, description=description))
+
+    def ids(self, query, **kwargs):
+        return [obj.id for obj in self.repo.search(query, **kwargs)[0]]
+
+    def test_ranking(self):
+        # Title matches first
+        self.assertEqual(self.ids("loft"), ["p0", "p1"])
+        self.assertEqual(self.ids("garden")[0], "p4")
+
+    def test_prefix_and_accents(self):
+        self.assertEqual(set(self.ids("lyon")), {"p0", "p2", "p3"})
+        self.assertEqual(self.ids("lyon caf"), ["p3"])
+        self.assertEqual(self.ids("CAFE"), ["p3"])
+        self.assertEqual(self.ids("saone"), ["p0"])
+
+    def test_sync(self):
+        self.repo.update("p0", {"title": "Riverside flat"})
+        self.assertEqual(self.ids("lyon loft"), [])
+        self.assertEqual(self.ids("riverside"), ["p0"])
+        self.repo.delete("p3")
+        self.assertEqual(self.ids("cafe"), [])
+        self.assertEqual(self.repo.count_search("lyon"), 1)
+
+    def test_pages(self):
+        first, cursor = self.repo.search("the", limit=2)
+        second, last = self.repo.search("the", after=cursor, limit=2)
+        self.assertIsNone(last)
+        self.assertEqual(len(first + second), 3)
+        self.assertFalse({obj.id for obj in first} & {obj.id for obj in second})
+        with self.assertRaises(ValueError):
+            self.repo.search("the", after="not-a-cursor")
+
+    def test_bounds(self):
+        with mock.patch.object(search, "RANK_WINDOW", 2):
+            # Only the two newest matches are ranked
+            self.assertEqual(set(self.ids("lyon")), {"p2", "p3"})
+            self.assertEqual(self.repo.count_search("lyon"), 2)
+            # An update keeps its position, like a rowid
+            self.repo.update("p0", {"description": "Lyon"})
+            self.assertEqual(set(self.ids("lyon")), {"p2", "p3"})
+
+
+class TestPlaceSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner_id = facade.create_user({
+            "first_name": "Owner",
+            "last_name": "Doe",
+            "email": "owner@example.com",
+            "password": "secret"
+        }).id
+        places = facade.create_places_bulk([{
+            "title": title,
+            "description": description,
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.owner_id
+        } for title, description in PLACES])
+        self.place_ids = [place.id for place in places]
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def titles(self, query, **kwargs):
+        return [place.title for place in facade.search_places(query, **kwargs)[0]]
+
+    def test_search(self):
+        self.assertEqual(self.titles("loft"), ["Lyon loft", "Paris studio"])
+        self.assertEqual(self.titles("lyon caf"), ["Café flat"])
+        self.assertEqual(self.titles("saone"), ["Lyon loft"])
+        self.assertEqual(facade.count_search_places("lyon"), 3)
+
+    def test_index_follows_writes(self):
+        facade.update_place(self.place_ids[0], {"title": "Riverside flat"})
+        self.assertIn("Riverside flat", self.titles("riverside"))
+        facade.update_place(self.place_ids[0], {"price": 90.0})
+        self.assertIn("Riverside flat", self.titles("riverside"))
+        facade.delete_place(self.place_ids[3])
+        self.assertEqual(self.titles("cafe"), [])
+        facade.create_place({"title": "Café loft", "price": 50.0, "latitude": 45.0,
+                             "longitude": 5.0, "owner_id": self.owner_id})
+        self.assertEqual(self.titles("cafe"), ["Café loft"])
+
+    def test_count_matches_reachable_pages(self):
+        with mock.patch.object(search, "RANK_WINDOW", 2):
+            # Three places match, only the two newest are ranked and counted
+            self.assertEqual(facade.count_search_places("lyon"), 2)
+            first, cursor = facade.search_places("lyon", limit=1)
+            second, last = facade.search_places("lyon", after=cursor, limit=1)
+            self.assertIsNone(last)
+            self.assertEqual({place.title for place in first + second},
+                             {"Lyonnais house", "Café flat"})
+            response = self.client.get('/api/v1/places/search?q=lyon')
+            self.assertEqual(response.headers['X-Total-Count'], str(len(response.json)))
+
+    def test_soft_deleted_places_leave_the_window(self):
+        with mock.patch.object(search, "RANK_WINDOW", 2):
+            # Still indexed until purged, but not taking a slot
+            facade.delete_place(self.place_ids[3])
+            self.assertEqual(set(self.titles("lyon")), {"Lyon loft", "Lyonnais house"})
+            self.assertEqual(facade.count_search_places("lyon"), 2)
+
+    def test_index_survives_rowid_renumbering(self):
+        # What a VACUUM may do to a table without an INTEGER primary key
+        db.session.execute(text("UPDATE places SET rowid = rowid + 100"))
+        db.session.commit()
+        self.assertEqual(self.titles("saone"), ["Lyon loft"])
+        facade.create_place({"title": "Saône barge", "price": 50.0, "latitude": 45.0,
+                             "longitude": 5.0, "owner_id": self.owner_id})
+        self.assertEqual(set(self.titles("saone")), {"Lyon loft", "Saône barge"})
+        facade.update_place(self.place_ids[0], {"title": "Riverside flat"})
+        self.assertEqual(self.titles("riverside"), ["Riverside flat"])
+
+    def test_ranks_match_in_memory_index(self):
+        repo = InMemoryRepository(search_fields=search.WEIGHTS)
+        for place in facade.get_all_places():
+            repo.add(place)
+        for query in ("loft", "lyon", "garden", "lyon h", "the"):
+            with self.subTest(query):
+                self.assertEqual(self.titles(query),
+                                 [place.title for place in repo.search(query)[0]])
+
+    def test_endpoint(self):
+        response = self.client.get('/api/v1/places/search?q=lyon&limit=2&fields=id,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Total-Count'], '3')
+        self.assertEqual(set(response.json[0]), {'id', 'title'})
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.client.get('/api/v1/places/search',
+                                   query_string={'q': 'lyon', 'after': cursor})
+        self.assertEqual(len(response.json), 1)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+        response = self.client.get('/api/v1/places/search?q=nowhere')
+        self.assertEqual((response.status_code, response.json), (200, []))
+        for query in ('q=', 'q=lyon&after=bad', 'q=lyon&limit=-1', 'q=lyon&fields=secret'):
+            with self.subTest(query):
+                self.assertEqual(self.client.get(f'/api/v1/places/search?{query}').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from app import create_app, db
+from app.api import serializers
+from app.api.serializers import Nested, Serializer, parse_fields
+from app.config import TestingConfig
+from app.services import facade
+
+
+class TestSerializer(unittest.TestCase):
+    def setUp(self):
+        self.author = Serializer({'id': 'id', 'name': lambda user: user.name.title()})
+        self.post = Serializer({
+            'id': 'id',
+            'author': Nested(self.author, attr='user'),
+            'tags': Nested(Serializer({'label': 'label'}), many=True),
+        })
+
+    def test_dump(self):
+        post = SimpleNamespace(id=1, user=SimpleNamespace(id=2, name='jane'),
+                               tags=[SimpleNamespace(label='a')])
+        self.assertEqual(self.post.dump(post),
+                         {'id': 1, 'author': {'id': 2, 'name': 'Jane'}, 'tags': [{'label': 'a'}]})
+        self.assertEqual(self.post.dump(SimpleNamespace(id=3, user=None, tags=[]), {'id', 'author'}),
+                         {'id': 3, 'author': None})
+
+    def test_plans_are_cached(self):
+        self.assertIs(self.post.plan({'id'}), self.post.plan({'id'}))
+        self.assertIs(self.post.plan(), self.post.plan())
+
+    def test_parse_fields(self):
+        self.assertIsNone(parse_fields('', self.post))
+        self.assertEqual(parse_fields('id, tags', self.post), {'id', 'tags'})
+        self.assertEqual(parse_fields('id,rank', self.post, extra={'rank'}), {'id', 'rank'})
+        with self.assertRaises(ValueError):
+            parse_fields('id,secret', self.post)
+
+    def test_json_fallback(self):
+        stamp = datetime(2024, 1, 2, 3, 4, 5)
+        orjson, serializers.orjson = serializers.orjson, None
+        try:
+            self.assertEqual(serializers.dumps({'at': stamp}), b'{"at":"2024-01-02T03:04:05"}')
+        finally:
+            serializers.orjson = orjson
+        self.assertEqual(serializers.dumps({'at': stamp}), b'{"at":"2024-01-02T03:04:05"}')
+
+
+class TestSparseFieldsets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        })
+        wifi = facade.create_amenity({"name": "Wifi"})
+        place = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": owner.id,
+            "amenities": [wifi.id]
+        })
+        self.owner_id, self.place_id, self.wifi_id = owner.id, place.id, wifi.id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_full_shapes(self):
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        place = response.json[0]
+        self.assertEqual(place['amenities'], ['Wifi'])
+        self.assertEqual(place['rating_histogram'], {str(star): 0 for star in range(1, 6)})
+        self.assertEqual(place['rating_avg'], 0.0)
+
+        response = self.client.get(f'/api/v1/places/{self.place_id}')
+        self.assertEqual(response.json['owner'], {
+            'id': self.owner_id, 'first_name': 'Jane', 'last_name': 'Doe',
+            'email': 'jane.doe@example.com'})
+        self.assertEqual(response.json['amenities'], [{'id': self.wifi_id, 'name': 'Wifi'}])
+        self.assertEqual(response.json['reviews'], [])
+
+    def test_sparse_list(self):
+        response = self.client.get('/api/v1/places/?fields=id,title,price')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{'id': self.place_id, 'title': 'Loft', 'price': 80.0}])
+
+        response = self.client.get('/api/v1/places/?lat=45&lon=5&radius_km=10&fields=id,distance_km')
+        self.assertEqual(response.json, [{'id': self.place_id, 'distance_km': 0.0}])
+
+    def test_sparse_detail(self):
+        response = self.client.get(f'/api/v1/places/{self.place_id}?fields=title,owner')
+        self.assertEqual(set(response.json), {'title', 'owner'})
+        response = self.client.get(f'/api/v1/places/{self.place_id}?fields=id,title')
+        self.assertEqual(response.json, {'id': self.place_id, 'title': 'Loft'})
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/v1/places/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json['error'])
+        response = self.client.get(f'/api/v1/places/{self.place_id}?fields=distance_km')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import http.client
+import os
+import queue
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from app import create_app, db
+from app.config import TestingConfig
+from app.server import parse_bind
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+
+class TestParseBind(unittest.TestCase):
+    def test_addresses(self):
+        self.assertEqual(parse_bind('127.0.0.1:5000'), ('127.0.0.1', 5000))
+        self.assertEqual(parse_bind(':8000'), ('0.0.0.0', 8000))
+        self.assertEqual(parse_bind('[::1]:8000'), ('::1', 8000))
+        with self.assertRaises(ValueError):
+            parse_bind('localhost')
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "needs fork()")
+class TestPreforkServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'server.db')
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            db.create_all()
+            db.engine.dispose()
+
+        env = dict(os.environ, HBNB_CONFIG='production', DATABASE_URL=f"sqlite:///{path}",
+                   PASSWORD_HASH_WORKERS='0', IMAGE_WORKERS='0', JOB_WORKERS='0',
+                   SERVER_KEEPALIVE='30', SERVER_GRACEFUL_TIMEOUT='1')
+        self.server = subprocess.Popen(
+            [sys.executable, 'serve.py', '--bind', '127.0.0.1:0', '--workers', '2',
+             '--threads', '2', '--max-requests', '3', '--max-requests-jitter', '0'],
+            cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True)
+        self.lines = queue.Queue()
+        threading.Thread(target=lambda: [self.lines.put(line) for line in self.server.stderr],
+                         daemon=True).start()
+        self.port = int(self.wait_for(r'Listening at http://[^:]+:(\d+)').group(1))
+        self.wait_for(' ready', 2)
+
+    def tearDown(self):
+        if self.server.poll() is None:
+            self.server.kill()
+        self.server.wait()
+        self.tmp.cleanup()
+
+    def wait_for(self, pattern, count=1):
+        """Last of `count` log lines matching `pattern`"""
+        while count:
+            line = self.lines.get(timeout=20)
+            match = re.search(pattern, line)
+            count -= bool(match)
+        return match
+
+    def get(self, path='/swagger.json'):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_workers_are_recycled(self):
+        # 6 requests on 2 workers: one of them reaches 3 at least
+        for _ in range(6):
+            self.assertEqual(self.get()[0], 200)
+        self.wait_for(r'served 3 requests, recycling')
+        self.wait_for(' ready')
+        self.assertEqual(self.get()[0], 200)
+
+    def test_reload_and_stop(self):
+        self.server.send_signal(signal.SIGHUP)
+        self.wait_for('Reloading workers')
+        self.wait_for(' ready', 2)
+        self.assertEqual(self.get()[0], 200)
+
+        self.server.send_signal(signal.SIGTERM)
+        self.assertEqual(self.server.wait(timeout=20), 0)
+
+    def test_reload_kills_stuck_workers(self):
+        # Half a request holds a worker thread for SERVER_KEEPALIVE (30s)
+        stuck = socket.create_connection(('127.0.0.1', self.port), timeout=10)
+        stuck.sendall(b'GET /swagger.json HTTP/1.1\r\n')
+        time.sleep(0.5)
+
+        self.server.send_signal(signal.SIGHUP)
+        self.wait_for(' ready', 2)
+        pid = int(self.wait_for(r'Worker (\d+) did not stop within 1s, killing').group(1))
+        # Reaped by the master, not left as a zombie
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        else:
+            self.fail(f"worker {pid} was not reaped")
+        self.assertEqual(stuck.recv(1), b'')
+        stuck.close()
+        self.assertEqual(self.get()[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
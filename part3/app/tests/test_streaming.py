@@ -0,0 +1,109 @@
+import json
+import tracemalloc
+import unittest
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.review import Review
+from app.services import facade
+
+REVIEWS = 30000
+# Traced allocations while exporting; the body itself is several times larger
+MEMORY_CEILING = 4 * 1024 * 1024
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.user_id = facade.create_user({
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane.doe@example.com",
+            "password": "secret"
+        }).id
+        self.place_id = facade.create_place({
+            "title": "Loft",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 5.0,
+            "owner_id": self.user_id
+        }).id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_reviews(self, count):
+        now = datetime.utcnow()
+        db.session.execute(insert(Review), [{
+            "id": str(uuid.uuid4()),
+            "text": f"Review number {i}, " + "a fine stay " * 10,
+            "rating": i % 5 + 1,
+            "user_id": self.user_id,
+            "place_id": self.place_id,
+            "created_at": now,
+            "updated_at": now
+        } for i in range(count)])
+        db.session.commit()
+        db.session.remove()
+
+    def test_json_array(self):
+        self.add_reviews(2500)
+        response = self.client.get('/api/v1/reviews/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/json')
+        reviews = response.json
+        self.assertEqual(len(reviews), 2500)
+        self.assertEqual(set(reviews[0]), {'id', 'text', 'rating', 'user_id', 'place_id',
+                                           'created_at', 'updated_at'})
+
+        self.assertEqual(self.client.get('/api/v1/users/').json[0]['email'],
+                         'jane.doe@example.com')
+
+    def test_empty(self):
+        self.assertEqual(self.client.get('/api/v1/reviews/').json, [])
+
+    def test_ndjson(self):
+        self.add_reviews(1500)
+        headers = {"Accept": "application/x-ndjson"}
+        response = self.client.get('/api/v1/reviews/', headers=headers)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 1500)
+        self.assertEqual(json.loads(lines[0])['place_id'], self.place_id)
+
+        # The two representations have distinct validators
+        etag = self.client.get('/api/v1/reviews/').headers['ETag']
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.headers['Vary'], 'Accept')
+        response = self.client.get('/api/v1/reviews/', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bounded_memory(self):
+        self.add_reviews(REVIEWS)
+        size = 0
+        tracemalloc.start()
+        try:
+            response = self.client.get('/api/v1/reviews/', buffered=False)
+            for chunk in response.response:
+                size += len(chunk)
+            response.close()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(size, 2 * MEMORY_CEILING)
+        self.assertLess(peak, MEMORY_CEILING)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,10 @@
+"""ASGI entry point, see app.asgi.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+The configuration comes from HBNB_CONFIG (development, production); the
+database must be a file or a server, shared with the async engine.
+"""
+from app.asgi import create_asgi_app
+
+application = create_asgi_app()
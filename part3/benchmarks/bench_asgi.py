@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Compare the WSGI and ASGI serving modes at 1000 concurrent clients.
+
+Usage: python benchmarks/bench_asgi.py [--clients 1000] [--requests 5]
+                                       [--threads 32] [--places 2000]
+
+A fresh SQLite file (WAL profile, entity cache off) is seeded, then each
+client sends --requests GETs one after the other, half place pages and half
+place details, all clients at once:
+
+    wsgi   requests run the Flask app in a pool of --threads threads, as
+           under a threaded WSGI server: clients beyond that wait in line
+    asgi   requests go through app.asgi on one event loop and the async
+           facade (aiosqlite); --threads only serves routes without an
+           async handler, none here
+
+Requests are dispatched in process, without sockets, so the figures cover
+the app and the database, not HTTP parsing. The pool timeout is raised to
+60 s: 1000 clients saturate one process, and under the default 10 s the
+async mode, whose requests queue on the connection pool rather than on
+threads, would fail them instead of serving them late. Prints requests per second,
+latency percentiles (queueing included), peak requests in flight and peak
+threads.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.asgi import ASGIApp, build_environ  # noqa: E402
+from app.config import ProductionConfig  # noqa: E402
+from app.services.async_facade import async_facade  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+
+def seed(places):
+    owner = facade.create_user({"first_name": "Bench", "last_name": "Owner",
+                                "email": "bench@example.com", "password": "secret"})
+    rng = random.Random(0)
+    created = facade.create_places_bulk([{
+        "title": f"Place {i}", "price": float(rng.randrange(20, 400)),
+        "latitude": rng.uniform(42.5, 51.0), "longitude": rng.uniform(-4.5, 8.0),
+        "owner_id": owner.id,
+    } for i in range(places)])
+    return [place.id for place in created]
+
+
+def scope(path, query=''):
+    return {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'query_string': query.encode(), 'root_path': '', 'headers': [],
+            'client': ('127.0.0.1', 50000), 'server': ('localhost', 80)}
+
+
+def percentile(values, fraction):
+    return sorted(values)[int(fraction * (len(values) - 1))] * 1000 if values else 0.0
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peak_threads = threading.active_count()
+
+    def started(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def finished(self, start, status):
+        self.in_flight -= 1
+        self.latencies.append(time.perf_counter() - start)
+        if status != 200:
+            self.errors += 1
+
+
+async def run_clients(args, place_ids, serve):
+    stats = Stats()
+
+    async def client(number):
+        rng = random.Random(number)
+        for _ in range(args.requests):
+            if rng.random() < 0.5:
+                request = scope('/api/v1/places/',
+                                f"limit=20&min_price={rng.randrange(20, 350)}")
+            else:
+                request = scope(f'/api/v1/places/{rng.choice(place_ids)}')
+            start = time.perf_counter()
+            stats.started()
+            status = await serve(request)
+            stats.finished(start, status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(args.clients)))
+    return stats, time.perf_counter() - start
+
+
+def wsgi_server(app, threads):
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    def handle(request):
+        statuses = []
+        body = app.wsgi_app(build_environ(request, b''),
+                            lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        return int(statuses[0].split()[0])
+
+    async def serve(request):
+        return await asyncio.get_running_loop().run_in_executor(pool, handle, request)
+    return serve, pool
+
+
+def asgi_server(app, threads):
+    application = ASGIApp(app, threads)
+
+    async def serve(request):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        await application(request, receive, send)
+        return sent[0]['status']
+    return serve, application.executor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--places', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(ProductionConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLITE_PROFILE = 'wal'
+            CACHE_BACKEND = 'none'
+            BCRYPT_LOG_ROUNDS = 4
+            PASSWORD_HASH_WORKERS = 0
+            IMAGE_WORKERS = 0
+            JOB_WORKERS = 0
+            SQLALCHEMY_ENGINE_OPTIONS = {**ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+                                         'pool_timeout': 60}
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            place_ids = seed(args.places)
+            db.session.remove()
+        async_facade.init_app(app)
+
+        print(f"{args.clients} clients x {args.requests} requests, {args.threads} threads")
+        print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'errors':>7} {'in flight':>10} {'threads':>8}")
+        for mode, server in (('wsgi', wsgi_server), ('asgi', asgi_server)):
+            serve, pool = server(app, args.threads)
+            stats, elapsed = asyncio.run(run_clients(args, place_ids, serve))
+            pool.shutdown()
+            latencies = stats.latencies
+            print(f"{mode:<6} {len(latencies) / elapsed:>8.1f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} "
+                  f"{percentile(latencies, 0.99):>8.1f} {max(latencies) * 1000:>8.1f} "
+                  f"{stats.errors:>7} {stats.peak_in_flight:>10} {stats.peak_threads:>8}")
+        asyncio.run(async_facade.dispose())
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Mixed read/write traffic on a SQLite file, per SQLITE_PROFILE.
+
+Usage: python benchmarks/bench_db_concurrency.py [--readers 8] [--writers 2]
+                                                 [--seconds 10] [--places 2000]
+
+For each profile (default, wal) a fresh database is seeded, then reader
+processes page through places and load place details while writer
+processes add reviews, each operation in its own session, for --seconds.
+Workers are forked processes, as under a prefork server (threads would be
+serialized by the GIL). The entity cache is off so every read reaches
+SQLite. Engine options are those of
+ProductionConfig. Prints operations per second, latency percentiles and
+"database is locked" errors for reads and writes.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import multiprocessing
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.config import ProductionConfig  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.review import Review  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+
+def seed(places):
+    with facade.transaction():
+        users = [facade.create_user({"first_name": "Bench", "last_name": str(i),
+                                     "email": f"bench{i}@example.com", "password": "secret"})
+                 for i in range(50)]
+    rng = random.Random(0)
+    created = facade.create_places_bulk([{
+        "title": f"Place {i}", "price": float(rng.randrange(20, 400)),
+        "latitude": rng.uniform(42.5, 51.0), "longitude": rng.uniform(-4.5, 8.0),
+        "owner_id": users[i % len(users)].id,
+    } for i in range(places)])
+    return [user.id for user in users], [place.id for place in created]
+
+
+def percentile(values, fraction):
+    return sorted(values)[int(fraction * (len(values) - 1))] * 1000 if values else 0.0
+
+
+def run(profile, args, tmp):
+    class BenchConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, f'{profile}.db')}"
+        SQLITE_PROFILE = profile
+        CACHE_BACKEND = 'none'
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_WORKERS = 0
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user_ids, place_ids = seed(args.places)
+        db.session.remove()
+
+    # Single statements, so timings reflect SQLite locking rather than ORM work
+    def read(rng):
+        if rng.random() < 0.5:
+            db.session.execute(
+                select(Place.id, Place.title, Place.price)
+                .where(Place.price >= rng.randrange(20, 350))
+                .order_by(Place.created_at, Place.id).limit(20)).all()
+        else:
+            db.session.execute(select(Place).where(Place.id == rng.choice(place_ids))).one()
+
+    def write(rng):
+        now = datetime.utcnow()
+        db.session.execute(insert(Review).values(
+            id=str(uuid.uuid4()), text="Benchmark stay", rating=rng.randint(1, 5),
+            user_id=rng.choice(user_ids), place_id=rng.choice(place_ids),
+            created_at=now, updated_at=now))
+        db.session.commit()
+
+    def worker(kind, operation, seed_value, deadline, queue):
+        rng = random.Random(seed_value)
+        latencies, errors = [], 0
+        with app.app_context():
+            # Connections must not be shared with the parent after fork
+            db.engine.dispose(close=False)
+            while time.time() < deadline:
+                start = time.perf_counter()
+                try:
+                    operation(rng)
+                    latencies.append(time.perf_counter() - start)
+                except OperationalError:
+                    errors += 1
+                finally:
+                    db.session.remove()
+        queue.put((kind, latencies, errors))
+
+    queue = multiprocessing.Queue()
+    deadline = time.time() + args.seconds + 1
+    workers = ([('read', read, i) for i in range(args.readers)]
+               + [('write', write, 100 + i) for i in range(args.writers)])
+    processes = [multiprocessing.Process(target=worker, args=(*spec, deadline, queue))
+                 for spec in workers]
+    for process in processes:
+        process.start()
+    results = {'read': ([], [0]), 'write': ([], [0])}
+    for _ in processes:
+        kind, latencies, errors = queue.get()
+        results[kind][0].extend(latencies)
+        results[kind][1][0] += errors
+    for process in processes:
+        process.join()
+
+    for kind, (latencies, errors) in results.items():
+        print(f"{profile:<8} {kind:<6} {len(latencies) / args.seconds:>8.1f} "
+              f"{statistics.median(latencies) * 1000 if latencies else 0:>8.1f} "
+              f"{percentile(latencies, 0.99):>8.1f} {max(latencies, default=0) * 1000:>8.1f} "
+              f"{errors[0]:>7}")
+    with app.app_context():
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--places', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds} s per profile")
+    print(f"{'profile':<8} {'kind':<6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ('default', 'wal'):
+            run(profile, args, tmp)
+
+
+if __name__ == '__main__':
+    main()
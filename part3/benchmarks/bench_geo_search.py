@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare geohash-indexed radius search with a full scan of places.
+
+Usage: python benchmarks/bench_geo_search.py [sizes...]   (default 100000 1000000)
+
+Each size is loaded into a temporary SQLite file with places spread over
+mainland France, then 20 random 25 km radius searches are timed both ways.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.persistence import geo  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+QUERIES = 20
+RADIUS_KM = 25
+BATCH = 10000
+
+
+def load(size, owner_id):
+    rng = random.Random(size)
+    for start in range(0, size, BATCH):
+        rows = []
+        for _ in range(min(BATCH, size - start)):
+            latitude = rng.uniform(42.5, 51.0)
+            longitude = rng.uniform(-4.5, 8.0)
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "title": "Place",
+                "price": 100.0,
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geo.encode_geohash(latitude, longitude),
+                "owner_id": owner_id,
+            })
+        db.session.execute(Place.__table__.insert(), rows)
+    db.session.commit()
+
+
+def full_scan(latitude, longitude):
+    rows = db.session.execute(
+        db.select(Place.id, Place.latitude, Place.longitude)).all()
+    results = []
+    for place_id, lat, lon in rows:
+        distance = geo.haversine_km(latitude, longitude, lat, lon)
+        if distance <= RADIUS_KM:
+            results.append((distance, place_id))
+    results.sort()
+    return results
+
+
+def timed(function, points):
+    durations = []
+    for latitude, longitude in points:
+        db.session.expunge_all()
+        start = time.perf_counter()
+        function(latitude, longitude)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), max(durations)
+
+
+def run(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            owner = User(first_name="Bench", last_name="Owner",
+                         email="bench@example.com", password="x")
+            db.session.add(owner)
+            db.session.commit()
+
+            start = time.perf_counter()
+            load(size, owner.id)
+            print(f"{size:>9} places loaded in {time.perf_counter() - start:.1f}s")
+
+            rng = random.Random(0)
+            points = [(rng.uniform(43.0, 50.5), rng.uniform(-4.0, 7.5))
+                      for _ in range(QUERIES)]
+
+            # Both paths must agree before being compared
+            for latitude, longitude in points[:3]:
+                indexed = facade.get_places_nearby(latitude, longitude, RADIUS_KM,
+                                                   limit=size)[0]
+                assert [p.id for p, _ in indexed] == [i for _, i in full_scan(latitude, longitude)]
+
+            indexed = timed(lambda lat, lon: facade.get_places_nearby(
+                lat, lon, RADIUS_KM, limit=20), points)
+            scan = timed(full_scan, points)
+            print(f"{'':>9} geohash index: median {indexed[0]:8.1f} ms, max {indexed[1]:8.1f} ms")
+            print(f"{'':>9} full scan:     median {scan[0]:8.1f} ms, max {scan[1]:8.1f} ms")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]:
+        run(size)
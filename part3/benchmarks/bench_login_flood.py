@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Flood /api/v1/auth/login with bad passwords and watch CPU usage.
+
+Usage: python benchmarks/bench_login_flood.py [--rate 1000] [--seconds 10]
+                                              [--rounds 12] [--no-limit]
+
+Simulates credential stuffing: random wrong passwords against 20 real
+accounts from 50 client IPs, paced at --rate requests per second through
+the WSGI app in process. bcrypt runs inline (at cost --rounds) so process
+CPU time covers it. Prints one line per second: requests served,
+CPU seconds used in that second, bcrypt verifications and status codes.
+
+With the limiter, bcrypt work is capped by the per-account buckets: after
+the initial bucket capacity is spent, CPU stays flat whatever the rate; with --no-limit every attempt costs a full bcrypt verify
+and the achieved rate collapses to what the CPU can hash. When the machine
+caps this process below one core, compare cpu ms/req and bcrypt columns.
+"""
+import argparse
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db, hasher  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+ACCOUNTS = 20
+IPS = 50
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=int, default=1000)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--no-limit', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            PASSWORD_HASH_WORKERS = 0
+            BCRYPT_LOG_ROUNDS = args.rounds
+            LOGIN_RATE_LIMIT = not args.no_limit
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            emails = [f"user{i}@example.com" for i in range(ACCOUNTS)]
+            with facade.transaction():
+                for email in emails:
+                    facade.create_user({"first_name": "Flood", "last_name": "Target",
+                                        "email": email, "password": "correct horse"})
+            hasher.reset_stats()
+            db.session.remove()
+
+        client = app.test_client()
+        rng = random.Random(0)
+        interval = 1.0 / args.rate
+        print(f"limiter {'off' if args.no_limit else 'on'}, target {args.rate} req/s")
+        print(f"{'second':>6} {'requests':>9} {'cpu s':>7} {'cpu ms/req':>10} {'bcrypt':>7}  statuses")
+
+        start = time.perf_counter()
+        for second in range(args.seconds):
+            statuses = collections.Counter()
+            verifies = hasher.stats()['verify_count']
+            cpu = time.process_time()
+            second_end = start + second + 1
+            next_request = time.perf_counter()
+            while time.perf_counter() < second_end:
+                if time.perf_counter() < next_request:
+                    time.sleep(max(0.0, next_request - time.perf_counter()))
+                    continue
+                next_request += interval
+                response = client.post(
+                    '/api/v1/auth/login',
+                    json={"email": rng.choice(emails), "password": f"guess{rng.random()}"},
+                    environ_base={"REMOTE_ADDR": f"203.0.113.{rng.randrange(IPS)}"})
+                statuses[response.status_code] += 1
+            cpu = time.process_time() - cpu
+            requests = sum(statuses.values())
+            print(f"{second + 1:>6} {requests:>9} {cpu:>7.2f} "
+                  f"{cpu * 1000 / max(requests, 1):>10.2f} "
+                  f"{hasher.stats()['verify_count'] - verifies:>7}  {dict(statuses)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Measure startup time and memory per worker of serve.py, with and
+without preloading.
+
+Usage: python benchmarks/bench_prefork.py [--workers 4] [--threads 8]
+                                          [--requests 400] [--places 500]
+
+Seeds a SQLite file, then for each mode starts serve.py on a free port,
+times how long until every worker is ready to accept, sends --requests GETs
+(place pages and details, swagger.json) over fresh connections and reads
+the memory of each process from /proc (Linux only):
+
+    rss   resident memory, shared pages counted in full in every process
+    pss   proportional: shared pages split between the processes sharing them
+    uss   private to the process: what it costs to add one more worker
+"""
+import argparse
+import http.client
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.config import TestingConfig  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def seed(path, places):
+    class SeedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({"first_name": "Bench", "last_name": "Owner",
+                                    "email": "bench@example.com", "password": "secret"})
+        rng = random.Random(0)
+        ids = [place.id for place in facade.create_places_bulk([{
+            "title": f"Place {i}", "price": float(rng.randrange(20, 400)),
+            "latitude": rng.uniform(42.5, 51.0), "longitude": rng.uniform(-4.5, 8.0),
+            "owner_id": owner.id,
+        } for i in range(places)])]
+        db.session.remove()
+        db.engine.dispose()
+    return ids
+
+
+def memory(pid):
+    """(rss, pss, uss) of a process in MiB"""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        fields = dict(re.findall(r'^(\w+):\s+(\d+) kB', f.read(), re.M))
+    uss = int(fields['Private_Clean']) + int(fields['Private_Dirty'])
+    return tuple(value / 1024 for value in (int(fields['Rss']), int(fields['Pss']), uss))
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def run(args, path, place_ids, preload):
+    env = dict(os.environ, HBNB_CONFIG='production', DATABASE_URL=f"sqlite:///{path}",
+               PASSWORD_HASH_WORKERS='0', IMAGE_WORKERS='0', JOB_WORKERS='0')
+    command = [sys.executable, 'serve.py', '--bind', '127.0.0.1:0',
+               '--workers', str(args.workers), '--threads', str(args.threads),
+               '--max-requests', '0']
+    if not preload:
+        command.append('--no-preload')
+
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True)
+    try:
+        port, ready = None, 0
+        while ready < args.workers:
+            line = server.stderr.readline()
+            if not line:
+                raise RuntimeError("serve.py exited")
+            match = re.search(r'Listening at http://[^:]+:(\d+)', line)
+            port = int(match.group(1)) if match else port
+            ready += ' ready' in line
+        ready = time.perf_counter() - start
+
+        rng = random.Random(0)
+        for index in range(args.requests):
+            if index % 3 == 0:
+                status = get(port, f"/api/v1/places/?limit=20&min_price={rng.randrange(20, 350)}")
+            elif index % 3 == 1:
+                status = get(port, f"/api/v1/places/{rng.choice(place_ids)}")
+            else:
+                status = get(port, '/swagger.json')
+            if status != 200:
+                raise RuntimeError(f"Unexpected status {status}")
+
+        master = memory(server.pid)
+        workers = [memory(pid) for pid in children(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.communicate(timeout=30)
+    return ready, master, workers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--places', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        place_ids = seed(path, args.places)
+        print(f"{args.workers} workers x {args.threads} threads, {args.requests} requests")
+        print(f"{'mode':<11} {'ready s':>8} {'process':<8} {'rss MiB':>8} {'pss MiB':>8} "
+              f"{'uss MiB':>8}")
+        for preload in (True, False):
+            ready, master, workers = run(args, path, place_ids, preload)
+            mode = 'preload' if preload else 'no-preload'
+            averages = [sum(values) / len(values) for values in zip(*workers)]
+            for label, (rss, pss, uss) in (('master', master), ('worker', averages)):
+                print(f"{mode:<11} {ready:>8.2f} {label:<8} {rss:>8.1f} {pss:>8.1f} {uss:>8.1f}")
+            total = master[1] + sum(pss for _, pss, _ in workers)
+            print(f"{mode:<11} {'':>8} {'total':<8} {'':>8} {total:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Time full-text place search against a LIKE scan.
+
+Usage: python benchmarks/bench_search.py [sizes...]   (default 100000 1000000)
+
+Each size is loaded into a temporary SQLite file (the FTS5 index is filled
+by its triggers while loading). Titles are "<adjective> <kind> in <city>",
+descriptions 10-30 words drawn from a Zipf-distributed vocabulary of
+stopwords then 20k made-up words. Queries mix rare and common words,
+two-word queries, stopwords and 2-4 letter prefixes; each runs as
+GET /places/search does for a first page (20 places plus the count).
+Prints p50/p99/max latencies over 500 searches, then those of a few
+LIKE '%word%' scans for scale; CPU time is printed along wall-clock time
+since a throttled CPU stretches the latter.
+"""
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.persistence import search  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+QUERIES = 500
+BATCH = 10000
+
+ADJECTIVES = ["cosy", "bright", "quiet", "modern", "rustic", "charming", "spacious",
+              "sunny", "historic", "elegant", "tiny", "luxury", "central", "calm"]
+KINDS = ["loft", "studio", "house", "flat", "cabin", "villa", "chalet", "room",
+         "apartment", "cottage", "barn", "penthouse", "houseboat", "duplex"]
+SYLLABLES = ["ba", "ri", "lo", "ne", "ta", "mu", "si", "ko", "pe", "da", "vi", "gu",
+             "ra", "fe", "no", "li", "cha", "tre", "mon", "ber"]
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def load(size, owner_id, words, cities, rng):
+    # Zipf weights over stopwords first, as in real text: the most common
+    # word is ~2000x as frequent as the 2000th
+    words = sorted(search.STOPWORDS) + words
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    for start in range(0, size, BATCH):
+        rows = []
+        for _ in range(min(BATCH, size - start)):
+            description = rng.choices(words, cum_weights=weights, k=rng.randint(10, 30))
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "title": f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)} in {rng.choice(cities)}",
+                "description": ' '.join(description),
+                "price": 100.0,
+                "owner_id": owner_id,
+            })
+        db.session.execute(Place.__table__.insert(), rows)
+        db.session.commit()
+
+
+def queries(words, cities, rng):
+    shapes = [
+        lambda: rng.choice(cities),                                   # ~0.2% of places
+        lambda: rng.choice(KINDS),                                    # ~7%
+        lambda: f"{rng.choice(KINDS)} {rng.choice(cities)}",          # rare
+        lambda: rng.choice(words[:20]),                               # most common words
+        lambda: f"{rng.choice(KINDS)} in {rng.choice(cities)}",       # with a stopword
+        lambda: rng.choice(words[1000:]),                             # rare words
+        lambda: f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)[:3]}",  # typing a prefix
+        lambda: rng.choice(words)[:rng.randint(2, 4)],                # bare prefix
+    ]
+    return [rng.choice(shapes)() for _ in range(QUERIES)]
+
+
+def first_page(query):
+    places, next_cursor = facade.search_places(query, limit=20)
+    total = facade.count_search_places(query) if next_cursor else len(places)
+    return places, total
+
+
+def like_scan(query):
+    # Finding every match, as ranking needs to
+    pattern = f"%{query}%"
+    return Place.query.filter(Place.title.like(pattern) | Place.description.like(pattern)).count()
+
+
+def percentiles(durations):
+    durations = sorted(durations)
+    p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+    return statistics.median(durations), p99, durations[-1]
+
+
+def timed(function, items):
+    """Wall-clock and CPU (p50, p99, max) in ms"""
+    wall, cpu = [], []
+    for item in items:
+        db.session.expunge_all()
+        start, start_cpu = time.perf_counter(), time.process_time()
+        function(item)
+        wall.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.process_time() - start_cpu) * 1000)
+    return percentiles(wall), percentiles(cpu)
+
+
+def run(size):
+    rng = random.Random(size)
+    words = vocabulary(20000, rng)
+    cities = vocabulary(500, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            owner = User(first_name="Bench", last_name="Owner",
+                         email="bench@example.com", password="x")
+            db.session.add(owner)
+            db.session.commit()
+
+            start = time.perf_counter()
+            load(size, owner.id, words, cities, rng)
+            print(f"{size:>9} places loaded and indexed in {time.perf_counter() - start:.1f}s")
+
+            searches = queries(words, cities, rng)
+            for query in searches[:20]:  # warm the page cache
+                first_page(query)
+            for name, queries_run, timings in (
+                ("fts5 search", len(searches), timed(first_page, searches)),
+                ("LIKE scan", 5, timed(like_scan, [rng.choice(cities) for _ in range(5)])),
+            ):
+                for clock, (median, p99, worst) in zip(("wall", "cpu"), timings):
+                    print(f"{'':>9} {name:<11} {clock:<4}: p50 {median:7.2f} ms, "
+                          f"p99 {p99:7.2f} ms, max {worst:7.2f} ms ({queries_run} queries)")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]:
+        run(size)
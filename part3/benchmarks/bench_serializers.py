@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare hand-built response dicts with the compiled serializers.
+
+Usage: python benchmarks/bench_serializers.py [size]   (default 10000)
+
+Builds `size` Place objects in memory (5 amenities each, no database) and
+times, best of 5, the GET /places/ body both ways:
+
+    handwritten   per-request dict literal + flask-restx JSON output
+    compiled      PLACE_SUMMARY plan + json_response (orjson if installed)
+    sparse        compiled with ?fields=id,title,price
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask_restx.representations import output_json  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.api.serializers import json_response, orjson  # noqa: E402
+from app.api.v1.places import PLACE_SUMMARY  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place  # noqa: E402
+
+RUNS = 5
+
+
+def build(size):
+    rng = random.Random(size)
+    amenities = [Amenity(name=f"Amenity {i}") for i in range(20)]
+    places = []
+    for i in range(size):
+        place = Place(id=f"place-{i}", title=f"Place {i}", description="A quiet place",
+                      price=rng.uniform(20, 400), latitude=rng.uniform(42.5, 51.0),
+                      longitude=rng.uniform(-4.5, 8.0), owner_id="owner", rooms=2,
+                      capacity=4, surface=55.0, photos=[], review_count=3, rating_sum=12,
+                      rating_avg=4.0, rating_1=0, rating_2=0, rating_3=1, rating_4=1, rating_5=1)
+        place.amenities = rng.sample(amenities, 5)
+        places.append(place)
+    return places
+
+
+def handwritten(places):
+    # The GET /places/ body as built before the serializers
+    body = []
+    for place in places:
+        body.append({
+            'id': place.id,
+            'title': place.title,
+            'description': place.description,
+            'price': place.price,
+            'latitude': place.latitude,
+            'longitude': place.longitude,
+            'owner_id': place.owner_id,
+            'rooms': place.rooms,
+            'capacity': place.capacity,
+            'surface': place.surface,
+            'photos': place.photos if place.photos else [],
+            'amenities': [amenity.name for amenity in place.amenities],
+            **place.rating_stats()
+        })
+    return output_json(body, 200)
+
+
+def compiled(places, fields=None):
+    return json_response(PLACE_SUMMARY.dump_many(places, fields))
+
+
+def best(function, *args):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        response = function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), len(response.get_data())
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+    app = create_app(BenchConfig)
+    with app.test_request_context('/api/v1/places/'):
+        places = build(size)
+        print(f"{size} places, encoder: {'orjson' if orjson else 'json'}")
+        print(f"{'path':<12} {'ms':>9} {'us/place':>9} {'bytes':>10}")
+        baseline = None
+        for name, function, args in (("handwritten", handwritten, ()),
+                                     ("compiled", compiled, ()),
+                                     ("sparse", compiled, ({'id', 'title', 'price'},))):
+            seconds, size_bytes = best(function, places, *args)
+            baseline = baseline or seconds
+            print(f"{name:<12} {seconds * 1000:>9.1f} {seconds * 1e6 / size:>9.2f} "
+                  f"{size_bytes:>10}  x{baseline / seconds:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Peak RSS and time of exporting every review through GET /api/v1/reviews/.
+
+Usage: python benchmarks/bench_streaming_export.py [--size 1000000] [--buffered]
+
+Loads --size reviews into a temporary SQLite file, then exports them in a
+fresh child process per mode, so each peak RSS (ru_maxrss) is its own:
+
+    stream     the endpoint: yield_per rows streamed as a JSON array
+    ndjson     the endpoint with Accept: application/x-ndjson
+    buffered   (with --buffered) the previous path: every Review loaded
+               through the ORM and the whole body built in memory
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.review import Review  # noqa: E402
+from app.services.facade import facade  # noqa: E402
+
+BATCH = 10000
+
+
+def make_app(path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_WORKERS = 0
+        CACHE_BACKEND = 'none'
+
+    return create_app(BenchConfig)
+
+
+def load(path, size):
+    with make_app(path).app_context():
+        db.create_all()
+        user = facade.create_user({"first_name": "Bench", "last_name": "User",
+                                   "email": "bench@example.com", "password": "secret"})
+        place = facade.create_place({"title": "Place", "price": 50.0, "latitude": 45.0,
+                                     "longitude": 5.0, "owner_id": user.id})
+        now = datetime.utcnow()
+        for start in range(0, size, BATCH):
+            db.session.execute(insert(Review), [{
+                "id": str(uuid.uuid4()), "text": f"Review {i}: a fine stay, would come back",
+                "rating": i % 5 + 1, "user_id": user.id, "place_id": place.id,
+                "created_at": now, "updated_at": now,
+            } for i in range(start, min(start + BATCH, size))])
+            db.session.commit()
+
+
+def export(path, mode):
+    from app.api.serializers import json_response
+    from app.api.v1.reviews import REVIEW
+
+    app = make_app(path)
+    start = time.perf_counter()
+    size = 0
+    if mode == 'buffered':
+        with app.test_request_context('/api/v1/reviews/'):
+            size = len(json_response(REVIEW.dump_many(facade.get_all_reviews())).get_data())
+    else:
+        headers = {"Accept": "application/x-ndjson"} if mode == 'ndjson' else {}
+        response = app.test_client().get('/api/v1/reviews/', headers=headers, buffered=False)
+        for chunk in response.response:
+            size += len(chunk)
+        response.close()
+    seconds = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<9} {seconds:>8.1f} {size / 1e6:>10.1f} {rss_mb:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--buffered', action='store_true')
+    parser.add_argument('--export', nargs=2, metavar=('PATH', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.export:
+        return export(*args.export)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        start = time.perf_counter()
+        load(path, args.size)
+        print(f"{args.size} reviews loaded in {time.perf_counter() - start:.1f} s")
+        print(f"{'mode':<9} {'seconds':>8} {'body MB':>10} {'peak RSS MB':>12}")
+        modes = ['stream', 'ndjson'] + (['buffered'] if args.buffered else [])
+        for mode in modes:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--export', path, mode],
+                           check=True)
+
+
+if __name__ == '__main__':
+    main()
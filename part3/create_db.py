@@ -1,16 +1,18 @@
-from app import create_app, db
+from app import create_app, db, images, jobs
+from app.persistence import migrations
 from app.services.facade import facade
 from app.models import User
 import os
 
 app = create_app()
 
-IMAGES_FOLDER = '/home/malik31200/holbertonschool-hbnb/part4/base_files/images'
+IMAGES_FOLDER = app.config['IMAGES_FOLDER']
 
 with app.app_context():
-    # Create tables
-    db.create_all()
-    print("Tables created \n")
+    # Create or upgrade the schema
+    for migration in migrations.upgrade(db.engine):
+        print(f"Applied migration {migration.name}")
+    print("Schema up to date \n")
 
     # Create test user if not exists
     user = facade.get_user_by_email("test@example.com")
@@ -29,9 +31,16 @@ with app.app_context():
     
     if os.path.exists(IMAGES_FOLDER):
         available_images = [f for f in os.listdir(IMAGES_FOLDER)
-                            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))]
+                            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
         print(f"Found {len(available_images)} images: {available_images}\n")
         available_images.sort()
+        # Stored under their content hash; variants are rendered by the
+        # job workers (app process or worker.py)
+        available_images = [images.ingest_file(os.path.join(IMAGES_FOLDER, f), render=False)
+                            for f in available_images]
+        with facade.transaction():
+            for photo_id in available_images:
+                jobs.enqueue('render_photo', key=f'render-photo:{photo_id}', photo_id=photo_id)
     else:
         print(f"⚠️  Warning: Images folder not found at {IMAGES_FOLDER}")
 
@@ -48,7 +57,7 @@ with app.app_context():
             "rooms": 1,
             "capacity": 2,
             "surface": 25.0,
-            "photos": [f"/images/{available_images[0]}"] if len(available_images) > 0 else []
+            "photos": [available_images[0]] if len(available_images) > 0 else []
         },
         {
             "title": "Toulouse South House",
@@ -60,7 +69,7 @@ with app.app_context():
             "rooms": 4,
             "capacity": 6,
             "surface": 120.0,
-            "photos": [f"/images/{available_images[1]}"] if len(available_images) > 1 else []
+            "photos": [available_images[1]] if len(available_images) > 1 else []
         },
         {
             "title": "Lyon Confluence Apartment",
@@ -72,7 +81,7 @@ with app.app_context():
             "rooms": 3,
             "capacity": 5,
             "surface": 75.0,
-            "photos": [f"/images/{available_images[2]}"] if len(available_images) > 2 else []
+            "photos": [available_images[2]] if len(available_images) > 2 else []
         },
         {
             "title": "Marseille Vieux Port Loft",
@@ -84,7 +93,7 @@ with app.app_context():
             "rooms": 2,
             "capacity": 4,
             "surface": 55.0,
-            "photos": [f"/images/{available_images[3]}"] if len(available_images) > 3 else []
+            "photos": [available_images[3]] if len(available_images) > 3 else []
         },
         {
             "title": "Grenoble Mountain Chalet",
@@ -96,30 +105,32 @@ with app.app_context():
             "rooms": 5,
             "capacity": 8,
             "surface": 140.0,
-            "photos": [f"/images/{available_images[4]}"] if len(available_images) > 4 else []
+            "photos": [available_images[4]] if len(available_images) > 4 else []
         }
     ]
 
     existing_titles = {p.title for p in facade.get_all_places()}
-    created_places = []
+    new_places = [place_data for place_data in places_to_create
+                  if place_data["title"] not in existing_titles]
 
     for place_data in places_to_create:
-        if place_data["title"] not in existing_titles:
-            place = facade.create_place(place_data)
-            created_places.append(place)
-            print(f"Place created: {place.title} with photos: {place.photos}")
-        else:
+        if place_data["title"] in existing_titles:
             print(f"Place already exists: {place_data['title']}")
 
+    # One transaction for every place, then one for every review
+    created_places = facade.create_places_bulk(new_places)
+    for place in created_places:
+        print(f"Place created: {place.title} with photos: {place.photos}")
+
     print("\n--- Creating test reviews ---\n")
 
+    reviews_to_create = []
     for place in created_places:
-        reviews_to_create = [
+        reviews_to_create += [
             {"user_id": user.id, "place_id": place.id, "rating": 5, "text": "Amazing stay! Highly recommended."},
             {"user_id": user.id, "place_id": place.id, "rating": 4, "text": "Very comfortable and clean."}
         ]
-        for rev in reviews_to_create:
-            facade.create_review(rev)
-            print(f"Review added for {place.title}: {rev['text']}")
+    for review in facade.create_reviews_bulk(reviews_to_create):
+        print(f"Review added for {review.place.title}: {review.text}")
 
     print("\n Database setup complete!")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Apply or revert schema migrations.
+
+Usage: python migrate.py [upgrade [VERSION] | downgrade VERSION | status
+                          | reindex-search]
+
+upgrade applies every pending migration (up to VERSION if given);
+downgrade reverts the ones applied after VERSION. reindex-search rebuilds
+the place search index from the places table.
+"""
+import sys
+
+from app import create_app, db
+from app.persistence import migrations, search
+
+app = create_app()
+
+with app.app_context():
+    command, *args = sys.argv[1:] or ['upgrade']
+    if command == 'upgrade':
+        for migration in migrations.upgrade(db.engine, *args[:1]):
+            print(f"Applied {migration.name}")
+    elif command == 'downgrade' and args:
+        for migration in migrations.downgrade(db.engine, args[0]):
+            print(f"Reverted {migration.name}")
+    elif command == 'status':
+        for migration, applied in migrations.status(db.engine):
+            print(f"[{'x' if applied else ' '}] {migration.name}")
+    elif command == 'reindex-search':
+        with db.engine.begin() as connection:
+            search.rebuild(connection)
+        print("Search index rebuilt")
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""Recompute the denormalized rating aggregates of every place.
+
+Run after bulk imports or manual SQL edits to correct any drift between
+the places table and the reviews it summarizes.
+"""
+from app import create_app
+from app.services.facade import facade
+
+app = create_app()
+
+with app.app_context():
+    count = facade.recompute_rating_stats()
+    print(f"Rating aggregates recomputed for {count} places")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Run the API behind the prefork WSGI server (production), see app.server.
+
+Usage: python serve.py [--bind HOST:PORT] [--workers N] [--threads N]
+                       [--max-requests N] [--max-requests-jitter N]
+                       [--no-preload] [--access-log]
+
+Options default to the SERVER_* config keys of HBNB_CONFIG (default here:
+production). Send SIGHUP to the master to replace the workers gracefully,
+SIGTERM or Ctrl-C to stop.
+
+Each worker has its own password hashing and image pools: with many
+workers, lower PASSWORD_HASH_WORKERS and IMAGE_WORKERS accordingly.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from app import create_app
+from app.config import get_config
+from app.server import PreforkServer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--bind')
+parser.add_argument('--workers', type=int)
+parser.add_argument('--threads', type=int)
+parser.add_argument('--max-requests', type=int)
+parser.add_argument('--max-requests-jitter', type=int)
+parser.add_argument('--no-preload', dest='preload', action='store_false', default=None)
+parser.add_argument('--access-log', action='store_true')
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+
+config = get_config(os.getenv('HBNB_CONFIG', 'production'))
+server = PreforkServer.from_config(lambda: create_app(config), config, **vars(args))
+sys.exit(server.run())
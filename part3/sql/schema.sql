@@ -1,5 +1,7 @@
 PRAGMA foreign_keys = ON;
 
+DROP TABLE IF EXISTS jobs;
+DROP TABLE IF EXISTS places_fts;
 DROP TABLE IF EXISTS place_amenity;
 DROP TABLE IF EXISTS reviews;
 DROP TABLE IF EXISTS places;
@@ -13,10 +15,14 @@ CREATE TABLE users (
     email VARCHAR(255) NOT NULL UNIQUE,
     password VARCHAR(255) NOT NULL,
     is_admin BOOLEAN DEFAULT FALSE,
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    deleted_at DATETIME
 );
 
+CREATE INDEX ix_users_updated_at ON users (updated_at);
+
 CREATE TABLE places (
     id CHAR(36) PRIMARY KEY,
     title VARCHAR(255) NOT NULL,
@@ -27,9 +33,46 @@ CREATE TABLE places (
     owner_id CHAR(36) NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    deleted_at DATETIME,
+    search_rowid INTEGER,
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+CREATE INDEX ix_places_created_at_id ON places (created_at, id);
+CREATE INDEX ix_places_price ON places (price);
+CREATE INDEX ix_places_owner_id ON places (owner_id);
+CREATE INDEX ix_places_updated_at ON places (updated_at);
+CREATE INDEX ix_places_deleted_at ON places (deleted_at);
+CREATE UNIQUE INDEX ix_places_search_rowid ON places (search_rowid);
+
+-- Full-text search on title and description, kept in sync by triggers and
+-- keyed by search_rowid, which the insert trigger assigns (VACUUM may
+-- renumber the implicit rowid)
+CREATE VIRTUAL TABLE places_fts USING fts5(
+    title, description, content='places', content_rowid='search_rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='3 4 5 6'
+);
+
+CREATE TRIGGER places_fts_insert AFTER INSERT ON places BEGIN
+    UPDATE places SET search_rowid = (
+        SELECT coalesce(max(search_rowid), 0) + 1 FROM places)
+    WHERE rowid = new.rowid AND new.search_rowid IS NULL;
+    INSERT INTO places_fts (rowid, title, description)
+    SELECT search_rowid, title, description FROM places WHERE rowid = new.rowid;
+END;
+
+CREATE TRIGGER places_fts_delete AFTER DELETE ON places BEGIN
+    INSERT INTO places_fts (places_fts, rowid, title, description)
+    VALUES ('delete', old.search_rowid, old.title, old.description);
+END;
+
+CREATE TRIGGER places_fts_update AFTER UPDATE OF title, description ON places BEGIN
+    INSERT INTO places_fts (places_fts, rowid, title, description)
+    VALUES ('delete', old.search_rowid, old.title, old.description);
+    INSERT INTO places_fts (rowid, title, description)
+    VALUES (new.search_rowid, new.title, new.description);
+END;
+
 CREATE TABLE reviews (
     id CHAR(36) PRIMARY KEY,
     text TEXT NOT NULL,
@@ -38,11 +81,16 @@ CREATE TABLE reviews (
     place_id CHAR(36) NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    deleted_at DATETIME,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (place_id) REFERENCES places(id) ON DELETE CASCADE,
     UNIQUE (user_id, place_id)
 );
 
+CREATE INDEX ix_reviews_place_id_created_at_id ON reviews (place_id, created_at, id);
+CREATE INDEX ix_reviews_user_id ON reviews (user_id);
+CREATE INDEX ix_reviews_updated_at ON reviews (updated_at);
+
 CREATE TABLE amenities (
     id CHAR(36) PRIMARY KEY,
     name VARCHAR(255) UNIQUE NOT NULL,
@@ -50,6 +98,8 @@ CREATE TABLE amenities (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_amenities_updated_at ON amenities (updated_at);
+
 CREATE TABLE place_amenity (
     place_id CHAR(36) NOT NULL,
     amenity_id CHAR(36) NOT NULL,
@@ -57,3 +107,23 @@ CREATE TABLE place_amenity (
     FOREIGN KEY (place_id) REFERENCES places(id) ON DELETE CASCADE,
     FOREIGN KEY (amenity_id) REFERENCES amenities(id) ON DELETE CASCADE
 );
+
+CREATE INDEX ix_place_amenity_amenity_id ON place_amenity (amenity_id, place_id);
+
+CREATE TABLE jobs (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(64) NOT NULL,
+    payload JSON NOT NULL,
+    key VARCHAR(128) UNIQUE,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(64),
+    locked_until DATETIME,
+    last_error VARCHAR(1024),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME
+);
+
+CREATE INDEX ix_jobs_status_run_at ON jobs (status, run_at);
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Run background jobs outside the web process (local use).
+
+Usage: python worker.py [THREADS] [--once]
+
+Runs the jobs of app.jobs against the configured database with THREADS
+worker threads (default JOB_WORKERS, at least 1) until interrupted; with
+--once, runs the jobs due now and exits. Set JOB_WORKERS=0 for the web
+process to leave every job to this one. Job metrics are printed on exit.
+"""
+import json
+import signal
+import sys
+import threading
+
+from app import create_app, jobs
+
+app = create_app()
+
+args = sys.argv[1:]
+once = '--once' in args
+args = [arg for arg in args if arg != '--once']
+if len(args) > 1 or (args and not args[0].isdigit()):
+    sys.exit(__doc__)
+
+with app.app_context():
+    if once:
+        print(f"Ran {jobs.run_pending()} jobs")
+    else:
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+        jobs.start(int(args[0]) if args else None)
+        print(f"Running jobs with {jobs.stats()['workers']} threads, Ctrl-C to stop")
+        try:
+            while not stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        jobs.stop()
+    print(json.dumps(jobs.stats(), indent=2, default=str))
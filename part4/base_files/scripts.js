@@ -92,31 +92,51 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     const token = getCookie('token');
 
-    try{
-        const headers = {};
-        if (token) {
-            headers['Authorization'] = `Bearer ${token}`;
-        }
-        
-        const response = await fetch('http://127.0.0.1:5000/api/v1/places/', {
-            headers: {
-                'Authorization': `Bearer ${token}`
+    await fetchPlaces(token);
+    setupPriceFilter(token);
+});
+
+async function fetchPlaces(token, maxPrice = 'all') {
+    const params = new URLSearchParams({ limit: 100 });
+    if (maxPrice !== 'all') {
+        params.set('max_price', maxPrice);
+    }
+
+    const headers = {};
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+
+    try {
+        const places = [];
+        let cursor = null;
+
+        // Follow the keyset cursor until the server reports no next page
+        do {
+            if (cursor) {
+                params.set('after', cursor);
             }
-        });
+            const response = await fetch(`http://127.0.0.1:5000/api/v1/places/?${params}`, {
+                headers: headers
+            });
 
-        if (!response.ok) {
-            console.error('Failed to fetch places');
-            return;
-        }
-        
-        const places = await response.json();
+            if (response.status === 404) {
+                break;
+            }
+            if (!response.ok) {
+                console.error('Failed to fetch places');
+                return;
+            }
+
+            places.push(...await response.json());
+            cursor = response.headers.get('X-Next-Cursor');
+        } while (cursor);
 
         displayPlaces(places);
-        setupPriceFilter();
     } catch (error) {
         console.error('Error fetching places:', error);
     }
-});
+}
 
 function displayPlaces(places) {
     const list = document.getElementById('places-list');
@@ -128,8 +148,10 @@ function displayPlaces(places) {
         div.className = "place-card";
         div.dataset.price = place.price;
 
-        const imageUrl = place.photos && place.photos.length > 0 
-            ? `http://127.0.0.1:5000${place.photos[0]}`
+        // Card-sized variant when the photo has them, the file itself otherwise
+        const photo = place.images && place.images.length > 0 ? place.images[0] : null;
+        const imageUrl = photo
+            ? `http://127.0.0.1:5000${photo.variants.card ? photo.variants.card.webp : photo.src}`
             : 'http://127.0.0.1:5000/images/placeholder.jpg';
 
         div.innerHTML = `
@@ -148,23 +170,12 @@ function displayPlaces(places) {
     });
 }
 
-function setupPriceFilter() {
+function setupPriceFilter(token) {
     const filter = document.getElementById('price-filter');
     if (!filter) return;
 
     filter.addEventListener("change", () => {
-        const maxPrice = filter.value;
-        const cards = document.querySelectorAll('.place-card');
-
-        cards.forEach(card => {
-            const price = parseFloat(card.dataset.price);
-
-            if (maxPrice === 'all' || price <= maxPrice) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        });
+        fetchPlaces(token, filter.value);
     });
 }
 